@@ -0,0 +1,294 @@
+"""
+多维汇总分析
+
+按任意维度组合（工人、工序、工段类别、工序类别、型号、日、周、月）汇总工作记录的数量、金额、记录数和工人数，
+支持过滤和取前K名。只按月份汇总且不需要工人数时读取触发器维护的月度汇总表，其余情况在工作记录上分组汇总
+（启用DuckDB分析引擎时在DuckDB上执行，见 analytics_engine）。
+
+汇总结果按（维度, 过滤条件）缓存为一个立方体单元，包含全部度量和全部分组，取前K名和选择度量在缓存结果上进行；
+工作记录或定额的变更版本（由触发器维护）变化后缓存失效。
+"""
+import heapq
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, cast, func, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .analytics_engine import get_duckdb_analytics
+from .reference_cache import reference_cache
+from .utils.money import from_cents, from_hundredths
+
+logger = logging.getLogger(__name__)
+
+# 缓存的立方体单元数和单个单元的最大分组数
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "128"))
+ANALYTICS_MAX_GROUPS = int(os.getenv("ANALYTICS_MAX_GROUPS", "50000"))
+
+# 维度：编码维度 -> (定额或工作记录的列名, 名称取自的基础数据)
+CODE_DIMENSIONS = {
+    "worker": ("worker_code", "workers"),
+    "process": ("process_code", "processes"),
+    "cat1": ("cat1_code", "process_cat1"),
+    "cat2": ("cat2_code", "process_cat2"),
+    "model": ("model_name", None),
+}
+TIME_DIMENSIONS = ("day", "week", "month")
+DIMENSIONS = tuple(CODE_DIMENSIONS) + TIME_DIMENSIONS
+MEASURES = ("quantity", "amount", "record_count", "distinct_workers")
+# 月度汇总表可以提供的度量
+ROLLUP_MEASURES = ("quantity", "amount", "record_count")
+# 过滤条件：维度 -> 列名（日期区间单独处理）
+FILTER_COLUMNS = {dimension: column for dimension, (column, _) in CODE_DIMENSIONS.items()}
+
+# 数据来源
+SOURCE_ROLLUP = "rollup"
+SOURCE_RAW = "raw"
+
+# 影响汇总结果的表（按定额维度分组时依赖定额的编码）
+DEPENDENT_TABLES = ("work_records", "quotas")
+
+@dataclass(frozen=True)
+class AggregateFilters:
+    """过滤条件：各编码维度的取值集合和日期区间（包含两端）"""
+    codes: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+    @classmethod
+    def build(cls, codes: Dict[str, Optional[List[str]]], start_date: Optional[date] = None,
+              end_date: Optional[date] = None) -> "AggregateFilters":
+        """规范化过滤条件（去空白、去重、排序），相同条件得到相同的缓存键"""
+        if start_date and end_date and start_date > end_date:
+            raise ValueError("start_date must not be after end_date")
+        normalized = []
+        for dimension, values in sorted(codes.items()):
+            if dimension not in FILTER_COLUMNS:
+                raise ValueError(f"Unknown filter: {dimension}")
+            values = tuple(sorted({value.strip() for value in values or () if value.strip()}))
+            if values:
+                normalized.append((dimension, values))
+        return cls(tuple(normalized), start_date, end_date)
+
+    def month_aligned(self) -> bool:
+        """日期区间是否由整月组成（月度汇总表可以回答）"""
+        return ((self.start_date is None or self.start_date.day == 1)
+                and (self.end_date is None or (self.end_date + timedelta(days=1)).day == 1))
+
+@dataclass
+class Cube:
+    """一个立方体单元：维度组合在过滤条件下的全部分组及度量"""
+    source: str
+    measures: Tuple[str, ...]
+    engine: str
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+
+# (维度, 过滤条件) -> (数据版本, 立方体单元)
+_cache: "OrderedDict[Tuple, Tuple[Tuple, Cube]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def parse_list(value: Optional[str], allowed: Tuple[str, ...], name: str) -> Tuple[str, ...]:
+    """解析逗号分隔的维度或度量列表（保持顺序、去重）"""
+    items = tuple(dict.fromkeys(item.strip() for item in (value or "").split(",") if item.strip()))
+    unknown = [item for item in items if item not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown {name}: {', '.join(unknown)}; allowed: {', '.join(allowed)}")
+    return items
+
+def _period(db: Session, dimension: str):
+    """时间维度的分组表达式（日期均以字符串YYYY-MM-DD表示，周以周一的日期表示）"""
+    record_date = models.WorkRecord.record_date
+    if dimension == "day":
+        return record_date
+    if db.bind.dialect.name == "postgresql":
+        if dimension == "month":
+            return func.to_char(record_date, "YYYY-MM")
+        return cast(func.date_trunc("week", record_date), Date)
+    if dimension == "month":
+        return func.strftime("%Y-%m", record_date)
+    # SQLite：%w 为0（周日）到6（周六），回退到本周一
+    return func.date(record_date, func.printf("-%d days", (func.strftime("%w", record_date) + 6) % 7))
+
+def _uses_rollup(dimensions: Tuple[str, ...], measures: Tuple[str, ...], filters: AggregateFilters) -> bool:
+    return (set(dimensions) <= {"month"} and set(measures) <= set(ROLLUP_MEASURES)
+            and not filters.codes and filters.month_aligned())
+
+def _rollup_rows(db: Session, dimensions: Tuple[str, ...], filters: AggregateFilters) -> List[tuple]:
+    totals = models.WorkRecordMonthTotal
+    conditions = [totals.record_count > 0]
+    if filters.start_date:
+        conditions.append(totals.month >= filters.start_date.strftime("%Y-%m"))
+    if filters.end_date:
+        conditions.append(totals.month <= filters.end_date.strftime("%Y-%m"))
+    measures = (
+        func.coalesce(func.sum(totals.quantity_hundredths), 0),
+        func.coalesce(func.sum(totals.amount_cents), 0),
+        func.coalesce(func.sum(totals.record_count), 0),
+    )
+    if dimensions:
+        query = select(totals.month, *measures).where(*conditions).group_by(totals.month)
+    else:
+        query = select(*measures).where(*conditions)
+    return db.execute(query).all()
+
+def _raw_rows(db: Session, dimensions: Tuple[str, ...], filters: AggregateFilters) -> List[tuple]:
+    record, quota = models.WorkRecord, models.Quota
+
+    def column(dimension: str):
+        name = CODE_DIMENSIONS[dimension][0]
+        return getattr(record, name) if dimension == "worker" else getattr(quota, name)
+
+    groups = [_period(db, dimension) if dimension in TIME_DIMENSIONS else column(dimension) for dimension in dimensions]
+    conditions = [column(dimension).in_(values) for dimension, values in filters.codes]
+    if filters.start_date:
+        conditions.append(record.record_date >= filters.start_date)
+    if filters.end_date:
+        conditions.append(record.record_date <= filters.end_date)
+    query = select(
+        *groups,
+        func.coalesce(func.sum(record.quantity_hundredths), 0),
+        func.coalesce(func.sum(record.amount_cents), 0),
+        func.count(),
+        func.count(record.worker_code.distinct()),
+    ).select_from(record).where(*conditions)
+    # 只有按定额维度分组或过滤时才关联定额表
+    code_dimensions = {dimension for dimension in dimensions if dimension in CODE_DIMENSIONS} | {
+        dimension for dimension, _ in filters.codes
+    }
+    if code_dimensions - {"worker"}:
+        query = query.join(quota, record.quota_id == quota.id)
+    if groups:
+        query = query.group_by(*groups)
+    return db.execute(query).all()
+
+def _data_version(db: Session) -> Tuple[Optional[int], ...]:
+    versions = dict(db.execute(
+        select(models.TableVersion.table_name, models.TableVersion.version)
+        .where(models.TableVersion.table_name.in_(DEPENDENT_TABLES))
+    ).all())
+    return tuple(versions.get(table_name) for table_name in DEPENDENT_TABLES)
+
+def _label(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, date) else value
+
+def load_cube(db: Session, dimensions: Tuple[str, ...], measures: Tuple[str, ...],
+              filters: AggregateFilters) -> Tuple[Cube, bool]:
+    """
+    获取立方体单元（版本号未变化时取缓存）
+
+    Returns:
+        (立方体单元, 是否来自缓存)
+
+    Raises:
+        ValueError: 分组数超过 ANALYTICS_MAX_GROUPS
+    """
+    version = _data_version(db)
+    key = (tuple(sorted(dimensions)), filters)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == version and None not in version and set(measures) <= set(cached[1].measures):
+            _cache.move_to_end(key)
+            return cached[1], True
+
+    # 缓存单元的维度按名称排序，同一组维度不同顺序的请求共用
+    cube_dimensions = key[0]
+    if _uses_rollup(cube_dimensions, measures, filters):
+        cube = Cube(SOURCE_ROLLUP, ROLLUP_MEASURES, db.bind.dialect.name)
+        rows = _rollup_rows(db, cube_dimensions, filters)
+    else:
+        cube = Cube(SOURCE_RAW, MEASURES, db.bind.dialect.name)
+        rows = None
+        duckdb_analytics = get_duckdb_analytics()
+        if duckdb_analytics is not None:
+            try:
+                rows = duckdb_analytics.aggregate_rows(db, cube_dimensions, filters, dict(zip(DEPENDENT_TABLES, version)))
+                cube.engine = "duckdb"
+            except Exception as e:
+                logger.warning(f"DuckDB汇总失败，改用业务库: {e}")
+        if rows is None:
+            rows = _raw_rows(db, cube_dimensions, filters)
+    if len(rows) > ANALYTICS_MAX_GROUPS:
+        raise ValueError(f"Too many groups ({len(rows)} > {ANALYTICS_MAX_GROUPS}); narrow the filters or dimensions")
+
+    count = len(cube_dimensions)
+    for row in rows:
+        item = {dimension: _label(value) for dimension, value in zip(cube_dimensions, row)}
+        item.update(zip(cube.measures, row[count:]))
+        cube.rows.append(item)
+
+    with _cache_lock:
+        _cache[key] = (version, cube)
+        _cache.move_to_end(key)
+        while len(_cache) > ANALYTICS_CACHE_SIZE:
+            _cache.popitem(last=False)
+    logger.debug(f"汇总分析: dimensions={cube_dimensions}, source={cube.source}, engine={cube.engine}, groups={len(cube.rows)}")
+    return cube, False
+
+def aggregate(db: Session, dimensions: Tuple[str, ...], measures: Tuple[str, ...], filters: AggregateFilters,
+              top: Optional[int] = None, order_by: Optional[str] = None) -> Dict[str, Any]:
+    """
+    多维汇总
+
+    Args:
+        dimensions: 分组维度（为空时汇总为一行）
+        measures: 度量（为空时返回全部可用度量）
+        filters: 过滤条件
+        top: 只返回按 order_by 降序的前K个分组
+        order_by: 排序度量，默认为第一个度量
+
+    Raises:
+        ValueError: 参数不合法或分组数过多
+    """
+    measures = measures or ROLLUP_MEASURES + ("distinct_workers",)
+    order_by = order_by or measures[0]
+    if order_by not in measures:
+        raise ValueError("order_by must be one of the requested measures")
+
+    cube, cached = load_cube(db, dimensions, measures, filters)
+    if top is not None:
+        rows = heapq.nlargest(top, cube.rows, key=lambda row: row[order_by])
+    else:
+        rows = sorted(cube.rows, key=lambda row: tuple(str(row[dimension]) for dimension in dimensions))
+
+    reference = reference_cache.get(db)
+    names = {
+        dimension: getattr(reference, source)
+        for dimension, (_, source) in CODE_DIMENSIONS.items() if source and dimension in dimensions
+    }
+    result_rows = []
+    for row in rows:
+        item = {}
+        for dimension in dimensions:
+            item[dimension] = row[dimension]
+            if dimension in names:
+                entry = names[dimension].get(row[dimension])
+                item[f"{dimension}_name"] = entry.name if entry else None
+        for measure in measures:
+            value = row[measure]
+            if measure == "quantity":
+                value = from_hundredths(value)
+            elif measure == "amount":
+                value = from_cents(value)
+            item[measure] = value
+        result_rows.append(item)
+
+    return {
+        "dimensions": list(dimensions),
+        "measures": list(measures),
+        "source": cube.source,
+        "engine": cube.engine,
+        "cached": cached,
+        "group_count": len(cube.rows),
+        "rows": result_rows,
+    }
+
+def clear_cache() -> None:
+    """清空立方体缓存（测试用）"""
+    with _cache_lock:
+        _cache.clear()
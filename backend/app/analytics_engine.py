@@ -0,0 +1,285 @@
+"""
+汇总分析的DuckDB引擎（可选）
+
+ANALYTICS_BACKEND=duckdb 时，汇总分析中需要扫描工作记录的查询在DuckDB（列式存储、向量化并行执行）上执行，
+不占用业务库的读连接；默认 sqlite 时直接查询业务库。两种方式：
+
+- ANALYTICS_DUCKDB_MODE=mirror（默认）：将工作记录和定额复制到本地DuckDB文件（ANALYTICS_DUCKDB_PATH），
+  查询前按变更版本（由触发器维护）增量同步：修改过的记录按修改标记（work_records.change_version，
+  修改时由触发器写入当时的表版本号）重新复制，新记录按ID水位追加；再与月度汇总表逐月核对记录数、数量和金额，
+  不一致的月份（记录被删除过）整月重新复制。定额表较小，版本变化时整表复制。
+  镜像结构版本（MIRROR_LAYOUT）变化时清空镜像并整体重新复制。
+- ANALYTICS_DUCKDB_MODE=attach：以只读方式挂载SQLite数据库文件，总是读到最新数据，
+  需要DuckDB的sqlite扩展（首次使用时联网安装，离线部署需预先安装）。
+
+未安装duckdb、挂载模式下业务库不是SQLite文件或初始化失败时记录警告，汇总分析继续使用业务库。
+"""
+import logging
+import os
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import DATABASE_URL, PROJECT_ROOT
+from .utils.query_helpers import month_bounds
+
+try:
+    import duckdb
+except ImportError:  # 可选依赖
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+# 分析引擎：sqlite（业务库）或 duckdb；DuckDB的使用方式和镜像文件路径
+ANALYTICS_BACKEND = os.getenv("ANALYTICS_BACKEND", "sqlite")
+ANALYTICS_DUCKDB_MODE = os.getenv("ANALYTICS_DUCKDB_MODE", "mirror")
+ANALYTICS_DUCKDB_PATH = os.getenv("ANALYTICS_DUCKDB_PATH", os.path.join(PROJECT_ROOT, "analytics.duckdb"))
+# 镜像同步时每批读取的记录数
+MIRROR_CHUNK_SIZE = int(os.getenv("ANALYTICS_MIRROR_CHUNK_SIZE", "50000"))
+
+MODE_MIRROR = "mirror"
+MODE_ATTACH = "attach"
+
+# 日期在复制时转换为距1970-01-01的天数，由DuckDB换算回DATE
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# 镜像结构版本：镜像的内容或同步方式变化时递增，旧镜像整体重新复制
+MIRROR_LAYOUT = 2
+
+MIRROR_DDL = (
+    "CREATE TABLE IF NOT EXISTS work_records (id BIGINT, worker_code VARCHAR, quota_id BIGINT, "
+    "quantity_hundredths BIGINT, amount_cents BIGINT, record_date DATE)",
+    "CREATE TABLE IF NOT EXISTS quotas (id BIGINT, process_code VARCHAR, cat1_code VARCHAR, cat2_code VARCHAR, model_name VARCHAR)",
+    "CREATE TABLE IF NOT EXISTS mirror_state (name VARCHAR PRIMARY KEY, version BIGINT)",
+)
+
+# 分组维度的DuckDB表达式（工作记录别名w，定额别名q）
+DIMENSION_SQL = {
+    "worker": "w.worker_code",
+    "process": "q.process_code",
+    "cat1": "q.cat1_code",
+    "cat2": "q.cat2_code",
+    "model": "q.model_name",
+    "day": "w.record_date",
+    "week": "CAST(date_trunc('week', w.record_date) AS DATE)",
+    "month": "strftime(w.record_date, '%Y-%m')",
+}
+
+class DuckDBAnalytics:
+    """DuckDB分析引擎（镜像或挂载业务库）"""
+
+    def __init__(self, mode: str, path: Optional[str] = None, sqlite_path: Optional[str] = None):
+        self.mode = mode
+        self._lock = threading.Lock()
+        if mode == MODE_MIRROR:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.connection = duckdb.connect(path)
+            for statement in MIRROR_DDL:
+                self.connection.execute(statement)
+            self._check_layout()
+            self.prefix = ""
+        elif mode == MODE_ATTACH:
+            self.connection = duckdb.connect()
+            self.connection.execute("INSTALL sqlite")
+            self.connection.execute("LOAD sqlite")
+            self.connection.execute(f"ATTACH '{sqlite_path}' AS payroll (TYPE sqlite, READ_ONLY)")
+            self.prefix = "payroll."
+        else:
+            raise ValueError(f"Unknown ANALYTICS_DUCKDB_MODE: {mode}")
+
+    def _check_layout(self) -> None:
+        """镜像结构版本不一致时清空镜像（下次同步时整体重新复制）"""
+        layout = self.connection.execute("SELECT version FROM mirror_state WHERE name = 'layout'").fetchone()
+        if layout and layout[0] == MIRROR_LAYOUT:
+            return
+        for table_name in ("work_records", "quotas", "mirror_state"):
+            self.connection.execute(f"DELETE FROM {table_name}")
+        self.connection.execute("INSERT INTO mirror_state VALUES ('layout', ?)", [MIRROR_LAYOUT])
+        logger.info(f"分析镜像结构版本变化，将整体重新复制: layout={MIRROR_LAYOUT}")
+
+    def aggregate_rows(self, db: Session, dimensions: Tuple[str, ...], filters, versions: Dict[str, Optional[int]]) -> List[tuple]:
+        """
+        按维度分组汇总工作记录，返回的行与 analytics 中业务库查询的格式相同：
+        (各维度值..., 数量合计, 金额合计, 记录数, 工人数)
+        """
+        if self.mode == MODE_MIRROR:
+            self.sync(db, versions)
+        groups = [DIMENSION_SQL[dimension] for dimension in dimensions]
+        conditions, params = [], []
+        for dimension, values in filters.codes:
+            conditions.append(f"{DIMENSION_SQL[dimension]} IN ({', '.join('?' * len(values))})")
+            params += values
+        if filters.start_date:
+            conditions.append("w.record_date >= ?")
+            params.append(filters.start_date)
+        if filters.end_date:
+            conditions.append("w.record_date <= ?")
+            params.append(filters.end_date)
+        sql = (
+            f"SELECT {''.join(group + ', ' for group in groups)}"
+            "COALESCE(SUM(w.quantity_hundredths), 0), COALESCE(SUM(w.amount_cents), 0), COUNT(*), COUNT(DISTINCT w.worker_code) "
+            f"FROM {self.prefix}work_records w"
+        )
+        # 只有按定额维度分组或过滤时才关联定额表
+        if any(sql_expression.startswith("q.") for sql_expression in groups) or any(
+            DIMENSION_SQL[dimension].startswith("q.") for dimension, _ in filters.codes
+        ):
+            sql += f" JOIN {self.prefix}quotas q ON w.quota_id = q.id"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if groups:
+            sql += " GROUP BY " + ", ".join(groups)
+        # 每个查询使用独立的游标，可与同步并发执行
+        with self.connection.cursor() as cursor:
+            return cursor.execute(sql, params).fetchall()
+
+    def sync(self, db: Session, versions: Dict[str, Optional[int]]) -> None:
+        """按业务库的变更版本增量同步镜像（版本号未变化时不读取业务库）"""
+        with self._lock:
+            state = dict(self.connection.execute("SELECT name, version FROM mirror_state").fetchall())
+            changed = [name for name in ("quotas", "work_records") if versions.get(name) is None or state.get(name) != versions[name]]
+            if not changed:
+                return
+            self.connection.execute("BEGIN TRANSACTION")
+            try:
+                if "quotas" in changed:
+                    self._copy_quotas(db)
+                if "work_records" in changed:
+                    record = models.WorkRecord
+                    watermark = self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM work_records").fetchone()[0]
+                    # 上次同步之后修改过的记录（标记的版本号不小于上次同步时的版本号）替换为业务库中的当前值
+                    synced_version = state.get("work_records")
+                    updated = 0
+                    if synced_version is not None:
+                        updated = self._copy_records(
+                            db, record.change_version >= synced_version, record.id <= watermark, replace=True
+                        )
+                    appended = self._copy_records(db, record.id > watermark)
+                    repaired = self._repair_months(db)
+                    logger.info(f"分析镜像已同步: updated={updated}, appended={appended}, repaired_months={repaired}")
+                for name in changed:
+                    if versions.get(name) is not None:
+                        self.connection.execute(
+                            "INSERT INTO mirror_state VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET version = excluded.version",
+                            [name, versions[name]],
+                        )
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def _copy_quotas(self, db: Session) -> None:
+        quota = models.Quota
+        rows = db.execute(select(quota.id, quota.process_code, quota.cat1_code, quota.cat2_code, quota.model_name)).all()
+        self.connection.execute("DELETE FROM quotas")
+        if rows:
+            ids, process_codes, cat1_codes, cat2_codes, model_names = zip(*rows)
+            self._insert("quotas", {
+                "id": np.array(ids, np.int64),
+                "process_code": np.array(process_codes, object),
+                "cat1_code": np.array(cat1_codes, object),
+                "cat2_code": np.array(cat2_codes, object),
+                "model_name": np.array(model_names, object),
+            }, "id, process_code, cat1_code, cat2_code, model_name")
+
+    def _copy_records(self, db: Session, *conditions, replace: bool = False) -> int:
+        """分批读取满足条件的工作记录并以NumPy列批量写入镜像（replace时先删除镜像中ID相同的旧行）"""
+        record = models.WorkRecord
+        query = select(
+            record.id, record.worker_code, record.quota_id, record.quantity_hundredths,
+            func.coalesce(record.amount_cents, 0), record.record_date,
+        ).where(*conditions).execution_options(yield_per=MIRROR_CHUNK_SIZE)
+        count = 0
+        for chunk in db.execute(query).partitions():
+            ids, worker_codes, quota_ids, quantities, amounts, record_dates = zip(*chunk)
+            size = len(chunk)
+            self._insert("work_records", {
+                "id": np.fromiter(ids, np.int64, size),
+                "worker_code": np.array(worker_codes, object),
+                "quota_id": np.fromiter(quota_ids, np.int64, size),
+                "quantity_hundredths": np.fromiter(quantities, np.int64, size),
+                "amount_cents": np.fromiter(amounts, np.int64, size),
+                "day": np.fromiter((record_date.toordinal() - EPOCH_ORDINAL for record_date in record_dates), np.int32, size),
+            }, "id, worker_code, quota_id, quantity_hundredths, amount_cents, DATE '1970-01-01' + day", replace=replace)
+            count += size
+        return count
+
+    def _insert(self, table_name: str, columns: Dict[str, np.ndarray], select_list: str, replace: bool = False) -> None:
+        self.connection.register("incoming", columns)
+        try:
+            if replace:
+                self.connection.execute(f"DELETE FROM {table_name} WHERE id IN (SELECT id FROM incoming)")
+            self.connection.execute(f"INSERT INTO {table_name} SELECT {select_list} FROM incoming")
+        finally:
+            self.connection.unregister("incoming")
+
+    def _repair_months(self, db: Session) -> List[str]:
+        """与月度汇总表逐月核对，重新复制不一致的月份（删除的记录不留修改标记，由此发现）"""
+        totals = models.WorkRecordMonthTotal
+        source = {
+            month: (record_count, quantity, amount)
+            for month, record_count, quantity, amount in db.execute(
+                select(totals.month, totals.record_count, totals.quantity_hundredths, totals.amount_cents)
+                .where(totals.record_count > 0)
+            )
+        }
+        mirror = {
+            month: (record_count, quantity, amount)
+            for month, record_count, quantity, amount in self.connection.execute(
+                "SELECT strftime(record_date, '%Y-%m'), COUNT(*), SUM(quantity_hundredths), SUM(amount_cents) "
+                "FROM work_records GROUP BY 1"
+            ).fetchall()
+        }
+        repaired = sorted(month for month in source.keys() | mirror.keys() if source.get(month) != mirror.get(month))
+        record_date = models.WorkRecord.record_date
+        for month in repaired:
+            start, end = month_bounds(month)
+            self.connection.execute("DELETE FROM work_records WHERE record_date >= ? AND record_date < ?", [start, end])
+            self._copy_records(db, record_date >= start, record_date < end)
+        return repaired
+
+    def close(self) -> None:
+        self.connection.close()
+
+_engine: Optional[DuckDBAnalytics] = None
+_engine_lock = threading.Lock()
+_engine_unavailable = False
+
+def get_duckdb_analytics() -> Optional[DuckDBAnalytics]:
+    """按配置获取DuckDB分析引擎（首次使用时创建），未启用或不可用时返回None"""
+    global _engine, _engine_unavailable
+    if ANALYTICS_BACKEND != "duckdb" or _engine_unavailable:
+        return None
+    if _engine is not None:
+        return _engine
+    with _engine_lock:
+        if _engine is None and not _engine_unavailable:
+            try:
+                if duckdb is None:
+                    raise RuntimeError("duckdb is not installed")
+                sqlite_path = None
+                if ANALYTICS_DUCKDB_MODE == MODE_ATTACH:
+                    url = make_url(DATABASE_URL)
+                    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+                        raise RuntimeError("attach mode requires a SQLite database file")
+                    sqlite_path = url.database
+                _engine = DuckDBAnalytics(ANALYTICS_DUCKDB_MODE, ANALYTICS_DUCKDB_PATH, sqlite_path)
+                logger.info(f"汇总分析使用DuckDB: mode={ANALYTICS_DUCKDB_MODE}")
+            except Exception as e:
+                _engine_unavailable = True
+                logger.warning(f"DuckDB分析引擎不可用，汇总分析使用业务库: {e}")
+    return _engine
+
+def reset_duckdb_analytics() -> None:
+    """关闭并丢弃DuckDB分析引擎（配置变化后重新创建，测试用）"""
+    global _engine, _engine_unavailable
+    with _engine_lock:
+        if _engine is not None:
+            _engine.close()
+        _engine, _engine_unavailable = None, False
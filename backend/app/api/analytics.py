@@ -0,0 +1,56 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from .. import schemas
+from ..analytics import DIMENSIONS, MEASURES, AggregateFilters, aggregate, parse_list
+from ..database import get_read_db
+from ..dependencies import get_report_user
+from ..utils.single_flight import flight_key, single_flight
+
+# 创建路由（汇总分析为只读查询，使用读库会话）
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+    responses={404: {"description": "Not found"}},
+)
+
+# 每行只返回请求的维度和度量（未设置的字段不输出）
+@router.get("/aggregate", response_model=schemas.AggregateResult, response_model_exclude_unset=True)
+def aggregate_work_records(
+    dimensions: Optional[str] = Query(None, description=f"分组维度，逗号分隔：{', '.join(DIMENSIONS)}"),
+    measures: Optional[str] = Query(None, description=f"度量，逗号分隔（默认全部）：{', '.join(MEASURES)}"),
+    worker: Optional[List[str]] = Query(None, description="按工号过滤（可重复）"),
+    process: Optional[List[str]] = Query(None, description="按工序编码过滤（可重复）"),
+    cat1: Optional[List[str]] = Query(None, description="按工段类别编码过滤（可重复）"),
+    cat2: Optional[List[str]] = Query(None, description="按工序类别编码过滤（可重复）"),
+    model: Optional[List[str]] = Query(None, description="按电机型号过滤（可重复）"),
+    start_date: Optional[date] = Query(None, description="开始日期（包含）"),
+    end_date: Optional[date] = Query(None, description="结束日期（包含）"),
+    top: Optional[int] = Query(None, ge=1, le=1000, description="只返回按 order_by 降序的前K个分组"),
+    order_by: Optional[str] = Query(None, description="top的排序度量，默认为第一个度量"),
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(get_report_user)
+):
+    """
+    多维汇总：按任意维度组合汇总工作记录的数量、金额、记录数和工人数
+
+    只按月份汇总时读取月度汇总表，其余情况在工作记录上分组；结果按（维度, 过滤条件）缓存，数据变更后失效。
+    并发的相同请求合并为一次查询。
+    """
+    try:
+        dimension_list = parse_list(dimensions, DIMENSIONS, "dimensions")
+        measure_list = parse_list(measures, MEASURES, "measures")
+        filters = AggregateFilters.build(
+            {"worker": worker, "process": process, "cat1": cat1, "cat2": cat2, "model": model},
+            start_date, end_date,
+        )
+        return single_flight.do(
+            flight_key("analytics.aggregate", dimensions=dimension_list, measures=measure_list,
+                       filters=filters, top=top, order_by=order_by),
+            lambda: aggregate(db, dimension_list, measure_list, filters, top, order_by),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,11 +1,12 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from datetime import timedelta, datetime
 
-from .. import crud, schemas
-from ..database import get_db
+from .. import async_crud, schemas
+from ..database import get_async_db
 from ..utils.auth import verify_password, create_access_token
 from ..dependencies import get_current_active_user
 
@@ -19,9 +20,9 @@ router = APIRouter(
 )
 
 @router.post("/login", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
     login_data: schemas.LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """用户登录，获取访问令牌"""
     logger.debug(f"=== 登录请求开始 ===")
@@ -29,7 +30,7 @@ def login_for_access_token(
     logger.debug(f"数据库会话: {db}")
     
     # 1. 从数据库获取用户
-    user = crud.get_user_by_username(db, username=login_data.username)
+    user = await async_crud.get_user_by_username(db, username=login_data.username)
     if not user:
         logger.warning(f"用户不存在: username={login_data.username}")
         logger.debug(f"数据库查询返回: None")
@@ -42,9 +43,9 @@ def login_for_access_token(
     logger.debug(f"找到用户: id={user.id}, username={user.username}")
     logger.debug(f"用户密码哈希: {user.password[:50]}...")
     
-    # 2. 验证密码
+    # 2. 验证密码（哈希计算较耗CPU，放到线程池中执行，避免阻塞事件循环）
     logger.debug(f"开始验证密码...")
-    password_match = verify_password(login_data.password, user.password)
+    password_match = await run_in_threadpool(verify_password, login_data.password, user.password)
     logger.debug(f"密码验证结果: {password_match}")
     
     if not password_match:
@@ -83,9 +84,9 @@ def login_for_access_token(
     return response_data
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     change_password_data: schemas.ChangePasswordRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """修改密码"""
@@ -93,18 +94,10 @@ def change_password(
     logger.debug(f"当前用户: {current_user.username}")
     logger.debug(f"请求数据: old_password=[REDACTED], new_password=[REDACTED], confirm_password=[REDACTED]")
     
-    # 从数据库获取完整用户信息（包含密码哈希）
-    db_user = crud.get_user_by_id(db, user_id=current_user.id)
-    if not db_user:
-        logger.warning(f"用户不存在: user_id={current_user.id}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
+    # current_user由get_current_user加载，已包含密码哈希，无需再次查询
     # 验证旧密码
     logger.debug("验证旧密码...")
-    if not verify_password(change_password_data.old_password, db_user.password):
+    if not await run_in_threadpool(verify_password, change_password_data.old_password, current_user.password):
         logger.warning(f"旧密码验证失败: username={current_user.username}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -122,31 +115,23 @@ def change_password(
         )
     logger.debug("新密码和确认密码一致")
     
-    # 更新密码
+    # 更新密码并将need_change_password置为False（单条UPDATE）
     logger.debug("更新密码...")
-    updated_user = crud.update_user(
-        db, 
-        user_id=current_user.id, 
-        user_update=schemas.UserUpdate(
-            password=change_password_data.new_password
+    if not await async_crud.change_password(db, user_id=current_user.id, new_password=change_password_data.new_password):
+        logger.warning(f"用户不存在: user_id={current_user.id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
         )
-    )
     logger.debug(f"密码更新完成: user_id={current_user.id}")
     
-    # 更新need_change_password字段为False
-    logger.debug("更新need_change_password字段为False...")
-    updated_user.need_change_password = False
-    db.commit()
-    db.refresh(updated_user)
-    logger.debug(f"用户信息更新完成: {updated_user}")
-    
     logger.info(f"密码修改成功: username={current_user.username}")
     logger.debug(f"=== 修改密码请求结束 ===")
     
     return {"message": "Password changed successfully"}
 
 @router.get("/me", response_model=schemas.User)
-def read_users_me(
+async def read_users_me(
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """获取当前用户信息"""
@@ -0,0 +1,53 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from .. import schemas
+from ..jobs import Job, job_manager
+from ..dependencies import check_owner_or_admin, get_current_active_user
+
+# 创建路由
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+    responses={404: {"description": "Not found"}},
+)
+
+def get_own_job(job_id: str, current_user: schemas.User) -> Job:
+    """获取任务并检查权限：只有提交任务的用户和管理员可以访问"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    check_owner_or_admin(job.created_by, current_user)
+    return job
+
+@router.get("/{job_id}")
+def read_job(
+    job_id: str,
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    """获取后台任务状态和进度"""
+    return get_own_job(job_id, current_user).to_dict()
+
+@router.post("/{job_id}/cancel")
+def cancel_job(
+    job_id: str,
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    """取消后台任务（等待中的任务立即取消，运行中的任务在下一批处理前停止）"""
+    job = get_own_job(job_id, current_user)
+    if job.finished:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    return job_manager.cancel(job_id).to_dict()
+
+@router.get("/{job_id}/artifact")
+def download_job_artifact(
+    job_id: str,
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    """下载后台任务的结果文件"""
+    job = get_own_job(job_id, current_user)
+    if job.status != "succeeded" or not job.artifact_name or not os.path.exists(job.artifact_path):
+        raise HTTPException(status_code=404, detail="Job artifact not found")
+    return FileResponse(job.artifact_path, media_type=job.artifact_media_type, filename=job.artifact_name)
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -6,6 +7,8 @@ from .. import crud, schemas
 from ..schemas import MotorModelSchema, MotorModelSchemaCreate, MotorModelSchemaUpdate
 from ..database import get_db
 from ..dependencies import get_current_active_user
+from ..utils.db_errors import is_unique_violation, violated_columns
+from ..utils.http_cache import conditional_get
 
 # 创建路由
 router = APIRouter(
@@ -21,20 +24,39 @@ def test_endpoint():
 
 @router.get("/", response_model=list[MotorModelSchema])
 def read_motor_model_list(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
 ):
     """获取电机型号列表"""
+    not_modified = conditional_get(request, response, db, "motor_models", skip, limit)
+    if not_modified:
+        return not_modified
     return crud.get_motor_model_list(db, skip=skip, limit=limit)
 
+@router.post("/resolve", response_model=list[schemas.MotorModelResolveResult])
+def resolve_motor_models(
+    resolve_request: schemas.MotorModelResolveRequest,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    """批量将导入表格中的型号文本解析为标准型号名称（按名称和别名精确匹配，其次唯一前缀匹配）"""
+    return crud.resolve_motor_model_names(db, resolve_request.names)
+
 @router.get("/{name}", response_model=MotorModelSchema)
 def read_motor_model(
+    request: Request,
+    response: Response,
     name: str,
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """根据电机型号名称获取电机型号信息"""
+    not_modified = conditional_get(request, response, db, "motor_models", name)
+    if not_modified:
+        return not_modified
     motor_model = crud.get_motor_model_by_name(db, name=name)
     if not motor_model:
         raise HTTPException(status_code=404, detail="Motor model not found")
@@ -46,12 +68,19 @@ def create_motor_model(
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    """创建新电机型号"""
-    # 检查电机型号名称是否已存在
-    if crud.get_motor_model_by_name(db, name=motor_model.name):
-        raise HTTPException(status_code=400, detail="Motor model name already exists")
-    
-    return crud.create_motor_model(db=db, motor_model=motor_model)
+    """创建新电机型号（名称和别名重复由唯一约束检测）"""
+    try:
+        return crud.create_motor_model(db=db, motor_model=motor_model)
+    except IntegrityError as e:
+        raise_motor_model_conflict(e)
+
+def raise_motor_model_conflict(exc: IntegrityError):
+    """将电机型号名称/别名的唯一约束冲突转换为400错误，其他完整性错误原样抛出"""
+    if not is_unique_violation(exc):
+        raise exc
+    if "normalized_alias" in violated_columns(exc):
+        raise HTTPException(status_code=400, detail="Motor model alias already exists")
+    raise HTTPException(status_code=400, detail="Motor model name already exists")
 
 @router.put("/{name}", response_model=MotorModelSchema)
 def update_motor_model(
@@ -61,7 +90,10 @@ def update_motor_model(
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """更新电机型号信息"""
-    motor_model = crud.update_motor_model(db, name=name, motor_model_update=motor_model_update)
+    try:
+        motor_model = crud.update_motor_model(db, name=name, motor_model_update=motor_model_update)
+    except IntegrityError as e:
+        raise_motor_model_conflict(e)
     if not motor_model:
         raise HTTPException(status_code=404, detail="Motor model not found")
     
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from .. import crud, schemas
 from ..database import get_db
 from ..dependencies import get_current_active_user
+from ..utils.cascade_delete import submit_cascade_delete, accepted_response
+from ..utils.db_errors import is_unique_violation, violated_columns
+from ..utils.http_cache import conditional_get
 
 # 创建路由
 router = APIRouter(
@@ -14,21 +19,31 @@ router = APIRouter(
 
 @router.get("/", response_model=list[schemas.Process])
 def read_processes(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """获取工序列表"""
+    not_modified = conditional_get(request, response, db, "processes", skip, limit)
+    if not_modified:
+        return not_modified
     return crud.get_processes(db, skip=skip, limit=limit)
 
 @router.get("/{process_code}", response_model=schemas.Process)
 def read_process(
+    request: Request,
+    response: Response,
     process_code: str,
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """根据工序编码获取工序信息"""
+    not_modified = conditional_get(request, response, db, "processes", process_code)
+    if not_modified:
+        return not_modified
     process = crud.get_process_by_code(db, process_code=process_code)
     if not process:
         raise HTTPException(status_code=404, detail="Process not found")
@@ -40,16 +55,19 @@ def create_process(
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    """创建新工序"""
-    # 检查工序编码是否已存在
-    if crud.get_process_by_code(db, process_code=process.process_code):
-        raise HTTPException(status_code=400, detail="Process code already exists")
-    
-    # 检查工序名称是否已存在
-    if crud.get_process_by_name(db, process_name=process.name):
+    """创建新工序（编码和名称重复由唯一约束检测）"""
+    try:
+        return crud.create_process(db=db, process=process)
+    except IntegrityError as e:
+        raise_process_conflict(e)
+
+def raise_process_conflict(exc: IntegrityError):
+    """将工序编码/名称的唯一约束冲突转换为400错误，其他完整性错误原样抛出"""
+    if not is_unique_violation(exc):
+        raise exc
+    if "name" in violated_columns(exc):
         raise HTTPException(status_code=400, detail="Process name already exists")
-    
-    return crud.create_process(db=db, process=process)
+    raise HTTPException(status_code=400, detail="Process code already exists")
 
 @router.put("/{process_code}", response_model=schemas.Process)
 def update_process(
@@ -59,13 +77,10 @@ def update_process(
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """更新工序信息"""
-    # 检查工序名称是否已存在（如果更新了名称）
-    if process_update.name:
-        existing_process = crud.get_process_by_name(db, process_name=process_update.name)
-        if existing_process and existing_process.process_code != process_code:
-            raise HTTPException(status_code=400, detail="Process name already exists")
-    
-    process = crud.update_process(db, process_code=process_code, process_update=process_update)
+    try:
+        process = crud.update_process(db, process_code=process_code, process_update=process_update)
+    except IntegrityError as e:
+        raise_process_conflict(e)
     if not process:
         raise HTTPException(status_code=404, detail="Process not found")
     
@@ -77,7 +92,12 @@ def delete_process(
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    """删除工序"""
+    """删除工序（关联工作记录较多时转为后台任务，返回202和任务ID）"""
+    total = crud.count_work_records(db, crud.process_work_records_filter(process_code))
+    if total > crud.CASCADE_BACKGROUND_THRESHOLD:
+        job = submit_cascade_delete("process", crud.delete_process, process_code, total, created_by=current_user.id)
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=accepted_response(job, process_code=process_code))
+    
     process = crud.delete_process(db, process_code=process_code)
     if not process:
         raise HTTPException(status_code=404, detail="Process not found")
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from .. import crud, schemas
 from ..database import get_db
 from ..dependencies import get_current_active_user
+from ..utils.db_errors import is_unique_violation
+from ..utils.http_cache import conditional_get
 
 # 创建路由
 router = APIRouter(
@@ -14,21 +17,31 @@ router = APIRouter(
 
 @router.get("/", response_model=list[schemas.ProcessCat1])
 def read_process_cat1_list(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """获取工段类别列表"""
+    not_modified = conditional_get(request, response, db, "process_cat1", skip, limit)
+    if not_modified:
+        return not_modified
     return crud.get_process_cat1_list(db, skip=skip, limit=limit)
 
 @router.get("/{cat1_code}", response_model=schemas.ProcessCat1)
 def read_process_cat1(
+    request: Request,
+    response: Response,
     cat1_code: str,
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """根据工段类别编码获取工段类别信息"""
+    not_modified = conditional_get(request, response, db, "process_cat1", cat1_code)
+    if not_modified:
+        return not_modified
     process_cat1 = crud.get_process_cat1_by_code(db, cat1_code=cat1_code)
     if not process_cat1:
         raise HTTPException(status_code=404, detail="Process category 1 not found")
@@ -41,15 +54,16 @@ def create_process_cat1(
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """创建新工段类别"""
-    # 检查工段类别编码是否已存在
-    if crud.get_process_cat1_by_code(db, cat1_code=process_cat1.cat1_code):
-        raise HTTPException(status_code=400, detail="Process category 1 code already exists")
-    
-    # 检查工段类别名称是否已存在
+    # 检查工段类别名称是否已存在（名称没有数据库唯一约束，仍需查询；编码重复由主键约束检测）
     if crud.get_process_cat1_by_name(db, name=process_cat1.name):
         raise HTTPException(status_code=400, detail="Process category 1 name already exists")
     
-    return crud.create_process_cat1(db=db, process_cat1=process_cat1)
+    try:
+        return crud.create_process_cat1(db=db, process_cat1=process_cat1)
+    except IntegrityError as e:
+        if is_unique_violation(e):
+            raise HTTPException(status_code=400, detail="Process category 1 code already exists")
+        raise
 
 @router.put("/{cat1_code}", response_model=schemas.ProcessCat1)
 def update_process_cat1(
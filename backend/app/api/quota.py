@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import date
+from typing import Optional
 
-from .. import crud, schemas
-from ..database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import async_crud, crud, schemas
+from ..database import get_async_db
 from ..dependencies import get_current_active_user
+from ..reference_cache import reference_cache
+from ..utils.cascade_delete import submit_cascade_delete, accepted_response
+from ..utils.db_errors import is_foreign_key_violation, is_unique_violation
+
+QUOTA_SORT_PATTERN = "^-?(" + "|".join(async_crud.QUOTA_SORT_COLUMNS) + ")$"
 
 # 创建路由
 router = APIRouter(
@@ -12,87 +22,167 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+async def check_quota_references(db: AsyncSession, quota):
+    """校验定额引用的工序、类别和电机型号是否存在（从基础数据缓存读取，不查询数据表）"""
+    reference = await async_crud.get_reference_data(db)
+    process_code = getattr(quota, "process_code", None)
+    if process_code is not None and process_code not in reference.processes:
+        raise HTTPException(status_code=400, detail="Process not found")
+    if quota.cat1_code is not None and quota.cat1_code not in reference.process_cat1:
+        raise HTTPException(status_code=400, detail="Process category 1 not found")
+    if quota.cat2_code is not None and quota.cat2_code not in reference.process_cat2:
+        raise HTTPException(status_code=400, detail="Process category 2 not found")
+    if quota.model_name is not None and quota.model_name not in reference.motor_models:
+        raise HTTPException(status_code=400, detail="Motor model not found")
+
+async def raise_quota_conflict(db: AsyncSession, exc: IntegrityError, quota):
+    """
+    将定额写入时的完整性错误转换为400错误
+    
+    缓存校验通过但外键仍失败时，说明引用数据刚被其他请求删除：丢弃本请求的快照后重新校验。
+    """
+    if is_unique_violation(exc):
+        raise HTTPException(status_code=400, detail="Quota already exists for this effective date")
+    if not is_foreign_key_violation(exc):
+        raise exc
+    reference_cache.discard(db)
+    await check_quota_references(db, quota)
+    raise exc
+
 @router.get("/", response_model=list[schemas.Quota])
-def read_quotas(
-    process_code: str = None,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+async def read_quotas(
+    response: Response,
+    process_code: Optional[str] = None,
+    model_name: Optional[str] = None,
+    cat1_code: Optional[str] = None,
+    cat2_code: Optional[str] = None,
+    effective_from: Optional[date] = Query(None, description="生效日期下限（含）"),
+    effective_to: Optional[date] = Query(None, description="生效日期上限（含）"),
+    current_only: bool = Query(False, description="只返回当前生效的定额"),
+    sort: str = Query("-id", pattern=QUOTA_SORT_PATTERN, description="排序列，-前缀表示降序"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="上一页响应头X-Next-Cursor的值"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    """获取定额列表"""
-    return crud.get_quotas(db, process_code=process_code, skip=skip, limit=limit)
+    """
+    获取定额列表（服务端筛选、排序和游标分页）
+
+    下一页游标在响应头X-Next-Cursor中返回；总数在响应头X-Total-Count中返回：无筛选条件时读取行数计数器，
+    有筛选条件时只在第一页（未传游标）计算一次。
+    """
+    conditions = async_crud.quota_conditions(
+        process_code=process_code,
+        model_name=model_name,
+        cat1_code=cat1_code,
+        cat2_code=cat2_code,
+        effective_from=effective_from,
+        effective_to=effective_to,
+        current_only=current_only,
+    )
+    try:
+        quotas, next_cursor = await async_crud.get_quotas(
+            db, conditions, sort=sort, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if not cursor or not conditions:
+        response.headers["X-Total-Count"] = str(await async_crud.count_quotas(db, conditions))
+    return quotas
+
+@router.get("/current", response_model=list[schemas.Quota])
+async def read_current_quotas(
+    process_code: Optional[str] = None,
+    model_name: Optional[str] = None,
+    cat1_code: Optional[str] = None,
+    cat2_code: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    """获取当前生效的定额价目表（读取current_quotas，每个工序、类别和型号一条）"""
+    return await async_crud.get_current_quotas(
+        db,
+        process_code=process_code,
+        model_name=model_name,
+        cat1_code=cat1_code,
+        cat2_code=cat2_code,
+        skip=skip,
+        limit=limit,
+    )
 
 @router.get("/{quota_id}", response_model=schemas.Quota)
-def read_quota(
+async def read_quota(
     quota_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """根据ID获取定额信息"""
-    quota = crud.get_quota_by_id(db, quota_id=quota_id)
+    quota = await async_crud.get_quota_by_id(db, quota_id=quota_id)
     if not quota:
         raise HTTPException(status_code=404, detail="Quota not found")
     return quota
 
 @router.post("/", response_model=schemas.Quota, status_code=status.HTTP_201_CREATED)
-def create_quota(
+async def create_quota(
     quota: schemas.QuotaCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    """创建新定额"""
-    # 检查工序是否存在
-    if not crud.get_process_by_code(db, process_code=quota.process_code):
-        raise HTTPException(status_code=400, detail="Process not found")
-    
-    # 检查工段类别是否存在
-    if not crud.get_process_cat1_by_code(db, cat1_code=quota.cat1_code):
-        raise HTTPException(status_code=400, detail="Process category 1 not found")
-    
-    # 检查工序类别是否存在
-    if not crud.get_process_cat2_by_code(db, cat2_code=quota.cat2_code):
-        raise HTTPException(status_code=400, detail="Process category 2 not found")
-    
-    # 检查电机型号是否存在
-    if not crud.get_motor_model_by_name(db, name=quota.model_name):
-        raise HTTPException(status_code=400, detail="Motor model not found")
-    
-    return crud.create_quota(db=db, quota=quota, created_by=current_user.id)
+    """创建新定额（引用数据从基础数据缓存校验，写入只需一条INSERT，响应由INSERT返回的行组装）"""
+    await check_quota_references(db, quota)
+    try:
+        db_quota = await async_crud.create_quota(db=db, quota=quota, created_by=current_user.id)
+    except IntegrityError as e:
+        await raise_quota_conflict(db, e, quota)
+    return await async_crud.quota_response(db, db_quota, current_user)
 
 @router.put("/{quota_id}", response_model=schemas.Quota)
-def update_quota(
+async def update_quota(
     quota_id: int,
     quota_update: schemas.QuotaUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    """更新定额信息"""
-    quota = crud.update_quota(db, quota_id=quota_id, quota_update=quota_update)
+    """更新定额信息（响应由UPDATE返回的行组装）"""
+    await check_quota_references(db, quota_update)
+    try:
+        quota = await async_crud.update_quota(db, quota_id=quota_id, quota_update=quota_update)
+    except IntegrityError as e:
+        await raise_quota_conflict(db, e, quota_update)
     if not quota:
         raise HTTPException(status_code=404, detail="Quota not found")
-    return quota
+    return await async_crud.quota_response(db, quota, current_user)
 
 @router.delete("/{quota_id}")
-def delete_quota(
+async def delete_quota(
     quota_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    """删除定额"""
-    quota = crud.delete_quota(db, quota_id=quota_id)
+    """删除定额（关联工作记录较多时转为后台任务，返回202和任务ID）"""
+    total = await async_crud.count_quota_work_records(db, quota_id)
+    if total > crud.CASCADE_BACKGROUND_THRESHOLD:
+        job = submit_cascade_delete("quota", crud.delete_quota, quota_id, total, created_by=current_user.id)
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=accepted_response(job, quota_id=quota_id))
+    
+    quota = await async_crud.delete_quota(db, quota_id=quota_id)
     if not quota:
         raise HTTPException(status_code=404, detail="Quota not found")
     return {"message": "定额删除成功", "quota_id": quota_id}
 
 @router.get("/latest/{process_code}", response_model=schemas.Quota)
-def get_latest_quota(
+async def get_latest_quota(
     process_code: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    """获取指定工序的最新定额"""
-    quota = crud.get_latest_quota(db, process_code=process_code)
+    """获取指定工序今天生效的最新定额（读取current_quotas）"""
+    quota = await async_crud.get_latest_quota(db, process_code=process_code)
     if not quota:
         raise HTTPException(status_code=404, detail="No quota found for this process")
     return quota
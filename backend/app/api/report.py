@@ -1,59 +1,104 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Callable, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .. import schemas
-from ..database import get_db
-from ..dependencies import get_report_user
-from ..utils.report_helpers import (
-    get_worker_by_code,
-    get_salary_records_by_worker_and_month,
-    calculate_total_amount,
-    get_process_by_code,
-    get_process_workload_summary,
-    get_salary_summary
-)
+from .. import async_crud, schemas
+from ..database import get_async_read_db, get_read_db
+from ..dependencies import get_admin_user, get_report_user
+from ..jobs import Job, JobCancelled, job_manager
+from ..payroll_engine import payroll_report
+from ..payroll_workbook import XLSX_MEDIA_TYPE, build_payroll_workbook, stream_payroll_workbook
+from ..payslips import PAYSLIP_FORMATS, stream_payslip_archive, write_payslip_archive
+from ..utils.money import from_cents, from_hundredths
+from ..utils.query_helpers import month_bounds
+from ..utils.single_flight import flight_key, single_flight
+from ..utils.streaming import StreamCancelled
 
-# 创建路由
+# 创建路由（报表均为只读查询，使用读库会话）
 router = APIRouter(
     prefix="/reports",
     tags=["reports"],
     responses={404: {"description": "Not found"}},
 )
 
+# background=true 时报表作为后台任务执行，返回202和任务ID
+BACKGROUND_QUERY = Query(False, description="作为后台任务执行，返回202和任务ID，结果通过 /api/jobs/{job_id} 获取")
+
+def validate_month(month: str) -> None:
+    """校验月份格式，不合法时返回400"""
+    try:
+        month_bounds(month)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Month must be in YYYY-MM format")
+
+def submit_report_job(kind: str, run: Callable[[Session, Job], Optional[dict]], current_user: schemas.User) -> JSONResponse:
+    """
+    将报表提交为后台任务：任务在任务线程池中使用自己的只读会话执行，不占用处理请求的线程
+
+    Args:
+        kind: 任务类型
+        run: 参数为(只读会话, 任务)，返回值作为任务结果；生成结果文件时通过 job.set_artifact 声明
+    """
+    def task(job: Job) -> Optional[dict]:
+        with job_manager.read_session_factory() as db:
+            try:
+                return run(db, job)
+            except StreamCancelled:
+                raise JobCancelled()
+
+    job = job_manager.submit(kind, task, created_by=current_user.id)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={
+        "message": "任务已提交，请通过任务接口查询进度",
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/jobs/{job.id}",
+    })
+
 @router.get("/worker-salary/{worker_code}/{month}", response_model=schemas.WorkerSalaryReport)
-def get_worker_salary_report(
+async def get_worker_salary_report(
     worker_code: str,
     month: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: schemas.User = Depends(get_report_user)
 ):
-    """获取工人月度工资报表"""
+    """获取工人月度工资报表（并发的相同请求合并为一次查询）"""
+    return await single_flight.do_async(
+        flight_key("reports.worker_salary", worker_code=worker_code, month=month),
+        lambda: build_worker_salary_report(db, worker_code, month),
+    )
+
+async def build_worker_salary_report(db: AsyncSession, worker_code: str, month: str) -> dict:
+    """查询工人月度工资报表"""
     # 检查工人是否存在
-    worker = get_worker_by_code(db, worker_code)
+    worker = await async_crud.get_worker_by_code(db, worker_code)
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
-    
-    # 获取工资记录
-    records = get_salary_records_by_worker_and_month(db, worker_code, month)
-    
-    # 计算总金额
-    total_amount = calculate_total_amount(records)
-    
+
+    # 获取工资记录（定额已预先加载，工序及工序类别名称从基础数据缓存解析）
+    records = await async_crud.get_salary_records_by_worker_and_month(db, worker_code, month)
+    reference = await async_crud.get_reference_data(db)
+
+    # 计算总金额（数据库中累加录入时保存的金额）
+    total_amount = await async_crud.get_worker_salary_summary(db, worker_code, month)
+
     # 构建详情列表
     details = []
     for record in records:
-        # 获取工序信息
-        process = get_process_by_code(db, record.quota.process_code)
-        
+        process = reference.processes.get(record.quota.process_code) if record.quota else None
+        cat2 = reference.process_cat2.get(record.quota.cat2_code) if record.quota else None
+
         details.append({
-            "process_code": record.quota.process_code,
+            "process_code": record.quota.process_code if record.quota else None,
             "process_name": process.name if process else "未知工序",
-            "process_category": process.category if process else "未知类别",
-            "quantity": record.quantity,
-            "unit_price": record.unit_price,
-            "amount": record.amount
+            "process_category": cat2.name if cat2 else "未知类别",
+            "quantity": from_hundredths(record.quantity_hundredths),
+            "unit_price": from_cents(record.unit_price_cents),
+            "amount": from_cents(record.amount_cents)
         })
-    
+
     return {
         "worker_code": worker.worker_code,
         "worker_name": worker.name,
@@ -63,19 +108,104 @@ def get_worker_salary_report(
     }
 
 @router.get("/process-workload/{month}", response_model=list[schemas.ProcessWorkloadReport])
-def get_process_workload_report(
+async def get_process_workload_report(
     month: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: schemas.User = Depends(get_report_user)
 ):
-    """获取工序工作量报表"""
-    return get_process_workload_summary(db, month)
+    """获取工序工作量报表（并发的相同请求合并为一次查询）"""
+    return await single_flight.do_async(
+        flight_key("reports.process_workload", month=month),
+        lambda: async_crud.get_process_workload_summary(db, month),
+    )
 
 @router.get("/salary-summary/{month}", response_model=schemas.SalarySummaryReport)
-def get_salary_summary_report(
+async def get_salary_summary_report(
     month: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: schemas.User = Depends(get_report_user)
 ):
-    """获取工资汇总报表"""
-    return get_salary_summary(db, month)
+    """获取工资汇总报表（并发的相同请求合并为一次查询）"""
+    return await single_flight.do_async(
+        flight_key("reports.salary_summary", month=month),
+        lambda: async_crud.get_salary_summary(db, month),
+    )
+
+@router.get("/payroll/{month}", response_model=schemas.PayrollReport)
+def get_payroll_report(
+    month: str,
+    check: bool = True,
+    background: bool = BACKGROUND_QUERY,
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(get_admin_user)
+):
+    """
+    月末工资计算（NumPy向量化汇总，check=true时与SQL汇总交叉核对；计算为CPU密集型，在线程池中执行）
+
+    并发的相同请求合并为一次计算。
+    """
+    validate_month(month)
+    if background:
+        return submit_report_job(
+            "payroll_report",
+            lambda job_db, job: schemas.PayrollReport.model_validate(payroll_report(job_db, month, check)).model_dump(mode="json"),
+            current_user,
+        )
+    return single_flight.do(
+        flight_key("reports.payroll", month=month, check=check),
+        lambda: payroll_report(db, month, check),
+    )
+
+@router.get("/payroll-workbook/{month}")
+def download_payroll_workbook(
+    month: str,
+    background: bool = BACKGROUND_QUERY,
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(get_report_user)
+):
+    """
+    下载月度工资工作簿（xlsx：汇总表、每个工段一张表和工人明细表）
+
+    服务端用只写模式从一个有序游标生成工作簿，内存占用与记录数无关，生成的同时流式发送给客户端；
+    background=true 时在后台生成，文件通过 /api/jobs/{job_id}/artifact 下载。
+    """
+    validate_month(month)
+    if background:
+        def run(job_db: Session, job: Job) -> dict:
+            path = job.set_artifact(f"payroll-{month}.xlsx", XLSX_MEDIA_TYPE)
+            count = build_payroll_workbook(job_db, month, path, should_stop=lambda: job.cancel_requested)
+            return {"record_count": count}
+        return submit_report_job("payroll_workbook", run, current_user)
+    return StreamingResponse(
+        stream_payroll_workbook(db, month),
+        media_type=XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="payroll-{month}.xlsx"'},
+    )
+
+@router.get("/payslips/{month}")
+def download_payslips(
+    month: str,
+    format: str = Query("pdf", pattern="^(html|pdf|all)$", description="工资条格式：html、pdf或all（两种都生成）"),
+    background: bool = BACKGROUND_QUERY,
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(get_report_user)
+):
+    """
+    下载当月全部工人的工资条（zip，每名工人一个文件）
+
+    一次有序扫描读取全部工作记录，在进程池中批量渲染，生成的同时流式发送给客户端；
+    background=true 时在后台生成，文件通过 /api/jobs/{job_id}/artifact 下载。
+    """
+    validate_month(month)
+    formats = PAYSLIP_FORMATS[format]
+    if background:
+        def run(job_db: Session, job: Job) -> dict:
+            path = job.set_artifact(f"payslips-{month}.zip", "application/zip")
+            count = write_payslip_archive(job_db, month, formats, path, should_stop=lambda: job.cancel_requested)
+            return {"payslip_count": count}
+        return submit_report_job("payslips", run, current_user)
+    return StreamingResponse(
+        stream_payslip_archive(db, month, formats),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="payslips-{month}.zip"'},
+    )
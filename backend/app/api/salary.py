@@ -1,9 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import os
+
+from fastapi import APIRouter, Depends, File, HTTPException, Path, Query, UploadFile, status
+from fastapi.responses import FileResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .. import crud, schemas
-from ..database import get_db
-from ..dependencies import get_current_active_user
+from .. import async_crud, models, schemas
+from ..database import get_async_db, get_async_read_db, get_db
+from ..dependencies import check_owner_or_admin, get_admin_user, get_current_active_user
+from ..reference_cache import reference_cache
+from ..utils.db_errors import is_foreign_key_violation
+from ..work_record_import import ImportFormatError, ImportResult, find_error_sheet, import_work_records, submit_work_record_batch
 
 # 创建路由
 router = APIRouter(
@@ -12,17 +20,28 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+async def raise_work_record_conflict(db: AsyncSession, exc: IntegrityError, record: schemas.WorkRecordCreate):
+    """将工作记录写入时的外键错误转换为400错误（仅在出错路径上查询具体缺失的引用）"""
+    if not is_foreign_key_violation(exc):
+        raise exc
+    reference_cache.discard(db)
+    if not await async_crud.get_worker_by_code(db, worker_code=record.worker_code):
+        raise HTTPException(status_code=400, detail="Worker not found")
+    if not await db.get(models.Quota, record.quota_id):
+        raise HTTPException(status_code=400, detail="Quota not found")
+    raise exc
+
 @router.get("/", response_model=list[schemas.SalaryRecord])
-def read_salary_records(
+async def read_salary_records(
     worker_code: str = None,
     record_date: str = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    """获取工资记录列表（从视图读取）"""
-    return crud.get_salary_records(
+    """获取工资记录列表（从视图读取，使用读库会话）"""
+    return await async_crud.get_salary_records(
         db, 
         worker_code=worker_code, 
         record_date=record_date, 
@@ -30,56 +49,144 @@ def read_salary_records(
         limit=limit
     )
 
+@router.post("/reprice", response_model=schemas.WorkRecordRepriceResult)
+async def reprice_salary_records(
+    reprice_request: schemas.WorkRecordRepriceRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(get_admin_user)
+):
+    """
+    按定额的现行单价重新计算工作记录的单价和金额（仅管理员）
+
+    工作记录在录入时保存单价，定额调价不会改变已录入的工资；确需按新单价重算时由管理员显式调用，
+    单条UPDATE语句批量完成。
+    """
+    if reprice_request.start_date and reprice_request.end_date and reprice_request.start_date > reprice_request.end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    updated = await async_crud.reprice_work_records(
+        db,
+        quota_id=reprice_request.quota_id,
+        start_date=reprice_request.start_date,
+        end_date=reprice_request.end_date,
+    )
+    return {"updated": updated}
+
+def import_result(result: ImportResult, dry_run: bool) -> dict:
+    """导入或批量提交结果的响应体"""
+    return {
+        "dry_run": dry_run,
+        "total_rows": result.total_rows,
+        "imported": result.imported,
+        "failed": result.failed,
+        "errors": result.errors,
+        "error_report_url": (
+            f"/api/salary-records/import/errors/{result.error_report_id}" if result.error_report_id else None
+        ),
+    }
+
+@router.post("/import", response_model=schemas.WorkRecordImportResult)
+def import_salary_records(
+    file: UploadFile = File(..., description="生产日报（.xlsx 或 .csv，第一行为表头）"),
+    dry_run: bool = Query(False, description="只校验不写入，返回全部有问题的行"),
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    """
+    批量导入工作记录
+
+    逐行流式解析上传文件，工人、工序、类别和型号可填写编码、名称或别名，按记录日期绑定当日生效的定额；
+    有效行按批插入，无效行写入错误表。解析为CPU密集型操作，使用同步会话在线程池中执行。
+    """
+    try:
+        result = import_work_records(db, file.filename, file.file, created_by=current_user.id, dry_run=dry_run)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return import_result(result, dry_run)
+
+@router.post("/batch", response_model=schemas.WorkRecordImportResult)
+def submit_salary_record_batch(
+    rows: list[schemas.WorkRecordBatchRow],
+    dry_run: bool = Query(False, description="只校验不写入"),
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    """
+    批量提交工作记录（JSON）
+
+    全部行在内存中按缓存的基础数据和定额校验，返回逐行诊断；dry_run 时不写入，适合编辑表格时每次保存都试算。
+    非 dry_run 时只有全部行有效才在一个事务中写入，否则返回400和逐行诊断，不写入任何行。
+    """
+    try:
+        result = submit_work_record_batch(
+            db, [row.model_dump() for row in rows], created_by=current_user.id, dry_run=dry_run
+        )
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result.failed and not dry_run:
+        raise HTTPException(status_code=400, detail={"message": "Batch has invalid rows", "errors": result.errors})
+    return import_result(result, dry_run)
+
+@router.get("/import/errors/{report_id}")
+def download_import_errors(
+    report_id: str = Path(..., pattern="^[0-9a-f]{32}$"),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    """下载导入错误表（只有上传者和管理员可以下载）"""
+    sheet = find_error_sheet(report_id)
+    if not sheet:
+        raise HTTPException(status_code=404, detail="Error report not found")
+    path, owner_id = sheet
+    check_owner_or_admin(owner_id, current_user)
+    return FileResponse(path, filename="import_errors" + os.path.splitext(path)[1])
+
 @router.get("/{record_id}", response_model=schemas.SalaryRecord)
-def read_salary_record(
+async def read_salary_record(
     record_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """根据ID获取工资记录信息（从视图读取）"""
-    record = crud.get_salary_record_by_id(db, record_id=record_id)
+    record = await async_crud.get_salary_record_by_id(db, record_id=record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Salary record not found")
     return record
 
 @router.post("/", response_model=schemas.WorkRecord, status_code=status.HTTP_201_CREATED)
-def create_salary_record(
+async def create_salary_record(
     record: schemas.WorkRecordCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    """创建新工作记录"""
-    # 检查工人是否存在
-    if not crud.get_worker_by_code(db, worker_code=record.worker_code):
+    """创建新工作记录（工人从基础数据缓存校验，定额是否存在由外键约束检测，响应由INSERT返回的行组装）"""
+    if not await async_crud.get_worker_by_code(db, worker_code=record.worker_code):
         raise HTTPException(status_code=400, detail="Worker not found")
-    
-    # 检查定额是否存在
-    if not crud.get_quota_by_id(db, quota_id=record.quota_id):
-        raise HTTPException(status_code=400, detail="Quota not found")
-    
-    return crud.create_work_record(db=db, record=record, created_by=current_user.id)
+    try:
+        db_record = await async_crud.create_work_record(db=db, record=record, created_by=current_user.id)
+    except IntegrityError as e:
+        await raise_work_record_conflict(db, e, record)
+    return await async_crud.work_record_response(db, db_record, current_user)
 
 @router.put("/{record_id}", response_model=schemas.WorkRecord)
-def update_salary_record(
+async def update_salary_record(
     record_id: int,
     record_update: schemas.WorkRecordUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    """更新工作记录信息"""
-    record = crud.update_work_record(db, record_id=record_id, record_update=record_update)
+    """更新工作记录信息（响应由UPDATE返回的行组装）"""
+    record = await async_crud.update_work_record(db, record_id=record_id, record_update=record_update)
     if not record:
         raise HTTPException(status_code=404, detail="Work record not found")
-    return record
+    return await async_crud.work_record_response(db, record, current_user)
 
 @router.delete("/{record_id}")
-def delete_salary_record(
+async def delete_salary_record(
     record_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """删除工作记录"""
-    record = crud.delete_work_record(db, record_id=record_id)
+    record = await async_crud.delete_work_record(db, record_id=record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Work record not found")
     return {"message": "工作记录删除成功", "record_id": record_id}
@@ -0,0 +1,47 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import schemas
+from ..database import get_async_db, get_async_read_db
+from ..dependencies import get_current_active_user
+from ..full_text_search import SEARCH_TYPES, search as full_text_search
+from ..reference_cache import reference_cache
+from ..search_index import INDEXED_KINDS, typeahead_index
+
+# 创建路由
+router = APIRouter(
+    prefix="/search",
+    tags=["search"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("", response_model=schemas.SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=100, description="查询文本，多个词以空格分隔"),
+    types: Optional[str] = Query(None, description="限定搜索类型，逗号分隔：process,cat1,cat2,motor_model"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    """工序、工段类别、工序类别和电机型号的统一全文搜索（按相关度排序，游标分页）"""
+    search_types = [search_type for search_type in types.split(",") if search_type in SEARCH_TYPES] if types else None
+    try:
+        return await full_text_search(db, q, types=search_types, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/typeahead", response_model=list[schemas.TypeaheadResult])
+async def typeahead(
+    q: str = Query(..., min_length=1, max_length=50, description="编码、名称、拼音全拼或首字母的前缀"),
+    limit: int = Query(10, ge=1, le=50),
+    types: Optional[str] = Query(None, description="限定实体类型，逗号分隔：worker,process"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    """工人和工序的输入联想（内存前缀索引，每个请求只检查一次基础数据版本号）"""
+    typeahead_index.sync(await reference_cache.get_async(db))
+    kinds = [kind for kind in types.split(",") if kind in INDEXED_KINDS] if types else None
+    return typeahead_index.search(q, limit=limit, kinds=kinds)
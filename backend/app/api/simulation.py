@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from .. import schemas
+from ..database import get_read_db
+from ..dependencies import get_report_user
+from ..simulation import simulate_reprice
+
+# 创建路由（模拟在内存中计算，不写数据库，使用读库会话）
+router = APIRouter(
+    prefix="/simulations",
+    tags=["simulations"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.post("/reprice", response_model=schemas.RepriceSimulationResult)
+def simulate_quota_reprice(
+    request: schemas.RepriceSimulationRequest,
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(get_report_user)
+):
+    """定额调价模拟：按拟调整的价目规则重新计算月份区间内的工资，返回按工人和工段的变化"""
+    rules = [rule.model_dump() for rule in request.rules]
+    try:
+        return simulate_reprice(db, request.start_month, request.end_month, rules, request.refresh)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,41 +1,73 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import select
 
 from .. import models
-from ..database import get_db
-from ..dependencies import get_report_user
+from ..database import get_read_db
+from ..dependencies import get_admin_user, get_report_user
+from ..utils.money import from_cents, from_hundredths
+from ..utils.single_flight import flight_key, single_flight
 
-# 创建路由
+# 创建路由（统计为只读查询，使用读库会话）
 router = APIRouter(
     prefix="/stats",
     tags=["statistics"],
     responses={404: {"description": "Not found"}},
 )
 
+# 统计项 -> 行数计数器的表名
+STAT_COUNTERS = {
+    "user_count": "users",
+    "worker_count": "workers",
+    "process_cat1_count": "process_cat1",
+    "process_cat2_count": "process_cat2",
+    "model_count": "motor_models",
+    "process_count": "processes",
+    "quota_count": "quotas",
+    "salary_record_count": "work_records",
+}
+
 @router.get("/")
 def get_statistics(
-    db: Session = Depends(get_db),
+    months: int = Query(12, ge=0, le=120, description="返回最近多少个月的月度汇总"),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_report_user)
 ):
-    """获取系统统计数据"""
-    # 获取各表的记录数
-    user_count = db.query(func.count(models.User.id)).scalar()
-    worker_count = db.query(func.count(models.Worker.worker_code)).scalar()
-    process_cat1_count = db.query(func.count(models.ProcessCat1.cat1_code)).scalar()
-    process_cat2_count = db.query(func.count(models.ProcessCat2.cat2_code)).scalar()
-    model_count = db.query(func.count(models.MotorModel.name)).scalar()
-    process_count = db.query(func.count(models.Process.process_code)).scalar()
-    quota_count = db.query(func.count(models.Quota.id)).scalar()
-    salary_record_count = db.query(func.count(models.WorkRecord.id)).scalar()
-    
-    return {
-        "user_count": user_count,
-        "worker_count": worker_count,
-        "process_cat1_count": process_cat1_count,
-        "process_cat2_count": process_cat2_count,
-        "model_count": model_count,
-        "process_count": process_count,
-        "quota_count": quota_count,
-        "salary_record_count": salary_record_count
-    }
+    """
+    获取系统统计数据（并发的请求合并为一次查询）
+
+    各表记录数读取触发器维护的行数计数器，月度记录数和金额读取月度汇总表，均不扫描业务表。
+    """
+    return single_flight.do(flight_key("stats.summary", months=months), lambda: read_statistics(db, months))
+
+def read_statistics(db: Session, months: int) -> dict:
+    """读取各表的记录数和最近几个月的工作记录汇总"""
+    counters = dict(db.execute(select(models.TableRowCount.table_name, models.TableRowCount.row_count)).all())
+    statistics = {name: counters.get(table_name, 0) for name, table_name in STAT_COUNTERS.items()}
+
+    totals = models.WorkRecordMonthTotal
+    rows = db.execute(
+        select(totals).where(totals.record_count > 0).order_by(totals.month.desc()).limit(months)
+    ).scalars()
+    statistics["monthly"] = [
+        {
+            "month": row.month,
+            "record_count": row.record_count,
+            "total_quantity": from_hundredths(row.quantity_hundredths),
+            "total_amount": from_cents(row.amount_cents),
+        }
+        for row in rows
+    ]
+    return statistics
+
+@router.get("/single-flight")
+def get_single_flight_stats(
+    current_user: models.User = Depends(get_admin_user)
+):
+    """
+    请求合并统计（按路由）
+
+    calls为调用数，executions为实际执行的查询数，coalesced为共享其他请求结果的调用数，
+    waiting为当前正在等待的调用数，max_waiters为单次计算的最大等待数。
+    """
+    return single_flight.stats()
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from .. import crud, schemas
 from ..database import get_db
 from ..dependencies import get_admin_user
+from ..utils.db_errors import is_unique_violation
 
 # 创建路由
 router = APIRouter(
@@ -40,10 +42,13 @@ def create_user(
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_admin_user)
 ):
-    """创建新用户，仅管理员可访问"""
-    if crud.get_user_by_username(db, username=user.username):
-        raise HTTPException(status_code=400, detail="Username already registered")
-    return crud.create_user(db=db, user=user)
+    """创建新用户，仅管理员可访问（用户名重复由唯一约束检测）"""
+    try:
+        return crud.create_user(db=db, user=user)
+    except IntegrityError as e:
+        if is_unique_violation(e):
+            raise HTTPException(status_code=400, detail="Username already registered")
+        raise
 
 @router.put("/{user_id}", response_model=schemas.User)
 def update_user(
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from .. import crud, schemas
 from ..database import get_db
 from ..dependencies import get_current_active_user
+from ..utils.cascade_delete import submit_cascade_delete, accepted_response
+from ..utils.db_errors import is_unique_violation
+from ..utils.http_cache import conditional_get
 
 # 创建路由
 router = APIRouter(
@@ -14,21 +19,31 @@ router = APIRouter(
 
 @router.get("/", response_model=list[schemas.Worker])
 def read_workers(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """获取工人列表"""
+    not_modified = conditional_get(request, response, db, "workers", skip, limit)
+    if not_modified:
+        return not_modified
     return crud.get_workers(db, skip=skip, limit=limit)
 
 @router.get("/{worker_code}", response_model=schemas.Worker)
 def read_worker(
+    request: Request,
+    response: Response,
     worker_code: str,
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
     """根据工号获取工人信息"""
+    not_modified = conditional_get(request, response, db, "workers", worker_code)
+    if not_modified:
+        return not_modified
     worker = crud.get_worker_by_code(db, worker_code=worker_code)
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
@@ -40,10 +55,13 @@ def create_worker(
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    """创建新工人"""
-    if crud.get_worker_by_code(db, worker_code=worker.worker_code):
-        raise HTTPException(status_code=400, detail="Worker code already exists")
-    return crud.create_worker(db=db, worker=worker)
+    """创建新工人（工号重复由主键约束检测）"""
+    try:
+        return crud.create_worker(db=db, worker=worker)
+    except IntegrityError as e:
+        if is_unique_violation(e):
+            raise HTTPException(status_code=400, detail="Worker code already exists")
+        raise
 
 @router.put("/{worker_code}", response_model=schemas.Worker)
 def update_worker(
@@ -64,7 +82,12 @@ def delete_worker(
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    """删除工人"""
+    """删除工人（关联工作记录较多时转为后台任务，返回202和任务ID）"""
+    total = crud.count_work_records(db, crud.worker_work_records_filter(worker_code))
+    if total > crud.CASCADE_BACKGROUND_THRESHOLD:
+        job = submit_cascade_delete("worker", crud.delete_worker, worker_code, total, created_by=current_user.id)
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=accepted_response(job, worker_code=worker_code))
+    
     worker = crud.delete_worker(db, worker_code=worker_code)
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
@@ -0,0 +1,573 @@
+import logging
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import select, insert, update, delete, desc, func, distinct
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from starlette.concurrency import run_in_threadpool
+from datetime import date
+from decimal import Decimal
+
+from . import models, schemas
+from .db_schema import captured_price_values, recorded_amount_value, reprice_work_records_statement
+from .reference_cache import ReferenceData, reference_cache
+from .utils.auth import get_password_hash
+from .utils.money import from_cents, from_hundredths, scaled_values, to_hundredths
+from .utils.pagination import encode_cursor, keyset_condition
+from .utils.query_helpers import month_or_date_filter
+
+logger = logging.getLogger(__name__)
+
+# 异步会话不支持关系的隐式懒加载，响应模型需要的关系在查询时预先加载
+
+QUOTA_LOAD_OPTIONS = (
+    selectinload(models.Quota.process),
+    selectinload(models.Quota.creator),
+)
+
+WORK_RECORD_LOAD_OPTIONS = (
+    selectinload(models.WorkRecord.worker),
+    selectinload(models.WorkRecord.quota).selectinload(models.Quota.process),
+    selectinload(models.WorkRecord.quota).selectinload(models.Quota.creator),
+    selectinload(models.WorkRecord.creator),
+)
+
+SALARY_RECORD_LOAD_OPTIONS = (
+    selectinload(models.VSalaryRecord.worker),
+    selectinload(models.VSalaryRecord.quota).selectinload(models.Quota.process),
+    selectinload(models.VSalaryRecord.quota).selectinload(models.Quota.creator),
+    selectinload(models.VSalaryRecord.creator),
+)
+
+# 写入辅助函数：与crud.insert_returning/update_returning相同，单条语句完成写入并返回新行
+
+async def insert_returning(db: AsyncSession, model, values: dict) -> dict:
+    """插入一行并返回插入后的完整行"""
+    table = model.__table__
+    try:
+        row = (await db.execute(insert(table).values(**values).returning(*table.c))).mappings().one()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise
+    return dict(row)
+
+async def update_returning(db: AsyncSession, model, key_column, key, values: dict) -> Optional[dict]:
+    """按主键更新一行并返回更新后的完整行，行不存在时返回None"""
+    table = model.__table__
+    if not values:
+        row = (await db.execute(select(*table.c).where(key_column == key))).mappings().first()
+        return dict(row) if row else None
+    try:
+        row = (await db.execute(
+            update(table).where(key_column == key).values(**values).returning(*table.c)
+        )).mappings().first()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise
+    return dict(row) if row else None
+
+
+# 用户相关CRUD
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[models.User]:
+    """根据用户名获取用户"""
+    logger.debug(f"根据用户名获取用户（异步）: username={username}")
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    return result.scalars().first()
+
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[models.User]:
+    """根据ID获取用户"""
+    logger.debug(f"根据ID获取用户（异步）: user_id={user_id}")
+    return await db.get(models.User, user_id)
+
+async def get_creator(db: AsyncSession, user_id: Optional[int], current_user: schemas.User):
+    """获取创建人（创建人就是当前用户时直接复用，不再查询）"""
+    if user_id is None:
+        return None
+    if user_id == current_user.id:
+        return current_user
+    return await get_user_by_id(db, user_id)
+
+async def update_user(db: AsyncSession, user_id: int, user_update: schemas.UserUpdate) -> Optional[dict]:
+    """更新用户"""
+    logger.debug(f"更新用户（异步）: user_id={user_id}")
+    update_data = user_update.model_dump(exclude_unset=True)
+    if "password" in update_data:
+        logger.debug("更新密码字段，进行哈希处理")
+        update_data["password"] = await run_in_threadpool(get_password_hash, update_data["password"])
+
+    db_user = await update_returning(db, models.User, models.User.id, user_id, update_data)
+    if not db_user:
+        logger.warning(f"用户不存在: user_id={user_id}")
+        return None
+    logger.info(f"用户更新成功: user_id={user_id}, username={db_user['username']}")
+    return db_user
+
+async def change_password(db: AsyncSession, user_id: int, new_password: str) -> bool:
+    """修改密码并清除首次登录改密标记（单条UPDATE），用户不存在时返回False"""
+    logger.debug(f"修改密码（异步）: user_id={user_id}")
+    hashed_password = await run_in_threadpool(get_password_hash, new_password)
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(password=hashed_password, need_change_password=False)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+# 基础数据查询（从进程内基础数据缓存读取，每个请求只检查一次版本号）
+
+async def get_reference_data(db: AsyncSession) -> ReferenceData:
+    """获取基础数据快照"""
+    return await reference_cache.get_async(db)
+
+async def get_worker_by_code(db: AsyncSession, worker_code: str):
+    """根据工号获取工人"""
+    logger.debug(f"根据工号获取工人（异步）: worker_code={worker_code}")
+    return (await reference_cache.get_async(db)).workers.get(worker_code)
+
+async def get_process_by_code(db: AsyncSession, process_code: str):
+    """根据工序编码获取工序"""
+    logger.debug(f"根据工序编码获取工序（异步）: process_code={process_code}")
+    return (await reference_cache.get_async(db)).processes.get(process_code)
+
+async def get_process_cat1_by_code(db: AsyncSession, cat1_code: str):
+    """根据工段类别编码获取工段类别"""
+    logger.debug(f"根据工段类别编码获取工段类别（异步）: cat1_code={cat1_code}")
+    return (await reference_cache.get_async(db)).process_cat1.get(cat1_code)
+
+async def get_process_cat2_by_code(db: AsyncSession, cat2_code: str):
+    """根据工序类别编码获取工序类别"""
+    logger.debug(f"根据工序类别编码获取工序类别（异步）: cat2_code={cat2_code}")
+    return (await reference_cache.get_async(db)).process_cat2.get(cat2_code)
+
+async def get_motor_model_by_name(db: AsyncSession, name: str):
+    """根据电机型号名称获取电机型号"""
+    logger.debug(f"根据电机型号名称获取电机型号（异步）: name={name}")
+    return (await reference_cache.get_async(db)).motor_models.get(name)
+
+# 定额相关CRUD
+
+async def get_quota_by_id(db: AsyncSession, quota_id: int) -> Optional[models.Quota]:
+    """根据ID获取定额"""
+    logger.debug(f"根据ID获取定额（异步）: quota_id={quota_id}")
+    result = await db.execute(
+        select(models.Quota).options(*QUOTA_LOAD_OPTIONS).where(models.Quota.id == quota_id)
+    )
+    return result.scalars().first()
+
+# 定额目录可排序的列（均有以 (列, id) 结尾的索引或主键可用于游标分页）
+QUOTA_SORT_COLUMNS = {
+    "id": models.Quota.id,
+    "effective_date": models.Quota.effective_date,
+    "unit_price": models.Quota.unit_price_cents,
+    "process_code": models.Quota.process_code,
+    "model_name": models.Quota.model_name,
+}
+
+def quota_conditions(
+    process_code: str = None,
+    model_name: str = None,
+    cat1_code: str = None,
+    cat2_code: str = None,
+    effective_from: date = None,
+    effective_to: date = None,
+    current_only: bool = False,
+) -> list:
+    """
+    构造定额目录的筛选条件
+
+    current_only为True时只保留current_quotas中的定额，即每个工序、类别和型号今天生效的版本。
+    """
+    quota = models.Quota
+    conditions = []
+    for column, value in (
+        (quota.process_code, process_code),
+        (quota.model_name, model_name),
+        (quota.cat1_code, cat1_code),
+        (quota.cat2_code, cat2_code),
+    ):
+        if value:
+            conditions.append(column == value)
+    if effective_from:
+        conditions.append(quota.effective_date >= effective_from)
+    if effective_to:
+        conditions.append(quota.effective_date <= effective_to)
+    if current_only:
+        conditions.append(quota.id.in_(select(models.CurrentQuota.quota_id)))
+    return conditions
+
+async def get_quotas(
+    db: AsyncSession,
+    conditions: list = (),
+    sort: str = "-id",
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str = None,
+) -> Tuple[List[models.Quota], Optional[str]]:
+    """
+    获取定额列表（游标分页）
+
+    Args:
+        db: 数据库会话
+        conditions: quota_conditions生成的筛选条件
+        sort: 排序列，"-"前缀表示降序，并列时按id同向排序
+        skip: 未传游标时跳过的条数（兼容旧的偏移分页）
+        limit: 每页条数
+        cursor: 上一页返回的游标（格式不合法时抛出ValueError）
+
+    Returns:
+        Tuple[List[models.Quota], Optional[str]]: 本页定额和下一页游标（没有下一页时为None）
+    """
+    logger.debug(f"获取定额列表（异步）: conditions={len(conditions)}, sort={sort}, skip={skip}, limit={limit}, cursor={cursor}")
+    descending = sort.startswith("-")
+    sort_column = QUOTA_SORT_COLUMNS[sort.lstrip("-")]
+    order_columns = [sort_column] if sort_column is models.Quota.id else [sort_column, models.Quota.id]
+    query = select(models.Quota).options(*QUOTA_LOAD_OPTIONS).where(*conditions)
+    if cursor:
+        query = query.where(keyset_condition(sort_column, models.Quota.id, descending, cursor))
+    elif skip:
+        query = query.offset(skip)
+    query = query.order_by(*(desc(column) if descending else column for column in order_columns))
+    quotas = list((await db.execute(query.limit(limit + 1))).scalars().all())
+    next_cursor = None
+    if len(quotas) > limit:
+        quotas = quotas[:limit]
+        last = quotas[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), last.id)
+    return quotas, next_cursor
+
+async def count_quotas(db: AsyncSession, conditions: list = ()) -> int:
+    """定额总数：没有筛选条件时读取触发器维护的行数计数器，否则按条件COUNT（走复合索引）"""
+    if not conditions:
+        row_count = await db.scalar(
+            select(models.TableRowCount.row_count).where(models.TableRowCount.table_name == models.Quota.__tablename__)
+        )
+        if row_count is not None:
+            return row_count
+    return await db.scalar(select(func.count()).select_from(models.Quota).where(*conditions))
+
+async def get_latest_quota(db: AsyncSession, process_code: str, effective_date: date = None) -> Optional[models.Quota]:
+    """获取指定日期前的最新定额（今天的最新定额直接读取current_quotas，按主键前缀扫描）"""
+    logger.debug(f"获取最新定额（异步）: process_code={process_code}, effective_date={effective_date}")
+    if not effective_date or effective_date == date.today():
+        query = select(models.Quota).join(
+            models.CurrentQuota, models.CurrentQuota.quota_id == models.Quota.id
+        ).where(
+            models.CurrentQuota.process_code == process_code
+        ).order_by(desc(models.CurrentQuota.effective_date), desc(models.CurrentQuota.quota_id))
+    else:
+        query = select(models.Quota).where(
+            models.Quota.process_code == process_code,
+            models.Quota.effective_date <= effective_date
+        ).order_by(desc(models.Quota.effective_date))
+    result = await db.execute(query.options(*QUOTA_LOAD_OPTIONS).limit(1))
+    return result.scalars().first()
+
+async def get_current_quotas(
+    db: AsyncSession,
+    process_code: str = None,
+    model_name: str = None,
+    cat1_code: str = None,
+    cat2_code: str = None,
+    skip: int = 0,
+    limit: int = 1000,
+) -> List[models.Quota]:
+    """获取当前生效的定额（价目表），按业务键顺序返回"""
+    logger.debug(f"获取当前生效定额（异步）: process_code={process_code}, model_name={model_name}, cat1_code={cat1_code}, cat2_code={cat2_code}")
+    current = models.CurrentQuota
+    query = select(models.Quota).join(current, current.quota_id == models.Quota.id)
+    for column, value in (
+        (current.process_code, process_code),
+        (current.model_name, model_name),
+        (current.cat1_code, cat1_code),
+        (current.cat2_code, cat2_code),
+    ):
+        if value:
+            query = query.where(column == value)
+    query = query.order_by(current.process_code, current.cat1_code, current.cat2_code, current.model_name)
+    result = await db.execute(query.options(*QUOTA_LOAD_OPTIONS).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+async def create_quota(db: AsyncSession, quota: schemas.QuotaCreate, created_by: int) -> dict:
+    """创建定额（引用的工序/类别/型号不存在或定额重复时抛出IntegrityError）"""
+    logger.debug(f"创建定额（异步）: process_code={quota.process_code}, unit_price={quota.unit_price}, effective_date={quota.effective_date}, created_by={created_by}")
+    db_quota = await insert_returning(db, models.Quota, {**scaled_values(quota.model_dump()), "created_by": created_by})
+    logger.info(f"定额创建成功: id={db_quota['id']}, process_code={quota.process_code}")
+    return db_quota
+
+async def update_quota(db: AsyncSession, quota_id: int, quota_update: schemas.QuotaUpdate) -> Optional[dict]:
+    """更新定额"""
+    update_data = scaled_values(quota_update.model_dump(exclude_unset=True))
+    logger.debug(f"更新定额（异步）: quota_id={quota_id}, update_data={update_data}")
+    db_quota = await update_returning(db, models.Quota, models.Quota.id, quota_id, update_data)
+    if not db_quota:
+        logger.warning(f"定额不存在: quota_id={quota_id}")
+        return None
+    logger.info(f"定额更新成功: quota_id={quota_id}")
+    return db_quota
+
+async def quota_response(db: AsyncSession, quota: dict, current_user: schemas.User) -> dict:
+    """由写入返回的定额行组装响应（工序取自基础数据缓存，不再按ID重读定额）"""
+    reference = await reference_cache.get_async(db)
+    return {
+        **quota,
+        "process": reference.processes.get(quota["process_code"]),
+        "creator": await get_creator(db, quota["created_by"], current_user),
+    }
+
+async def delete_quota(db: AsyncSession, quota_id: int) -> Optional[dict]:
+    """删除定额"""
+    logger.debug(f"删除定额（异步）: quota_id={quota_id}")
+    db_quota = await db.get(models.Quota, quota_id)
+    if not db_quota:
+        logger.warning(f"定额不存在: quota_id={quota_id}")
+        return None
+
+    quota_info = {
+        "id": db_quota.id,
+        "process_code": db_quota.process_code,
+        "unit_price": str(from_cents(db_quota.unit_price_cents)),
+        "effective_date": str(db_quota.effective_date)
+    }
+
+    # 相关的工作记录由 ondelete=CASCADE 外键级联删除
+    await db.execute(
+        delete(models.Quota).where(models.Quota.id == quota_id).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    logger.info(f"定额删除成功: quota_id={quota_id}")
+    return quota_info
+
+async def count_quota_work_records(db: AsyncSession, quota_id: int) -> int:
+    """统计定额关联的工作记录数"""
+    result = await db.execute(
+        select(func.count(models.WorkRecord.id)).where(models.WorkRecord.quota_id == quota_id)
+    )
+    return result.scalar() or 0
+
+# 工作记录相关CRUD
+
+async def get_work_record_by_id(db: AsyncSession, record_id: int) -> Optional[models.WorkRecord]:
+    """根据ID获取工作记录"""
+    logger.debug(f"根据ID获取工作记录（异步）: record_id={record_id}")
+    result = await db.execute(
+        select(models.WorkRecord).options(*WORK_RECORD_LOAD_OPTIONS).where(models.WorkRecord.id == record_id)
+    )
+    return result.scalars().first()
+
+async def create_work_record(db: AsyncSession, record: schemas.WorkRecordCreate, created_by: int) -> dict:
+    """创建工作记录（单价和金额在同一条INSERT中取自定额；工人或定额不存在时抛出IntegrityError）"""
+    logger.debug(f"创建工作记录（异步）: worker_code={record.worker_code}, quota_id={record.quota_id}, quantity={record.quantity}, record_date={record.record_date}, created_by={created_by}")
+    values = {
+        **scaled_values(record.model_dump()),
+        **captured_price_values(record.quota_id, to_hundredths(record.quantity)),
+        "created_by": created_by,
+    }
+    db_record = await insert_returning(db, models.WorkRecord, values)
+    logger.info(f"工作记录创建成功: id={db_record['id']}, worker_code={record.worker_code}")
+    return db_record
+
+async def update_work_record(db: AsyncSession, record_id: int, record_update: schemas.WorkRecordUpdate) -> Optional[dict]:
+    """更新工作记录（修改数量时按录入时的单价重算金额）"""
+    update_data = scaled_values(record_update.model_dump(exclude_unset=True))
+    logger.debug(f"更新工作记录（异步）: record_id={record_id}, update_data={update_data}")
+    if "quantity_hundredths" in update_data:
+        update_data["amount_cents"] = recorded_amount_value(update_data["quantity_hundredths"])
+    db_record = await update_returning(db, models.WorkRecord, models.WorkRecord.id, record_id, update_data)
+    if not db_record:
+        logger.warning(f"工作记录不存在: record_id={record_id}")
+        return None
+    logger.info(f"工作记录更新成功: record_id={record_id}")
+    return db_record
+
+async def work_record_response(db: AsyncSession, record: dict, current_user: schemas.User) -> dict:
+    """由写入返回的工作记录行组装响应（工人取自基础数据缓存，定额只查一条不加载关系的行）"""
+    reference = await reference_cache.get_async(db)
+    table = models.Quota.__table__
+    quota = (await db.execute(select(*table.c).where(table.c.id == record["quota_id"]))).mappings().first()
+    return {
+        **record,
+        "worker": reference.workers.get(record["worker_code"]),
+        "quota": await quota_response(db, dict(quota), current_user) if quota else None,
+        "creator": await get_creator(db, record["created_by"], current_user),
+    }
+
+async def delete_work_record(db: AsyncSession, record_id: int) -> Optional[dict]:
+    """删除工作记录"""
+    logger.debug(f"删除工作记录（异步）: record_id={record_id}")
+    db_record = await db.get(models.WorkRecord, record_id)
+    if not db_record:
+        logger.warning(f"工作记录不存在: record_id={record_id}")
+        return None
+
+    record_info = {
+        "id": db_record.id,
+        "worker_code": db_record.worker_code,
+        "quota_id": db_record.quota_id,
+        "quantity": str(from_hundredths(db_record.quantity_hundredths)),
+        "record_date": db_record.record_date
+    }
+
+    await db.delete(db_record)
+    await db.commit()
+    logger.info(f"工作记录删除成功: record_id={record_id}")
+    return record_info
+
+# 工资记录视图相关CRUD
+
+def _reference_name(table, key: str, default: str) -> str:
+    """从基础数据快照中解析名称"""
+    row = table.get(key)
+    return row.name if row else default
+
+def _filter_salary_month(query, record_date: str):
+    """按月份（YYYY-MM）过滤工资记录，格式不合法时按具体日期过滤"""
+    return query.where(month_or_date_filter(models.VSalaryRecord.record_date, record_date))
+
+async def get_salary_record_by_id(db: AsyncSession, record_id: int) -> Optional[models.VSalaryRecord]:
+    """根据ID获取工资记录（视图）"""
+    logger.debug(f"根据ID获取工资记录（视图，异步）: record_id={record_id}")
+    result = await db.execute(
+        select(models.VSalaryRecord).options(*SALARY_RECORD_LOAD_OPTIONS).where(models.VSalaryRecord.id == record_id)
+    )
+    return result.scalars().first()
+
+async def get_salary_records(db: AsyncSession, worker_code: str = None, record_date: str = None, skip: int = 0, limit: int = 100) -> List[models.VSalaryRecord]:
+    """获取工资记录列表（视图）"""
+    logger.debug(f"获取工资记录列表（视图，异步）: worker_code={worker_code}, record_date={record_date}, skip={skip}, limit={limit}")
+    query = select(models.VSalaryRecord).options(*SALARY_RECORD_LOAD_OPTIONS)
+    if worker_code:
+        query = query.where(models.VSalaryRecord.worker_code == worker_code)
+    if record_date:
+        query = _filter_salary_month(query, record_date)
+    result = await db.execute(query.order_by(desc(models.VSalaryRecord.id)).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+async def get_worker_salary_summary(db: AsyncSession, worker_code: str, record_date: str) -> Decimal:
+    """获取工人月度工资汇总（累加录入时保存的金额，不关联定额）"""
+    logger.debug(f"获取工人月度工资汇总（异步）: worker_code={worker_code}, record_date={record_date}")
+    query = select(func.sum(models.WorkRecord.amount_cents)).where(
+        models.WorkRecord.worker_code == worker_code,
+        month_or_date_filter(models.WorkRecord.record_date, record_date),
+    )
+    return from_cents((await db.execute(query)).scalar() or 0)
+
+async def reprice_work_records(
+    db: AsyncSession,
+    quota_id: int = None,
+    start_date: date = None,
+    end_date: date = None,
+) -> int:
+    """
+    按定额的现行单价重新计算工作记录的单价和金额（管理员显式调价时使用）
+
+    Args:
+        db: 数据库会话
+        quota_id: 只处理该定额的记录
+        start_date: 记录日期下限（含）
+        end_date: 记录日期上限（含）
+
+    Returns:
+        int: 单价发生变化并被更新的记录数
+    """
+    logger.debug(f"重新计价工作记录（异步）: quota_id={quota_id}, start_date={start_date}, end_date={end_date}")
+    record = models.WorkRecord
+    conditions = []
+    if quota_id is not None:
+        conditions.append(record.quota_id == quota_id)
+    if start_date:
+        conditions.append(record.record_date >= start_date)
+    if end_date:
+        conditions.append(record.record_date <= end_date)
+    result = await db.execute(reprice_work_records_statement(*conditions))
+    await db.commit()
+    logger.info(f"工作记录重新计价完成: quota_id={quota_id}, start_date={start_date}, end_date={end_date}, updated={result.rowcount}")
+    return result.rowcount
+
+# 报表相关查询
+
+async def get_salary_records_by_worker_and_month(db: AsyncSession, worker_code: str, month: str) -> List[models.VSalaryRecord]:
+    """获取工人月度工资记录（预先加载定额，工序和类别名称由调用方从基础数据缓存解析）"""
+    logger.debug(f"获取工人月度工资记录（异步）: worker_code={worker_code}, month={month}")
+    query = select(models.VSalaryRecord).options(
+        selectinload(models.VSalaryRecord.quota),
+    ).where(models.VSalaryRecord.worker_code == worker_code)
+    result = await db.execute(_filter_salary_month(query, month).order_by(models.VSalaryRecord.record_date))
+    return list(result.scalars().all())
+
+async def get_process_workload_summary(db: AsyncSession, month: str) -> List[Dict[str, Any]]:
+    """获取工序工作量汇总（累加录入时保存的金额），工序类别取自定额的工序类别（cat2），名称从基础数据缓存解析"""
+    logger.debug(f"获取工序工作量汇总（异步）: month={month}")
+    reference = await reference_cache.get_async(db)
+    record = models.WorkRecord
+    query = select(
+        models.Quota.process_code,
+        models.Quota.cat2_code,
+        func.sum(record.quantity_hundredths).label("total_quantity_hundredths"),
+        func.sum(record.amount_cents).label("total_amount_cents")
+    ).join(
+        record, record.quota_id == models.Quota.id
+    ).where(
+        month_or_date_filter(record.record_date, month)
+    ).group_by(
+        models.Quota.process_code, models.Quota.cat2_code
+    )
+    results = (await db.execute(query)).all()
+
+    return [
+        {
+            "process_code": result.process_code,
+            "process_name": _reference_name(reference.processes, result.process_code, "未知工序"),
+            "process_category": _reference_name(reference.process_cat2, result.cat2_code, "未知类别"),
+            "month": month,
+            "total_quantity": from_hundredths(result.total_quantity_hundredths or 0),
+            "total_amount": from_cents(result.total_amount_cents or 0)
+        }
+        for result in results
+    ]
+
+async def get_salary_summary(db: AsyncSession, month: str) -> Dict[str, Any]:
+    """获取工资汇总信息"""
+    logger.debug(f"获取工资汇总信息（异步）: month={month}")
+    record = models.WorkRecord
+    month_condition = month_or_date_filter(record.record_date, month)
+    totals = (await db.execute(
+        select(
+            func.count(distinct(record.worker_code)).label("total_workers"),
+            func.sum(record.amount_cents).label("total_amount_cents")
+        ).where(month_condition)
+    )).one()
+
+    category_results = (await db.execute(
+        select(
+            models.Quota.cat2_code,
+            func.sum(record.amount_cents).label("total_amount_cents")
+        ).join(
+            record, record.quota_id == models.Quota.id
+        ).where(
+            month_condition
+        ).group_by(
+            models.Quota.cat2_code
+        )
+    )).all()
+
+    # 按工序类别名称合并（类别名称从基础数据缓存解析）
+    reference = await reference_cache.get_async(db)
+    category_cents: Dict[str, int] = {}
+    for result in category_results:
+        category = _reference_name(reference.process_cat2, result.cat2_code, "未知类别")
+        category_cents[category] = category_cents.get(category, 0) + (result.total_amount_cents or 0)
+
+    return {
+        "month": month,
+        "total_workers": totals.total_workers or 0,
+        "total_amount": from_cents(totals.total_amount_cents or 0),
+        "category_summary": [
+            {"category": category, "total_amount": from_cents(total_cents)}
+            for category, total_cents in category_cents.items()
+        ]
+    }
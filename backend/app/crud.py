@@ -1,15 +1,55 @@
 import logging
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+import os
 from datetime import date
 from decimal import Decimal
 
 from . import models, schemas
+from .db_schema import captured_price_values, recorded_amount_value
+from .reference_cache import reference_cache
 from .utils.auth import get_password_hash
+from .utils.model_aliases import get_model_name_index, normalize_model_name, split_aliases
+from .utils.money import from_cents, from_hundredths, scaled_values, to_hundredths
+from .utils.query_helpers import month_filter, month_or_date_filter
 
 logger = logging.getLogger(__name__)
 
+# 写入辅助函数：单条 INSERT/UPDATE ... RETURNING 完成写入并返回新行，
+# 不再先查询是否存在、也不再在提交后 refresh。约束冲突以 IntegrityError 抛出，由路由映射为 400/404。
+
+def insert_returning(db: Session, model, values: dict, commit: bool = True) -> dict:
+    """插入一行并返回插入后的完整行（commit=False时由调用方在同一事务中继续写入后提交）"""
+    table = model.__table__
+    try:
+        row = db.execute(insert(table).values(**values).returning(*table.c)).mappings().one()
+        if commit:
+            db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise
+    return dict(row)
+
+def update_returning(db: Session, model, key_column, key, values: dict, commit: bool = True) -> Optional[dict]:
+    """按主键更新一行并返回更新后的完整行，行不存在时返回None"""
+    table = model.__table__
+    if not values:
+        row = db.execute(select(*table.c).where(key_column == key)).mappings().first()
+        return dict(row) if row else None
+    try:
+        row = db.execute(
+            update(table).where(key_column == key).values(**values).returning(*table.c)
+        ).mappings().first()
+        if commit:
+            db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise
+    return dict(row) if row else None
+
+
 # 用户相关CRUD
 
 def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
@@ -29,44 +69,33 @@ def get_users(db: Session, skip: int = 0, limit: int = 100):
     logger.debug(f"查询结果: 共{len(users)}个用户")
     return users
 
-def create_user(db: Session, user: schemas.UserCreate):
-    """创建用户"""
+def create_user(db: Session, user: schemas.UserCreate) -> dict:
+    """创建用户（用户名重复时抛出IntegrityError）"""
     logger.debug(f"创建用户: username={user.username}, name={user.name}, role={user.role}")
     hashed_password = get_password_hash(user.password)
     logger.debug(f"密码哈希完成")
-    db_user = models.User(
-        username=user.username,
-        password=hashed_password,
-        name=user.name,
-        role=user.role
-    )
-    logger.debug(f"创建用户对象: {db_user}")
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    logger.info(f"用户创建成功: username={user.username}, id={db_user.id}")
+    db_user = insert_returning(db, models.User, {
+        "username": user.username,
+        "password": hashed_password,
+        "name": user.name,
+        "role": user.role
+    })
+    logger.info(f"用户创建成功: username={user.username}, id={db_user['id']}")
     return db_user
 
-def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
+def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate) -> Optional[dict]:
     """更新用户"""
-    logger.debug(f"更新用户: user_id={user_id}, update_data={user_update.dict(exclude_unset=True)}")
-    db_user = get_user_by_id(db, user_id)
-    if not db_user:
-        logger.warning(f"用户不存在: user_id={user_id}")
-        return None
-    
-    update_data = user_update.dict(exclude_unset=True)
+    logger.debug(f"更新用户: user_id={user_id}, update_data={user_update.model_dump(exclude_unset=True, exclude={'password'})}")
+    update_data = user_update.model_dump(exclude_unset=True)
     if "password" in update_data:
         logger.debug("更新密码字段，进行哈希处理")
         update_data["password"] = get_password_hash(update_data["password"])
     
-    logger.debug(f"更新字段: {update_data}")
-    for field, value in update_data.items():
-        setattr(db_user, field, value)
-    
-    db.commit()
-    db.refresh(db_user)
-    logger.info(f"用户更新成功: user_id={user_id}, username={db_user.username}")
+    db_user = update_returning(db, models.User, models.User.id, user_id, update_data)
+    if not db_user:
+        logger.warning(f"用户不存在: user_id={user_id}")
+        return None
+    logger.info(f"用户更新成功: user_id={user_id}, username={db_user['username']}")
     return db_user
 
 def delete_user(db: Session, user_id: int):
@@ -93,47 +122,36 @@ def delete_user(db: Session, user_id: int):
 
 # 工人相关CRUD
 
-def get_worker_by_code(db: Session, worker_code: str) -> Optional[models.Worker]:
-    """根据工号获取工人"""
+def get_worker_by_code(db: Session, worker_code: str):
+    """根据工号获取工人（从基础数据缓存读取）"""
     logger.debug(f"根据工号获取工人: worker_code={worker_code}")
-    return db.query(models.Worker).filter(models.Worker.worker_code == worker_code).first()
+    return reference_cache.get(db).workers.get(worker_code)
 
 def get_workers(db: Session, skip: int = 0, limit: int = 100) -> List[models.Worker]:
     """获取工人列表"""
     logger.debug(f"获取工人列表: skip={skip}, limit={limit}")
     return db.query(models.Worker).offset(skip).limit(limit).all()
 
-def create_worker(db: Session, worker: schemas.WorkerCreate) -> models.Worker:
-    """创建工人"""
-    logger.debug(f"创建工人: worker_code={worker.worker_code}, name={worker.name}")
-    db_worker = models.Worker(**worker.model_dump())
-    logger.debug(f"创建工人对象: {db_worker}")
-    db.add(db_worker)
-    db.commit()
-    db.refresh(db_worker)
+def create_worker(db: Session, worker: schemas.WorkerCreate) -> dict:
+    """创建工人（编码重复时抛出IntegrityError）"""
+    logger.debug(f"创建工人: worker_code={worker.worker_code}")
+    db_worker = insert_returning(db, models.Worker, worker.model_dump())
     logger.info(f"工人创建成功: worker_code={worker.worker_code}")
     return db_worker
 
-def update_worker(db: Session, worker_code: str, worker_update: schemas.WorkerUpdate) -> Optional[models.Worker]:
+def update_worker(db: Session, worker_code: str, worker_update: schemas.WorkerUpdate) -> Optional[dict]:
     """更新工人"""
-    logger.debug(f"更新工人: worker_code={worker_code}, update_data={worker_update.model_dump(exclude_unset=True)}")
-    db_worker = get_worker_by_code(db, worker_code)
+    update_data = worker_update.model_dump(exclude_unset=True)
+    logger.debug(f"更新工人: worker_code={worker_code}, update_data={update_data}")
+    db_worker = update_returning(db, models.Worker, models.Worker.worker_code, worker_code, update_data)
     if not db_worker:
         logger.warning(f"工人不存在: worker_code={worker_code}")
         return None
-    
-    update_data = worker_update.model_dump(exclude_unset=True)
-    logger.debug(f"更新字段: {update_data}")
-    for field, value in update_data.items():
-        setattr(db_worker, field, value)
-    
-    db.commit()
-    db.refresh(db_worker)
     logger.info(f"工人更新成功: worker_code={worker_code}")
     return db_worker
 
-def delete_worker(db: Session, worker_code: str) -> Optional[dict]:
-    """删除工人"""
+def delete_worker(db: Session, worker_code: str, job=None) -> Optional[dict]:
+    """删除工人及其工作记录（集合删除，传入job时分批删除并上报进度）"""
     logger.debug(f"删除工人: worker_code={worker_code}")
     db_worker = get_worker_by_code(db, worker_code)
     if not db_worker:
@@ -146,71 +164,52 @@ def delete_worker(db: Session, worker_code: str) -> Optional[dict]:
         "name": db_worker.name
     }
     
-    # 先删除相关的工作记录
-    logger.debug(f"查找工人相关的工作记录: worker_code={worker_code}")
-    work_records = db.query(models.WorkRecord).filter(
-        models.WorkRecord.worker_code == worker_code
-    ).all()
-    
-    if work_records:
-        logger.debug(f"删除{len(work_records)}条相关的工作记录")
-        for record in work_records:
-            db.delete(record)
+    # 先删除相关的工作记录（work_records.worker_code外键没有级联，需要显式删除）
+    deleted = _delete_work_records(db, worker_work_records_filter(worker_code), job)
+    logger.debug(f"删除{deleted}条相关的工作记录")
     
-    logger.debug(f"删除工人对象: {db_worker}")
-    db.delete(db_worker)
+    db.execute(delete(models.Worker).where(models.Worker.worker_code == worker_code).execution_options(synchronize_session=False))
     db.commit()
     logger.info(f"工人删除成功: worker_code={worker_code}")
     return worker_info
 
 # 工序相关CRUD
 
-def get_process_by_code(db: Session, process_code: str) -> Optional[models.Process]:
-    """根据工序编码获取工序"""
+def get_process_by_code(db: Session, process_code: str):
+    """根据工序编码获取工序（从基础数据缓存读取）"""
     logger.debug(f"根据工序编码获取工序: process_code={process_code}")
-    return db.query(models.Process).filter(models.Process.process_code == process_code).first()
+    return reference_cache.get(db).processes.get(process_code)
 
-def get_process_by_name(db: Session, process_name: str) -> Optional[models.Process]:
-    """根据工序名称获取工序"""
+def get_process_by_name(db: Session, process_name: str):
+    """根据工序名称获取工序（从基础数据缓存读取）"""
     logger.debug(f"根据工序名称获取工序: process_name={process_name}")
-    return db.query(models.Process).filter(models.Process.name == process_name).first()
+    return reference_cache.get(db).processes.by_name.get(process_name)
 
 def get_processes(db: Session, skip: int = 0, limit: int = 100) -> List[models.Process]:
     """获取工序列表"""
     logger.debug(f"获取工序列表: skip={skip}, limit={limit}")
     return db.query(models.Process).offset(skip).limit(limit).all()
 
-def create_process(db: Session, process: schemas.ProcessCreate) -> models.Process:
-    """创建工序"""
-    logger.debug(f"创建工序: process_code={process.process_code}, name={process.name}")
-    db_process = models.Process(**process.model_dump())
-    logger.debug(f"创建工序对象: {db_process}")
-    db.add(db_process)
-    db.commit()
-    db.refresh(db_process)
+def create_process(db: Session, process: schemas.ProcessCreate) -> dict:
+    """创建工序（编码重复时抛出IntegrityError）"""
+    logger.debug(f"创建工序: process_code={process.process_code}")
+    db_process = insert_returning(db, models.Process, process.model_dump())
     logger.info(f"工序创建成功: process_code={process.process_code}")
     return db_process
 
-def update_process(db: Session, process_code: str, process_update: schemas.ProcessUpdate) -> Optional[models.Process]:
+def update_process(db: Session, process_code: str, process_update: schemas.ProcessUpdate) -> Optional[dict]:
     """更新工序"""
-    logger.debug(f"更新工序: process_code={process_code}, update_data={process_update.model_dump(exclude_unset=True)}")
-    db_process = get_process_by_code(db, process_code)
+    update_data = process_update.model_dump(exclude_unset=True)
+    logger.debug(f"更新工序: process_code={process_code}, update_data={update_data}")
+    db_process = update_returning(db, models.Process, models.Process.process_code, process_code, update_data)
     if not db_process:
         logger.warning(f"工序不存在: process_code={process_code}")
         return None
-    
-    update_data = process_update.model_dump(exclude_unset=True)
-    logger.debug(f"更新字段: {update_data}")
-    for field, value in update_data.items():
-        setattr(db_process, field, value)
-    
-    db.commit()
-    db.refresh(db_process)
     logger.info(f"工序更新成功: process_code={process_code}")
     return db_process
 
-def delete_process(db: Session, process_code: str) -> Optional[dict]:
-    """删除工序"""
+def delete_process(db: Session, process_code: str, job=None) -> Optional[dict]:
+    """删除工序及其定额和工作记录（集合删除，传入job时分批删除并上报进度）"""
     logger.debug(f"删除工序: process_code={process_code}")
     db_process = get_process_by_code(db, process_code)
     if not db_process:
@@ -223,29 +222,15 @@ def delete_process(db: Session, process_code: str) -> Optional[dict]:
         "name": db_process.name
     }
     
-    # 先删除相关的定额和工作记录
-    logger.debug(f"查找工序相关的定额: process_code={process_code}")
-    quotas = db.query(models.Quota).filter(
-        models.Quota.process_code == process_code
-    ).all()
+    # 分批模式下先删除工作记录以便上报进度；否则删除定额时由 ondelete=CASCADE 外键级联删除
+    if job is not None:
+        deleted = _delete_work_records(db, process_work_records_filter(process_code), job)
+        logger.debug(f"删除{deleted}条相关的工作记录")
     
-    if quotas:
-        logger.debug(f"删除{len(quotas)}个相关的定额及其工作记录")
-        for quota in quotas:
-            # 删除定额相关的工作记录
-            work_records = db.query(models.WorkRecord).filter(
-                models.WorkRecord.quota_id == quota.id
-            ).all()
-            if work_records:
-                logger.debug(f"删除定额ID={quota.id}的{len(work_records)}条工作记录")
-                for record in work_records:
-                    db.delete(record)
-            
-            # 删除定额
-            db.delete(quota)
+    result = db.execute(delete(models.Quota).where(models.Quota.process_code == process_code).execution_options(synchronize_session=False))
+    logger.debug(f"删除{result.rowcount}个相关的定额及其工作记录")
     
-    logger.debug(f"删除工序对象: {db_process}")
-    db.delete(db_process)
+    db.execute(delete(models.Process).where(models.Process.process_code == process_code).execution_options(synchronize_session=False))
     db.commit()
     logger.info(f"工序删除成功: process_code={process_code}")
     return process_info
@@ -266,50 +251,40 @@ def get_quotas(db: Session, process_code: str = None, skip: int = 0, limit: int
     return query.order_by(desc(models.Quota.id)).offset(skip).limit(limit).all()
 
 def get_latest_quota(db: Session, process_code: str, effective_date: date = None) -> Optional[models.Quota]:
-    """获取指定日期前的最新定额"""
-    if not effective_date:
-        effective_date = date.today()
+    """获取指定日期前的最新定额（今天的最新定额直接读取current_quotas）"""
     logger.debug(f"获取最新定额: process_code={process_code}, effective_date={effective_date}")
+    if not effective_date or effective_date == date.today():
+        return db.query(models.Quota).join(
+            models.CurrentQuota, models.CurrentQuota.quota_id == models.Quota.id
+        ).filter(
+            models.CurrentQuota.process_code == process_code
+        ).order_by(desc(models.CurrentQuota.effective_date), desc(models.CurrentQuota.quota_id)).first()
     
     return db.query(models.Quota).filter(
         models.Quota.process_code == process_code,
         models.Quota.effective_date <= effective_date
     ).order_by(desc(models.Quota.effective_date)).first()
 
-def create_quota(db: Session, quota: schemas.QuotaCreate, created_by: int) -> models.Quota:
-    """创建定额"""
+def create_quota(db: Session, quota: schemas.QuotaCreate, created_by: int) -> dict:
+    """创建定额（引用的工序/类别/型号不存在或定额重复时抛出IntegrityError）"""
     logger.debug(f"创建定额: process_code={quota.process_code}, unit_price={quota.unit_price}, effective_date={quota.effective_date}, created_by={created_by}")
-    db_quota = models.Quota(
-        **quota.model_dump(),
-        created_by=created_by
-    )
-    logger.debug(f"创建定额对象: {db_quota}")
-    db.add(db_quota)
-    db.commit()
-    db.refresh(db_quota)
-    logger.info(f"定额创建成功: id={db_quota.id}, process_code={quota.process_code}")
+    db_quota = insert_returning(db, models.Quota, {**scaled_values(quota.model_dump()), "created_by": created_by})
+    logger.info(f"定额创建成功: id={db_quota['id']}, process_code={quota.process_code}")
     return db_quota
 
-def update_quota(db: Session, quota_id: int, quota_update: schemas.QuotaUpdate) -> Optional[models.Quota]:
+def update_quota(db: Session, quota_id: int, quota_update: schemas.QuotaUpdate) -> Optional[dict]:
     """更新定额"""
-    logger.debug(f"更新定额: quota_id={quota_id}, update_data={quota_update.model_dump(exclude_unset=True)}")
-    db_quota = get_quota_by_id(db, quota_id)
+    update_data = scaled_values(quota_update.model_dump(exclude_unset=True))
+    logger.debug(f"更新定额: quota_id={quota_id}, update_data={update_data}")
+    db_quota = update_returning(db, models.Quota, models.Quota.id, quota_id, update_data)
     if not db_quota:
         logger.warning(f"定额不存在: quota_id={quota_id}")
         return None
-    
-    update_data = quota_update.model_dump(exclude_unset=True)
-    logger.debug(f"更新字段: {update_data}")
-    for field, value in update_data.items():
-        setattr(db_quota, field, value)
-    
-    db.commit()
-    db.refresh(db_quota)
     logger.info(f"定额更新成功: quota_id={quota_id}")
     return db_quota
 
-def delete_quota(db: Session, quota_id: int) -> Optional[dict]:
-    """删除定额"""
+def delete_quota(db: Session, quota_id: int, job=None) -> Optional[dict]:
+    """删除定额及其工作记录（集合删除，传入job时分批删除并上报进度）"""
     logger.debug(f"删除定额: quota_id={quota_id}")
     db_quota = get_quota_by_id(db, quota_id)
     if not db_quota:
@@ -320,27 +295,72 @@ def delete_quota(db: Session, quota_id: int) -> Optional[dict]:
     quota_info = {
         "id": db_quota.id,
         "process_code": db_quota.process_code,
-        "unit_price": str(db_quota.unit_price),
+        "unit_price": str(from_cents(db_quota.unit_price_cents)),
         "effective_date": str(db_quota.effective_date)
     }
     
-    # 先删除相关的工作记录
-    logger.debug(f"查找定额相关的工作记录: quota_id={quota_id}")
-    work_records = db.query(models.WorkRecord).filter(
-        models.WorkRecord.quota_id == quota_id
-    ).all()
+    # 分批模式下先删除工作记录；否则由 ondelete=CASCADE 外键级联删除
+    if job is not None:
+        deleted = _delete_work_records(db, quota_work_records_filter(quota_id), job)
+        logger.debug(f"删除{deleted}条相关的工作记录")
     
-    if work_records:
-        logger.debug(f"删除{len(work_records)}条相关的工作记录")
-        for record in work_records:
-            db.delete(record)
-    
-    logger.debug(f"删除定额对象: {db_quota}")
-    db.delete(db_quota)
+    db.execute(delete(models.Quota).where(models.Quota.id == quota_id).execution_options(synchronize_session=False))
     db.commit()
     logger.info(f"定额删除成功: quota_id={quota_id}")
     return quota_info
 
+# 级联删除相关
+
+# 每批删除的工作记录数
+CASCADE_CHUNK_SIZE = int(os.getenv("CASCADE_CHUNK_SIZE", "5000"))
+# 关联工作记录超过该数量时，删除操作转为后台任务
+CASCADE_BACKGROUND_THRESHOLD = int(os.getenv("CASCADE_BACKGROUND_THRESHOLD", "50000"))
+
+def worker_work_records_filter(worker_code: str):
+    """工人关联的工作记录条件"""
+    return models.WorkRecord.worker_code == worker_code
+
+def process_work_records_filter(process_code: str):
+    """工序关联的工作记录条件"""
+    return models.WorkRecord.quota_id.in_(
+        select(models.Quota.id).where(models.Quota.process_code == process_code)
+    )
+
+def quota_work_records_filter(quota_id: int):
+    """定额关联的工作记录条件"""
+    return models.WorkRecord.quota_id == quota_id
+
+def count_work_records(db: Session, condition) -> int:
+    """统计满足条件的工作记录数"""
+    return db.execute(select(func.count(models.WorkRecord.id)).where(condition)).scalar() or 0
+
+def _delete_work_records(db: Session, condition, job=None) -> int:
+    """
+    删除满足条件的工作记录
+    
+    未传入job时使用单条 DELETE 语句；传入job时按 CASCADE_CHUNK_SIZE 分批删除，
+    每批单独提交并更新任务进度，避免长事务和长时间持有写锁；每批之前检查任务是否已请求取消。
+
+    Raises:
+        JobCancelled: 任务已请求取消（已提交的批次不回滚）
+    """
+    if job is None:
+        return db.execute(delete(models.WorkRecord).where(condition).execution_options(synchronize_session=False)).rowcount
+    
+    deleted = 0
+    while True:
+        job.check_cancelled()
+        chunk_ids = select(models.WorkRecord.id).where(condition).limit(CASCADE_CHUNK_SIZE)
+        rowcount = db.execute(
+            delete(models.WorkRecord).where(models.WorkRecord.id.in_(chunk_ids))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        deleted += rowcount
+        job.update(deleted, f"已删除{deleted}条工作记录")
+        if rowcount < CASCADE_CHUNK_SIZE:
+            return deleted
+
 # 工作记录相关CRUD
 
 def get_work_record_by_id(db: Session, record_id: int) -> Optional[models.WorkRecord]:
@@ -355,57 +375,32 @@ def get_work_records(db: Session, worker_code: str = None, record_date: str = No
     if worker_code:
         query = query.filter(models.WorkRecord.worker_code == worker_code)
     if record_date:
-        # record_date is in YYYY-MM format, filter by month
-        from datetime import datetime
-        try:
-            year_month = datetime.strptime(record_date, "%Y-%m")
-            # Filter records where record_date's year and month match
-            query = query.filter(
-                db.func.strftime("%Y-%m", models.WorkRecord.record_date) == record_date
-            )
-        except ValueError:
-            logger.warning(f"Invalid record_date format: {record_date}, expected YYYY-MM")
-            # If invalid format, treat as exact date (YYYY-MM-DD)
-            query = query.filter(models.WorkRecord.record_date == record_date)
+        # record_date is in YYYY-MM format, filter by month (falls back to exact date)
+        query = query.filter(month_or_date_filter(models.WorkRecord.record_date, record_date))
     return query.order_by(desc(models.WorkRecord.created_at)).offset(skip).limit(limit).all()
 
-def create_work_record(db: Session, record: schemas.WorkRecordCreate, created_by: int) -> Optional[models.WorkRecord]:
-    """创建工作记录"""
+def create_work_record(db: Session, record: schemas.WorkRecordCreate, created_by: int) -> dict:
+    """创建工作记录（单价和金额在同一条INSERT中取自定额；工人或定额不存在时抛出IntegrityError）"""
     logger.debug(f"创建工作记录: worker_code={record.worker_code}, quota_id={record.quota_id}, quantity={record.quantity}, record_date={record.record_date}, created_by={created_by}")
-    
-    # 获取定额信息
-    logger.debug(f"获取定额信息: quota_id={record.quota_id}")
-    quota = get_quota_by_id(db, record.quota_id)
-    if not quota:
-        logger.warning(f"定额不存在: quota_id={record.quota_id}")
-        return None
-    
-    db_record = models.WorkRecord(
-        **record.model_dump(),
-        created_by=created_by
-    )
-    logger.debug(f"创建工作记录对象: {db_record}")
-    db.add(db_record)
-    db.commit()
-    db.refresh(db_record)
-    logger.info(f"工作记录创建成功: id={db_record.id}, worker_code={record.worker_code}")
+    values = {
+        **scaled_values(record.model_dump()),
+        **captured_price_values(record.quota_id, to_hundredths(record.quantity)),
+        "created_by": created_by,
+    }
+    db_record = insert_returning(db, models.WorkRecord, values)
+    logger.info(f"工作记录创建成功: id={db_record['id']}, worker_code={record.worker_code}")
     return db_record
 
-def update_work_record(db: Session, record_id: int, record_update: schemas.WorkRecordUpdate) -> Optional[models.WorkRecord]:
-    """更新工作记录"""
-    logger.debug(f"更新工作记录: record_id={record_id}, update_data={record_update.model_dump(exclude_unset=True)}")
-    db_record = get_work_record_by_id(db, record_id)
+def update_work_record(db: Session, record_id: int, record_update: schemas.WorkRecordUpdate) -> Optional[dict]:
+    """更新工作记录（修改数量时按录入时的单价重算金额）"""
+    update_data = scaled_values(record_update.model_dump(exclude_unset=True))
+    logger.debug(f"更新工作记录: record_id={record_id}, update_data={update_data}")
+    if "quantity_hundredths" in update_data:
+        update_data["amount_cents"] = recorded_amount_value(update_data["quantity_hundredths"])
+    db_record = update_returning(db, models.WorkRecord, models.WorkRecord.id, record_id, update_data)
     if not db_record:
         logger.warning(f"工作记录不存在: record_id={record_id}")
         return None
-    
-    update_data = record_update.model_dump(exclude_unset=True)
-    logger.debug(f"更新字段: {update_data}")
-    for field, value in update_data.items():
-        setattr(db_record, field, value)
-    
-    db.commit()
-    db.refresh(db_record)
     logger.info(f"工作记录更新成功: record_id={record_id}")
     return db_record
 
@@ -422,7 +417,7 @@ def delete_work_record(db: Session, record_id: int) -> Optional[dict]:
         "id": db_record.id,
         "worker_code": db_record.worker_code,
         "quota_id": db_record.quota_id,
-        "quantity": str(db_record.quantity),
+        "quantity": str(from_hundredths(db_record.quantity_hundredths)),
         "record_date": db_record.record_date
     }
     
@@ -446,79 +441,57 @@ def get_salary_records(db: Session, worker_code: str = None, record_date: str =
     if worker_code:
         query = query.filter(models.VSalaryRecord.worker_code == worker_code)
     if record_date:
-        # record_date is in YYYY-MM format, filter by month
-        from datetime import datetime
-        try:
-            year_month = datetime.strptime(record_date, "%Y-%m")
-            # Filter records where record_date's year and month match
-            query = query.filter(
-                db.func.strftime("%Y-%m", models.VSalaryRecord.record_date) == record_date
-            )
-        except ValueError:
-            logger.warning(f"Invalid record_date format: {record_date}, expected YYYY-MM")
-            # If invalid format, treat as exact date (YYYY-MM-DD)
-            query = query.filter(models.VSalaryRecord.record_date == record_date)
+        # record_date is in YYYY-MM format, filter by month (falls back to exact date)
+        query = query.filter(month_or_date_filter(models.VSalaryRecord.record_date, record_date))
     return query.order_by(desc(models.VSalaryRecord.id)).offset(skip).limit(limit).all()
 
 def get_worker_salary_summary(db: Session, worker_code: str, record_date: str) -> Decimal:
-    """获取工人月度工资汇总"""
+    """获取工人月度工资汇总（累加录入时保存的金额，不关联定额）"""
     logger.debug(f"获取工人月度工资汇总: worker_code={worker_code}, record_date={record_date}")
-    # record_date is in YYYY-MM format, filter by month
-    result = db.query(
-        func.sum(models.VSalaryRecord.amount).label("total_amount")
+    total_cents = db.query(
+        func.sum(models.WorkRecord.amount_cents)
     ).filter(
-        models.VSalaryRecord.worker_code == worker_code,
-        db.func.strftime("%Y-%m", models.VSalaryRecord.record_date) == record_date
-    ).first()
+        models.WorkRecord.worker_code == worker_code,
+        month_filter(models.WorkRecord.record_date, record_date)
+    ).scalar()
     
-    total = result.total_amount or Decimal("0.00")
+    total = from_cents(total_cents or 0)
     logger.debug(f"工人月度工资汇总结果: worker_code={worker_code}, total_amount={total}")
     return total
 
 
 # 工段类别相关CRUD
 
-def get_process_cat1_by_code(db: Session, cat1_code: str) -> Optional[models.ProcessCat1]:
-    """根据工段类别编码获取工段类别"""
+def get_process_cat1_by_code(db: Session, cat1_code: str):
+    """根据工段类别编码获取工段类别（从基础数据缓存读取）"""
     logger.debug(f"根据工段类别编码获取工段类别: cat1_code={cat1_code}")
-    return db.query(models.ProcessCat1).filter(models.ProcessCat1.cat1_code == cat1_code).first()
+    return reference_cache.get(db).process_cat1.get(cat1_code)
 
-def get_process_cat1_by_name(db: Session, name: str) -> Optional[models.ProcessCat1]:
-    """根据工段类别名称获取工段类别"""
+def get_process_cat1_by_name(db: Session, name: str):
+    """根据工段类别名称获取工段类别（从基础数据缓存读取）"""
     logger.debug(f"根据工段类别名称获取工段类别: name={name}")
-    return db.query(models.ProcessCat1).filter(models.ProcessCat1.name == name).first()
+    return reference_cache.get(db).process_cat1.by_name.get(name)
 
 def get_process_cat1_list(db: Session, skip: int = 0, limit: int = 100) -> List[models.ProcessCat1]:
     """获取工段类别列表"""
     logger.debug(f"获取工段类别列表: skip={skip}, limit={limit}")
     return db.query(models.ProcessCat1).offset(skip).limit(limit).all()
 
-def create_process_cat1(db: Session, process_cat1: schemas.ProcessCat1Create) -> models.ProcessCat1:
-    """创建工段类别"""
-    logger.debug(f"创建工段类别: cat1_code={process_cat1.cat1_code}, name={process_cat1.name}")
-    db_process_cat1 = models.ProcessCat1(**process_cat1.model_dump())
-    logger.debug(f"创建工段类别对象: {db_process_cat1}")
-    db.add(db_process_cat1)
-    db.commit()
-    db.refresh(db_process_cat1)
+def create_process_cat1(db: Session, process_cat1: schemas.ProcessCat1Create) -> dict:
+    """创建工段类别（编码重复时抛出IntegrityError）"""
+    logger.debug(f"创建工段类别: cat1_code={process_cat1.cat1_code}")
+    db_process_cat1 = insert_returning(db, models.ProcessCat1, process_cat1.model_dump())
     logger.info(f"工段类别创建成功: cat1_code={process_cat1.cat1_code}")
     return db_process_cat1
 
-def update_process_cat1(db: Session, cat1_code: str, process_cat1_update: schemas.ProcessCat1Update) -> Optional[models.ProcessCat1]:
+def update_process_cat1(db: Session, cat1_code: str, process_cat1_update: schemas.ProcessCat1Update) -> Optional[dict]:
     """更新工段类别"""
-    logger.debug(f"更新工段类别: cat1_code={cat1_code}, update_data={process_cat1_update.model_dump(exclude_unset=True)}")
-    db_process_cat1 = get_process_cat1_by_code(db, cat1_code)
+    update_data = process_cat1_update.model_dump(exclude_unset=True)
+    logger.debug(f"更新工段类别: cat1_code={cat1_code}, update_data={update_data}")
+    db_process_cat1 = update_returning(db, models.ProcessCat1, models.ProcessCat1.cat1_code, cat1_code, update_data)
     if not db_process_cat1:
         logger.warning(f"工段类别不存在: cat1_code={cat1_code}")
         return None
-    
-    update_data = process_cat1_update.model_dump(exclude_unset=True)
-    logger.debug(f"更新字段: {update_data}")
-    for field, value in update_data.items():
-        setattr(db_process_cat1, field, value)
-    
-    db.commit()
-    db.refresh(db_process_cat1)
     logger.info(f"工段类别更新成功: cat1_code={cat1_code}")
     return db_process_cat1
 
@@ -536,8 +509,8 @@ def delete_process_cat1(db: Session, cat1_code: str) -> Optional[dict]:
         "name": db_process_cat1.name
     }
     
-    logger.debug(f"删除工段类别对象: {db_process_cat1}")
-    db.delete(db_process_cat1)
+    # 关联的定额由 ondelete=CASCADE 外键级联删除
+    db.execute(delete(models.ProcessCat1).where(models.ProcessCat1.cat1_code == cat1_code).execution_options(synchronize_session=False))
     db.commit()
     logger.info(f"工段类别删除成功: cat1_code={cat1_code}")
     return process_cat1_info
@@ -545,47 +518,36 @@ def delete_process_cat1(db: Session, cat1_code: str) -> Optional[dict]:
 
 # 工序类别相关CRUD
 
-def get_process_cat2_by_code(db: Session, cat2_code: str) -> Optional[models.ProcessCat2]:
-    """根据工序类别编码获取工序类别"""
+def get_process_cat2_by_code(db: Session, cat2_code: str):
+    """根据工序类别编码获取工序类别（从基础数据缓存读取）"""
     logger.debug(f"根据工序类别编码获取工序类别: cat2_code={cat2_code}")
-    return db.query(models.ProcessCat2).filter(models.ProcessCat2.cat2_code == cat2_code).first()
+    return reference_cache.get(db).process_cat2.get(cat2_code)
 
-def get_process_cat2_by_name(db: Session, name: str) -> Optional[models.ProcessCat2]:
-    """根据工序类别名称获取工序类别"""
+def get_process_cat2_by_name(db: Session, name: str):
+    """根据工序类别名称获取工序类别（从基础数据缓存读取）"""
     logger.debug(f"根据工序类别名称获取工序类别: name={name}")
-    return db.query(models.ProcessCat2).filter(models.ProcessCat2.name == name).first()
+    return reference_cache.get(db).process_cat2.by_name.get(name)
 
 def get_process_cat2_list(db: Session, skip: int = 0, limit: int = 100) -> List[models.ProcessCat2]:
     """获取工序类别列表"""
     logger.debug(f"获取工序类别列表: skip={skip}, limit={limit}")
     return db.query(models.ProcessCat2).offset(skip).limit(limit).all()
 
-def create_process_cat2(db: Session, process_cat2: schemas.ProcessCat2Create) -> models.ProcessCat2:
-    """创建工序类别"""
-    logger.debug(f"创建工序类别: cat2_code={process_cat2.cat2_code}, name={process_cat2.name}")
-    db_process_cat2 = models.ProcessCat2(**process_cat2.model_dump())
-    logger.debug(f"创建工序类别对象: {db_process_cat2}")
-    db.add(db_process_cat2)
-    db.commit()
-    db.refresh(db_process_cat2)
+def create_process_cat2(db: Session, process_cat2: schemas.ProcessCat2Create) -> dict:
+    """创建工序类别（编码重复时抛出IntegrityError）"""
+    logger.debug(f"创建工序类别: cat2_code={process_cat2.cat2_code}")
+    db_process_cat2 = insert_returning(db, models.ProcessCat2, process_cat2.model_dump())
     logger.info(f"工序类别创建成功: cat2_code={process_cat2.cat2_code}")
     return db_process_cat2
 
-def update_process_cat2(db: Session, cat2_code: str, process_cat2_update: schemas.ProcessCat2Update) -> Optional[models.ProcessCat2]:
+def update_process_cat2(db: Session, cat2_code: str, process_cat2_update: schemas.ProcessCat2Update) -> Optional[dict]:
     """更新工序类别"""
-    logger.debug(f"更新工序类别: cat2_code={cat2_code}, update_data={process_cat2_update.model_dump(exclude_unset=True)}")
-    db_process_cat2 = get_process_cat2_by_code(db, cat2_code)
+    update_data = process_cat2_update.model_dump(exclude_unset=True)
+    logger.debug(f"更新工序类别: cat2_code={cat2_code}, update_data={update_data}")
+    db_process_cat2 = update_returning(db, models.ProcessCat2, models.ProcessCat2.cat2_code, cat2_code, update_data)
     if not db_process_cat2:
         logger.warning(f"工序类别不存在: cat2_code={cat2_code}")
         return None
-    
-    update_data = process_cat2_update.model_dump(exclude_unset=True)
-    logger.debug(f"更新字段: {update_data}")
-    for field, value in update_data.items():
-        setattr(db_process_cat2, field, value)
-    
-    db.commit()
-    db.refresh(db_process_cat2)
     logger.info(f"工序类别更新成功: cat2_code={cat2_code}")
     return db_process_cat2
 
@@ -603,8 +565,8 @@ def delete_process_cat2(db: Session, cat2_code: str) -> Optional[dict]:
         "name": db_process_cat2.name
     }
     
-    logger.debug(f"删除工序类别对象: {db_process_cat2}")
-    db.delete(db_process_cat2)
+    # 关联的定额由 ondelete=CASCADE 外键级联删除
+    db.execute(delete(models.ProcessCat2).where(models.ProcessCat2.cat2_code == cat2_code).execution_options(synchronize_session=False))
     db.commit()
     logger.info(f"工序类别删除成功: cat2_code={cat2_code}")
     return process_cat2_info
@@ -612,47 +574,69 @@ def delete_process_cat2(db: Session, cat2_code: str) -> Optional[dict]:
 
 # 电机型号相关CRUD
 
-def get_motor_model_by_name(db: Session, name: str) -> Optional[models.MotorModel]:
-    """根据电机型号名称获取电机型号"""
+def get_motor_model_by_name(db: Session, name: str):
+    """根据电机型号名称获取电机型号（从基础数据缓存读取）"""
     logger.debug(f"根据电机型号名称获取电机型号: name={name}")
-    return db.query(models.MotorModel).filter(models.MotorModel.name == name).first()
+    return reference_cache.get(db).motor_models.get(name)
 
-def get_motor_model_by_alias(db: Session, alias: str) -> Optional[models.MotorModel]:
-    """根据电机型号别名获取电机型号"""
+def get_motor_model_by_alias(db: Session, alias: str):
+    """根据电机型号名称或别名获取电机型号（规范化后精确匹配，从内存索引读取）"""
     logger.debug(f"根据电机型号别名获取电机型号: alias={alias}")
-    return db.query(models.MotorModel).filter(models.MotorModel.aliases.contains(alias)).first()
+    reference = reference_cache.get(db)
+    model_name = get_model_name_index(reference).exact.get(normalize_model_name(alias))
+    return reference.motor_models.get(model_name) if model_name else None
+
+def resolve_motor_model_names(db: Session, names: List[str]) -> List[dict]:
+    """批量将原始型号文本解析为标准型号名称（相同文本只解析一次）"""
+    logger.debug(f"批量解析电机型号: count={len(names)}")
+    index = get_model_name_index(reference_cache.get(db))
+    resolved = {}
+    return [resolved.setdefault(name, index.resolve(name)) for name in names]
 
 def get_motor_model_list(db: Session, skip: int = 0, limit: int = 100) -> List[models.MotorModel]:
     """获取电机型号列表"""
     logger.debug(f"获取电机型号列表: skip={skip}, limit={limit}")
     return db.query(models.MotorModel).offset(skip).limit(limit).all()
 
-def create_motor_model(db: Session, motor_model: schemas.MotorModelSchemaCreate) -> models.MotorModel:
-    """创建电机型号"""
-    logger.debug(f"创建电机型号: name={motor_model.name}, aliases={motor_model.aliases}")
-    db_motor_model = models.MotorModel(**motor_model.model_dump())
-    logger.debug(f"创建电机型号对象: {db_motor_model}")
-    db.add(db_motor_model)
-    db.commit()
-    db.refresh(db_motor_model)
+def replace_motor_model_aliases(db: Session, name: str, aliases: Optional[str]) -> None:
+    """用aliases字符串重建电机型号的别名记录（不提交，由调用方与型号写入在同一事务中提交）"""
+    db.execute(delete(models.MotorModelAlias).where(models.MotorModelAlias.model_name == name))
+    rows = [
+        {"normalized_alias": normalized, "alias": alias, "model_name": name}
+        for normalized, alias in split_aliases(aliases)
+    ]
+    if rows:
+        db.execute(insert(models.MotorModelAlias), rows)
+    logger.debug(f"同步电机型号别名: name={name}, aliases={[row['alias'] for row in rows]}")
+
+def create_motor_model(db: Session, motor_model: schemas.MotorModelSchemaCreate) -> dict:
+    """创建电机型号并写入别名记录（名称或别名重复时抛出IntegrityError）"""
+    logger.debug(f"创建电机型号: name={motor_model.name}")
+    try:
+        db_motor_model = insert_returning(db, models.MotorModel, motor_model.model_dump(), commit=False)
+        replace_motor_model_aliases(db, motor_model.name, motor_model.aliases)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise
     logger.info(f"电机型号创建成功: name={motor_model.name}")
     return db_motor_model
 
-def update_motor_model(db: Session, name: str, motor_model_update: schemas.MotorModelSchemaUpdate) -> Optional[models.MotorModel]:
-    """更新电机型号"""
-    logger.debug(f"更新电机型号: name={name}, update_data={motor_model_update.model_dump(exclude_unset=True)}")
-    db_motor_model = get_motor_model_by_name(db, name)
+def update_motor_model(db: Session, name: str, motor_model_update: schemas.MotorModelSchemaUpdate) -> Optional[dict]:
+    """更新电机型号，更新了别名时同步别名记录（别名与其他型号重复时抛出IntegrityError）"""
+    update_data = motor_model_update.model_dump(exclude_unset=True)
+    logger.debug(f"更新电机型号: name={name}, update_data={update_data}")
+    try:
+        db_motor_model = update_returning(db, models.MotorModel, models.MotorModel.name, name, update_data, commit=False)
+        if db_motor_model and "aliases" in update_data:
+            replace_motor_model_aliases(db, name, update_data["aliases"])
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise
     if not db_motor_model:
         logger.warning(f"电机型号不存在: name={name}")
         return None
-    
-    update_data = motor_model_update.model_dump(exclude_unset=True)
-    logger.debug(f"更新字段: {update_data}")
-    for field, value in update_data.items():
-        setattr(db_motor_model, field, value)
-    
-    db.commit()
-    db.refresh(db_motor_model)
     logger.info(f"电机型号更新成功: name={name}")
     return db_motor_model
 
@@ -670,8 +654,8 @@ def delete_motor_model(db: Session, name: str) -> Optional[dict]:
         "aliases": db_motor_model.aliases
     }
     
-    logger.debug(f"删除电机型号对象: {db_motor_model}")
-    db.delete(db_motor_model)
+    # 关联的定额由 ondelete=CASCADE 外键级联删除
+    db.execute(delete(models.MotorModel).where(models.MotorModel.name == name).execution_options(synchronize_session=False))
     db.commit()
     logger.info(f"电机型号删除成功: name={name}")
     return motor_model_info
@@ -0,0 +1,48 @@
+"""
+当前生效定额的零点刷新
+
+定额增删改时由数据库触发器维护current_quotas；预先录入的未来定额没有写入动作，需要在生效日零点全量重建一次。
+每个服务进程各自调度，重建在单个事务中完成且结果相同，多进程重复执行没有影响。
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.engine import Engine
+
+from .db_schema import refresh_current_quotas
+
+logger = logging.getLogger(__name__)
+
+# 零点后延迟几秒再刷新，避免时钟误差导致仍按前一天计算
+MIDNIGHT_DELAY_SECONDS = 5
+
+_timer: Optional[threading.Timer] = None
+_timer_lock = threading.Lock()
+
+def seconds_until_midnight(now: datetime = None) -> float:
+    """距下一个零点（加延迟）的秒数"""
+    now = now or datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - now).total_seconds() + MIDNIGHT_DELAY_SECONDS
+
+def _refresh_and_reschedule(engine: Engine) -> None:
+    try:
+        rows = refresh_current_quotas(engine)
+        logger.info(f"零点刷新当前生效定额完成: rows={rows}")
+    except Exception as e:
+        logger.error(f"零点刷新当前生效定额失败: {str(e)}", exc_info=True)
+    schedule_midnight_refresh(engine)
+
+def schedule_midnight_refresh(engine: Engine) -> None:
+    """调度下一次零点刷新（守护线程定时器，进程退出时不阻塞）"""
+    global _timer
+    with _timer_lock:
+        if _timer is not None:
+            _timer.cancel()
+        delay = seconds_until_midnight()
+        _timer = threading.Timer(delay, _refresh_and_reschedule, args=(engine,))
+        _timer.daemon = True
+        _timer.start()
+    logger.debug(f"已调度当前生效定额零点刷新: {delay:.0f}秒后")
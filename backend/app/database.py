@@ -2,6 +2,7 @@ import logging
 from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from dotenv import load_dotenv
 import os
 
@@ -28,20 +29,49 @@ if "${PROJECT_ROOT}" in DATABASE_URL:
     
 logger.debug(f"数据库URL: {DATABASE_URL}")
 
+# 是否为SQLite数据库（否则按PostgreSQL等服务端数据库处理）
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# 连接池配置（仅对PostgreSQL等服务端数据库生效）
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+def engine_options(url: str) -> dict:
+    """根据数据库方言返回创建引擎的参数"""
+    if url.startswith("sqlite"):
+        # SQLite连接需要跨线程使用（FastAPI线程池）
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+    }
+
 # 创建数据库引擎
 logger.debug("创建数据库引擎...")
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 logger.debug(f"数据库引擎创建完成: {engine}")
 
+# SQLite日志模式：WAL模式下读连接不会阻塞写入
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+
+def is_file_sqlite(url: str) -> bool:
+    """是否为基于文件的SQLite数据库（内存数据库无法被其他连接共享）"""
+    return url.startswith("sqlite") and ":memory:" not in url and not url.rstrip("/").endswith(":")
+
 # 为SQLite启用外键约束
-if DATABASE_URL.startswith("sqlite"):
+if IS_SQLITE:
     @event.listens_for(engine, "connect")
     def set_sqlite_pragma(dbapi_connection, connection_record):
         logger.debug("启用SQLite外键约束")
         cursor = dbapi_connection.cursor()
         cursor.execute("PRAGMA foreign_keys=ON")
+        if is_file_sqlite(DATABASE_URL) and SQLITE_JOURNAL_MODE:
+            cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
         cursor.close()
 
 # 创建会话本地类
@@ -49,6 +79,116 @@ logger.debug("创建会话本地类...")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 logger.debug("会话本地类创建完成")
 
+def to_async_url(url: str) -> str:
+    """将同步数据库URL转换为异步驱动URL（SQLite使用aiosqlite，PostgreSQL使用asyncpg）"""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql+psycopg2:", "postgresql+psycopg:", "postgresql:", "postgres:"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg:" + url[len(prefix):]
+    return url
+
+# 获取异步数据库URL - 未设置时由DATABASE_URL推导
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+if "${PROJECT_ROOT}" in ASYNC_DATABASE_URL:
+    ASYNC_DATABASE_URL = ASYNC_DATABASE_URL.replace("${PROJECT_ROOT}", PROJECT_ROOT)
+logger.debug(f"异步数据库URL: {ASYNC_DATABASE_URL}")
+
+# 创建异步数据库引擎
+logger.debug("创建异步数据库引擎...")
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **({} if ASYNC_DATABASE_URL.startswith("sqlite") else engine_options(ASYNC_DATABASE_URL))
+)
+logger.debug(f"异步数据库引擎创建完成: {async_engine}")
+
+# 异步引擎同样需要为SQLite启用外键约束（监听底层同步引擎）
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def set_async_sqlite_pragma(dbapi_connection, connection_record):
+        logger.debug("启用SQLite外键约束（异步引擎）")
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+# 创建异步会话类
+# expire_on_commit=False：提交后对象属性仍可访问，避免在异步上下文中触发隐式加载
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+logger.debug("异步会话类创建完成")
+
+# 读库配置：报表、统计和工资记录查询使用只读连接，避免与写入争用连接和锁
+# PostgreSQL模式下可通过DATABASE_REPLICA_URL指定只读副本，未设置时连接主库并将会话设为只读
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+# 读连接的页缓存大小（KB），报表查询扫描的数据较多，使用比写连接更大的缓存
+READ_CACHE_SIZE_KB = int(os.getenv("READ_CACHE_SIZE_KB", "65536"))
+
+def to_read_only_url(url: str) -> str:
+    """
+    生成只读连接URL
+    
+    文件型SQLite数据库以URI方式打开并附加mode=ro；其他数据库优先使用DATABASE_REPLICA_URL。
+    """
+    if url.startswith("sqlite"):
+        if not is_file_sqlite(url) or "mode=ro" in url:
+            return url
+        prefix, path = url.split(":///", 1)
+        if not path.startswith("file:"):
+            path = "file:" + path
+        separator = "&" if "?" in path else "?"
+        return f"{prefix}:///{path}{separator}mode=ro&uri=true"
+    if DATABASE_REPLICA_URL:
+        replica_url = DATABASE_REPLICA_URL.replace("${PROJECT_ROOT}", PROJECT_ROOT)
+        return to_async_url(replica_url) if url.startswith("postgresql+asyncpg") else replica_url
+    return url
+
+def configure_read_only(target_engine) -> None:
+    """为SQLite读库引擎注册连接事件：设置query_only和更大的页缓存"""
+    sync_engine = getattr(target_engine, "sync_engine", target_engine)
+
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_read_pragma(dbapi_connection, connection_record):
+        logger.debug("设置SQLite只读连接参数")
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA query_only=ON")
+        cursor.execute(f"PRAGMA cache_size=-{READ_CACHE_SIZE_KB}")
+        cursor.close()
+
+def read_only_engine_options(url: str) -> dict:
+    """返回读库引擎参数：PostgreSQL通过连接参数将默认事务设为只读"""
+    if url.startswith("sqlite"):
+        return engine_options(url) if not url.startswith("sqlite+aiosqlite") else {}
+    options = engine_options(url)
+    if url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = {"server_settings": {"default_transaction_read_only": "on"}}
+    else:
+        options["connect_args"] = {"options": "-c default_transaction_read_only=on"}
+    return options
+
+def create_read_engines():
+    """创建读库的同步和异步引擎；内存SQLite无法共享，直接复用写库引擎"""
+    if IS_SQLITE and not is_file_sqlite(DATABASE_URL):
+        return engine, async_engine
+
+    read_url = to_read_only_url(DATABASE_URL)
+    async_read_url = to_read_only_url(ASYNC_DATABASE_URL)
+    sync_read_engine = create_engine(read_url, **read_only_engine_options(read_url))
+    async_read_engine = create_async_engine(async_read_url, **read_only_engine_options(async_read_url))
+    if IS_SQLITE:
+        configure_read_only(sync_read_engine)
+        configure_read_only(async_read_engine)
+    return sync_read_engine, async_read_engine
+
+# 创建读库引擎和会话类
+logger.debug("创建读库引擎...")
+read_engine, async_read_engine = create_read_engines()
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+logger.debug(f"读库引擎创建完成: {read_engine}")
+
 # 创建基础类
 Base = declarative_base()
 logger.debug("基础类创建完成")
@@ -68,3 +208,34 @@ def get_db():
     finally:
         logger.debug("关闭数据库会话")
         db.close()
+
+# 依赖项：获取异步数据库会话
+async def get_async_db():
+    """获取异步数据库会话"""
+    logger.debug("获取异步数据库会话...")
+    async with AsyncSessionLocal() as db:
+        try:
+            logger.debug("异步数据库会话已创建，准备yield")
+            yield db
+            logger.debug("异步数据库会话使用完成")
+        except Exception as e:
+            logger.error(f"异步数据库会话发生错误: {e}", exc_info=True)
+            await db.rollback()
+            raise
+
+# 依赖项：获取只读数据库会话（报表、统计等只读路由使用）
+def get_read_db():
+    """获取只读数据库会话"""
+    logger.debug("获取只读数据库会话...")
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# 依赖项：获取异步只读数据库会话
+async def get_async_read_db():
+    """获取异步只读数据库会话"""
+    logger.debug("获取异步只读数据库会话...")
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,651 @@
+"""
+数据库结构初始化
+
+负责创建表、视图、变更版本/行数计数/月度汇总/当前生效定额的触发器以及全文检索表，DDL同时支持SQLite和PostgreSQL（全文检索表仅SQLite）。
+"""
+import logging
+import time
+from datetime import date
+from sqlalchemy import Integer, inspect, literal, select, text, update
+from sqlalchemy.engine import Engine
+
+from .database import Base
+from . import models  # noqa: F401  确保所有模型已注册到元数据
+from .utils.model_aliases import split_aliases
+from .utils.money import CENTS, HUNDREDTHS
+
+logger = logging.getLogger(__name__)
+
+# 工资记录视图：字符串拼接使用标准SQL的 || 运算符，SQLite与PostgreSQL通用
+SALARY_RECORDS_VIEW_SELECT = """
+SELECT 
+    wr.id,
+    wr.worker_code,
+    wr.quota_id,
+    -- 数量（×100）、单价和金额（分）均为整数，由接口层转换为小数；单价和金额取录入时保存的值，定额调价不影响历史工资
+    wr.quantity_hundredths,
+    wr.unit_price_cents,
+    wr.amount_cents,
+    wr.record_date,
+    wr.created_by,
+    wr.created_at,
+    -- 电机型号: 型号名称 (别名)
+    mm.name || ' (' || COALESCE(mm.aliases, '') || ')' AS model_display,
+    -- 工段类别: 编码 (名称)
+    pc1.cat1_code || ' (' || pc1.name || ')' AS cat1_display,
+    -- 工序类别: 编码 (名称)
+    pc2.cat2_code || ' (' || pc2.name || ')' AS cat2_display,
+    -- 工序名称: 编码 (名称)
+    p.process_code || ' (' || p.name || ')' AS process_display
+FROM work_records wr
+JOIN quotas q ON wr.quota_id = q.id
+JOIN processes p ON q.process_code = p.process_code
+JOIN process_cat1 pc1 ON q.cat1_code = pc1.cat1_code
+JOIN process_cat2 pc2 ON q.cat2_code = pc2.cat2_code
+JOIN motor_models mm ON q.model_name = mm.name
+"""
+
+# 视图名称 -> 视图查询
+VIEWS = {
+    "v_salary_records": SALARY_RECORDS_VIEW_SELECT,
+}
+
+# 需要记录变更版本的基础数据表（变更频率低，列表接口据此返回ETag）
+VERSIONED_TABLES = ("workers", "processes", "process_cat1", "process_cat2", "motor_models", "motor_model_aliases")
+# 同样记录变更版本、但不进入基础数据缓存的表（由各自的内存索引和汇总分析缓存按版本号失效）
+INDEXED_TABLES = ("quotas", "work_records")
+
+# PostgreSQL触发器函数：按语句递增被修改表的版本号
+POSTGRESQL_VERSION_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+def version_trigger_sql(dialect_name: str, table_name: str) -> list:
+    """生成指定方言的版本号触发器语句（任何连接上的增删改都会递增版本，多进程部署同样有效）"""
+    if dialect_name == "postgresql":
+        trigger = f"trg_{table_name}_version"
+        return [
+            f"DROP TRIGGER IF EXISTS {trigger} ON {table_name}",
+            f"CREATE TRIGGER {trigger} AFTER INSERT OR UPDATE OR DELETE ON {table_name} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()",
+        ]
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table_name}_version_{event.lower()} AFTER {event} ON {table_name} "
+        f"BEGIN UPDATE table_versions SET version = version + 1 WHERE table_name = '{table_name}'; END"
+        for event in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+def create_version_triggers(engine: Engine) -> None:
+    """
+    初始化版本记录并创建版本号触发器（已存在时跳过）
+    
+    初始版本号取当前时间戳，数据库重建后的版本号不会与进程内缓存或客户端ETag中的旧版本号重复。
+    """
+    dialect_name = engine.dialect.name
+    initial_version = int(time.time())
+    version_table = models.TableVersion.__table__
+    with engine.begin() as conn:
+        existing = set(conn.execute(select(version_table.c.table_name)).scalars())
+        for table_name in VERSIONED_TABLES + INDEXED_TABLES:
+            if table_name not in existing:
+                conn.execute(version_table.insert().values(table_name=table_name, version=initial_version))
+        if dialect_name == "postgresql":
+            conn.execute(text(POSTGRESQL_VERSION_FUNCTION))
+        for table_name in VERSIONED_TABLES + INDEXED_TABLES:
+            for statement in version_trigger_sql(dialect_name, table_name):
+                conn.execute(text(statement))
+    logger.debug("版本号触发器创建完成")
+
+# 由触发器维护行数计数器的表（列表接口返回总数和首页统计时读取计数器，不对全表COUNT）
+COUNTED_TABLES = ("users", "workers", "process_cat1", "process_cat2", "motor_models", "processes", "quotas", "work_records")
+
+# PostgreSQL触发器函数：按语句使用转换表（transition table）批量调整行数
+POSTGRESQL_ROW_COUNT_FUNCTION = """
+CREATE OR REPLACE FUNCTION adjust_row_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE table_row_counts SET row_count = row_count + (SELECT count(*) FROM changed_rows) WHERE table_name = TG_TABLE_NAME;
+    ELSE
+        UPDATE table_row_counts SET row_count = row_count - (SELECT count(*) FROM changed_rows) WHERE table_name = TG_TABLE_NAME;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+def row_count_trigger_sql(dialect_name: str, table_name: str) -> list:
+    """生成指定方言的行数计数器触发器语句（级联删除同样触发）"""
+    if dialect_name == "postgresql":
+        statements = []
+        for event, transition in (("INSERT", "NEW"), ("DELETE", "OLD")):
+            trigger = f"trg_{table_name}_row_count_{event.lower()}"
+            statements += [
+                f"DROP TRIGGER IF EXISTS {trigger} ON {table_name}",
+                f"CREATE TRIGGER {trigger} AFTER {event} ON {table_name} REFERENCING {transition} TABLE AS changed_rows "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION adjust_row_count()",
+            ]
+        return statements
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table_name}_row_count_{event.lower()} AFTER {event} ON {table_name} "
+        f"BEGIN UPDATE table_row_counts SET row_count = row_count {sign} 1 WHERE table_name = '{table_name}'; END"
+        for event, sign in (("INSERT", "+"), ("DELETE", "-"))
+    ]
+
+def create_row_count_triggers(engine: Engine) -> None:
+    """初始化行数计数器（按当前行数）并创建计数触发器（已存在时跳过）"""
+    dialect_name = engine.dialect.name
+    count_table = models.TableRowCount.__table__
+    with engine.begin() as conn:
+        existing = set(conn.execute(select(count_table.c.table_name)).scalars())
+        for table_name in COUNTED_TABLES:
+            if table_name not in existing:
+                row_count = conn.execute(text(f"SELECT count(*) FROM {table_name}")).scalar()
+                conn.execute(count_table.insert().values(table_name=table_name, row_count=row_count))
+        if dialect_name == "postgresql":
+            conn.execute(text(POSTGRESQL_ROW_COUNT_FUNCTION))
+        for table_name in COUNTED_TABLES:
+            for statement in row_count_trigger_sql(dialect_name, table_name):
+                conn.execute(text(statement))
+    logger.debug("行数计数器触发器创建完成")
+
+# 工作记录按月汇总：按月份分组的记录数、数量和金额（金额为空的旧记录按0计）
+MONTH_TOTAL_COLUMNS = "month, record_count, quantity_hundredths, amount_cents"
+MONTH_TOTAL_TRIGGERS = ("insert", "delete", "update")
+
+def _month_total_upsert(month: str, record_count: str, quantity: str, amount: str, source: str = "") -> str:
+    """累加到月度汇总的语句（月份不存在时插入）"""
+    values = f"SELECT {month}, {record_count}, {quantity}, {amount} {source}" if source else f"VALUES ({month}, {record_count}, {quantity}, {amount})"
+    return (
+        f"INSERT INTO work_record_month_totals ({MONTH_TOTAL_COLUMNS}) {values} "
+        "ON CONFLICT (month) DO UPDATE SET "
+        "record_count = work_record_month_totals.record_count + excluded.record_count, "
+        "quantity_hundredths = work_record_month_totals.quantity_hundredths + excluded.quantity_hundredths, "
+        "amount_cents = work_record_month_totals.amount_cents + excluded.amount_cents"
+    )
+
+# PostgreSQL触发器函数：按语句使用转换表按月分组后批量调整（修改记录时先减去旧值再加上新值）
+POSTGRESQL_MONTH_TOTAL_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION adjust_work_record_month_totals() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE work_record_month_totals t
+        SET record_count = t.record_count - d.record_count,
+            quantity_hundredths = t.quantity_hundredths - d.quantity_hundredths,
+            amount_cents = t.amount_cents - d.amount_cents
+        FROM (
+            SELECT to_char(record_date, 'YYYY-MM') AS month, count(*) AS record_count,
+                   sum(quantity_hundredths) AS quantity_hundredths, COALESCE(sum(amount_cents), 0) AS amount_cents
+            FROM old_rows GROUP BY 1
+        ) d
+        WHERE t.month = d.month;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        {_month_total_upsert("to_char(record_date, 'YYYY-MM')", "count(*)", "sum(quantity_hundredths)", "COALESCE(sum(amount_cents), 0)", "FROM new_rows GROUP BY 1")};
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+def month_total_trigger_sql(dialect_name: str) -> list:
+    """生成指定方言的工作记录月度汇总触发器语句（级联删除同样触发）"""
+    if dialect_name == "postgresql":
+        transitions = {
+            "insert": "NEW TABLE AS new_rows",
+            "delete": "OLD TABLE AS old_rows",
+            "update": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+        }
+        statements = []
+        for event in MONTH_TOTAL_TRIGGERS:
+            trigger = f"trg_work_records_month_total_{event}"
+            statements += [
+                f"DROP TRIGGER IF EXISTS {trigger} ON work_records",
+                f"CREATE TRIGGER {trigger} AFTER {event.upper()} ON work_records REFERENCING {transitions[event]} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION adjust_work_record_month_totals()",
+            ]
+        return statements
+    add_new = _month_total_upsert("substr(NEW.record_date, 1, 7)", "1", "NEW.quantity_hundredths", "COALESCE(NEW.amount_cents, 0)")
+    subtract_old = (
+        "UPDATE work_record_month_totals SET record_count = record_count - 1, "
+        "quantity_hundredths = quantity_hundredths - OLD.quantity_hundredths, "
+        "amount_cents = amount_cents - COALESCE(OLD.amount_cents, 0) "
+        "WHERE month = substr(OLD.record_date, 1, 7)"
+    )
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_work_records_month_total_insert AFTER INSERT ON work_records "
+        f"BEGIN {add_new}; END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_work_records_month_total_delete AFTER DELETE ON work_records "
+        f"BEGIN {subtract_old}; END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_work_records_month_total_update "
+        f"AFTER UPDATE OF record_date, quantity_hundredths, amount_cents ON work_records "
+        f"BEGIN {subtract_old}; {add_new}; END",
+    ]
+
+def _trigger_exists(conn, dialect_name: str, name: str) -> bool:
+    if dialect_name == "postgresql":
+        sql = "SELECT 1 FROM pg_trigger WHERE tgname = :name"
+    else:
+        sql = "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = :name"
+    return conn.execute(text(sql), {"name": name}).first() is not None
+
+def create_month_total_triggers(engine: Engine) -> None:
+    """首次创建时按现有工作记录重建月度汇总，并创建汇总触发器"""
+    dialect_name = engine.dialect.name
+    with engine.begin() as conn:
+        if not _trigger_exists(conn, dialect_name, "trg_work_records_month_total_insert"):
+            month = "to_char(record_date, 'YYYY-MM')" if dialect_name == "postgresql" else "substr(record_date, 1, 7)"
+            conn.execute(text("DELETE FROM work_record_month_totals"))
+            conn.execute(text(
+                f"INSERT INTO work_record_month_totals ({MONTH_TOTAL_COLUMNS}) "
+                f"SELECT {month}, count(*), sum(quantity_hundredths), COALESCE(sum(amount_cents), 0) "
+                f"FROM work_records GROUP BY 1"
+            ))
+        if dialect_name == "postgresql":
+            conn.execute(text(POSTGRESQL_MONTH_TOTAL_FUNCTION))
+        for statement in month_total_trigger_sql(dialect_name):
+            conn.execute(text(statement))
+    logger.debug("月度汇总触发器创建完成")
+
+# 工作记录修改标记：修改汇总相关列时记下当时工作记录表的版本号，分析镜像据此重新复制被修改的记录
+# （同月内改日期等不影响月度汇总的修改也能发现）
+CHANGE_VERSION_TRIGGER = "trg_work_records_change_version"
+CHANGE_VERSION_COLUMNS = "worker_code, quota_id, quantity_hundredths, amount_cents, record_date"
+CURRENT_WORK_RECORD_VERSION = "(SELECT version FROM table_versions WHERE table_name = 'work_records')"
+
+# PostgreSQL触发器函数：更新前在新行上写入版本号
+POSTGRESQL_CHANGE_VERSION_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION mark_work_record_change() RETURNS trigger AS $$
+BEGIN
+    NEW.change_version := {CURRENT_WORK_RECORD_VERSION};
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+def change_version_trigger_sql(dialect_name: str) -> list:
+    """生成指定方言的工作记录修改标记触发器语句"""
+    if dialect_name == "postgresql":
+        return [
+            f"DROP TRIGGER IF EXISTS {CHANGE_VERSION_TRIGGER} ON work_records",
+            f"CREATE TRIGGER {CHANGE_VERSION_TRIGGER} BEFORE UPDATE OF {CHANGE_VERSION_COLUMNS} ON work_records "
+            f"FOR EACH ROW EXECUTE FUNCTION mark_work_record_change()",
+        ]
+    # SQLite不能在触发器中修改NEW，改为更新后回写该行（只写change_version，不会再次触发本触发器）
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {CHANGE_VERSION_TRIGGER} AFTER UPDATE OF {CHANGE_VERSION_COLUMNS} ON work_records "
+        f"BEGIN UPDATE work_records SET change_version = {CURRENT_WORK_RECORD_VERSION} WHERE id = NEW.id; END",
+    ]
+
+def create_change_version_triggers(engine: Engine) -> None:
+    """创建工作记录修改标记触发器（已存在时跳过）"""
+    dialect_name = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect_name == "postgresql":
+            conn.execute(text(POSTGRESQL_CHANGE_VERSION_FUNCTION))
+        for statement in change_version_trigger_sql(dialect_name):
+            conn.execute(text(statement))
+    logger.debug("工作记录修改标记触发器创建完成")
+
+# 当前生效定额：定额的业务键和写入current_quotas的列
+QUOTA_KEY_COLUMNS = ("process_code", "cat1_code", "cat2_code", "model_name")
+CURRENT_QUOTA_COLUMNS = QUOTA_KEY_COLUMNS + ("quota_id", "unit_price_cents", "effective_date")
+_CURRENT_QUOTA_SELECT = ", ".join(QUOTA_KEY_COLUMNS) + ", id, unit_price_cents, effective_date"
+
+def current_quota_refresh_sql(key_values: dict, today: str) -> str:
+    """
+    重新计算一个定额业务键的当前生效版本（先删除再插入今天及以前最新的版本）
+
+    Args:
+        key_values: 业务键列 -> SQL表达式（如 new.process_code 或函数参数）
+        today: 表示今天日期的SQL表达式
+    """
+    key = " AND ".join(f"{column} = {key_values[column]}" for column in QUOTA_KEY_COLUMNS)
+    return (
+        f"DELETE FROM current_quotas WHERE {key}; "
+        f"INSERT INTO current_quotas ({', '.join(CURRENT_QUOTA_COLUMNS)}) "
+        f"SELECT {_CURRENT_QUOTA_SELECT} FROM quotas WHERE {key} AND effective_date <= {today} "
+        f"ORDER BY effective_date DESC LIMIT 1;"
+    )
+
+# PostgreSQL触发器函数：按行重新计算新旧业务键的当前生效定额
+POSTGRESQL_CURRENT_QUOTA_FUNCTIONS = [
+    f"""
+CREATE OR REPLACE FUNCTION refresh_current_quota(p_process_code VARCHAR, p_cat1_code VARCHAR, p_cat2_code VARCHAR, p_model_name VARCHAR)
+RETURNS void AS $$
+BEGIN
+    {current_quota_refresh_sql({column: f"p_{column}" for column in QUOTA_KEY_COLUMNS}, "CURRENT_DATE")}
+END;
+$$ LANGUAGE plpgsql
+""",
+    """
+CREATE OR REPLACE FUNCTION quotas_refresh_current() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_current_quota(OLD.process_code, OLD.cat1_code, OLD.cat2_code, OLD.model_name);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM refresh_current_quota(NEW.process_code, NEW.cat1_code, NEW.cat2_code, NEW.model_name);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""",
+]
+
+def current_quota_trigger_sql(dialect_name: str) -> list:
+    """生成维护current_quotas的触发器语句（定额增删改时重新计算受影响的业务键）"""
+    if dialect_name == "postgresql":
+        return POSTGRESQL_CURRENT_QUOTA_FUNCTIONS + [
+            "DROP TRIGGER IF EXISTS trg_quotas_current ON quotas",
+            "CREATE TRIGGER trg_quotas_current AFTER INSERT OR UPDATE OR DELETE ON quotas "
+            "FOR EACH ROW EXECUTE FUNCTION quotas_refresh_current()",
+        ]
+    # SQLite的date('now', 'localtime')与应用中的date.today()同为服务器本地日期
+    today = "date('now', 'localtime')"
+    refresh = {ref: current_quota_refresh_sql({column: f"{ref}.{column}" for column in QUOTA_KEY_COLUMNS}, today) for ref in ("new", "old")}
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_quotas_current_insert AFTER INSERT ON quotas BEGIN {refresh['new']} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_quotas_current_update AFTER UPDATE ON quotas BEGIN {refresh['old']} {refresh['new']} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_quotas_current_delete AFTER DELETE ON quotas BEGIN {refresh['old']} END",
+    ]
+
+def refresh_current_quotas(engine: Engine, today: date = None) -> int:
+    """
+    全量重建current_quotas（启动时和每天零点执行，使预先录入的未来定额在生效日自动成为当前定额）
+
+    Returns:
+        int: 当前生效的定额数
+    """
+    today = today or date.today()
+    newer = "SELECT 1 FROM quotas n WHERE " + " AND ".join(f"n.{column} = q.{column}" for column in QUOTA_KEY_COLUMNS)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM current_quotas"))
+        result = conn.execute(
+            text(
+                f"INSERT INTO current_quotas ({', '.join(CURRENT_QUOTA_COLUMNS)}) "
+                f"SELECT {', '.join(f'q.{column}' for column in QUOTA_KEY_COLUMNS)}, q.id, q.unit_price_cents, q.effective_date "
+                f"FROM quotas q WHERE q.effective_date <= :today AND NOT EXISTS ("
+                f"{newer} AND n.effective_date > q.effective_date AND n.effective_date <= :today)"
+            ),
+            {"today": today},
+        )
+    logger.debug(f"当前生效定额已重建: today={today}, rows={result.rowcount}")
+    return result.rowcount
+
+def create_current_quota_triggers(engine: Engine) -> None:
+    """创建维护current_quotas的触发器并全量重建一次（覆盖停机期间跨过零点的情况）"""
+    with engine.begin() as conn:
+        for statement in current_quota_trigger_sql(engine.dialect.name):
+            conn.execute(text(statement))
+    refresh_current_quotas(engine)
+
+def amount_cents_value(unit_price_cents, quantity_hundredths):
+    """金额（分）的SQL表达式：整数乘法后按分四舍五入，与utils.money.amount_cents结果一致"""
+    return (unit_price_cents * quantity_hundredths + HUNDREDTHS // 2) // literal(HUNDREDTHS, Integer)
+
+def captured_price_values(quota_id, quantity_hundredths) -> dict:
+    """
+    工作记录录入时保存单价和金额的SQL表达式（单价取自定额，在同一条INSERT/UPDATE语句中计算）
+
+    Args:
+        quota_id: 定额ID（列或值）
+        quantity_hundredths: 数量×100（列或值）
+    """
+    quota_table = models.Quota.__table__
+    unit_price_cents = select(quota_table.c.unit_price_cents).where(quota_table.c.id == quota_id).scalar_subquery()
+    return {
+        "unit_price_cents": unit_price_cents,
+        "amount_cents": amount_cents_value(unit_price_cents, quantity_hundredths),
+    }
+
+def recorded_amount_value(quantity_hundredths):
+    """修改工作记录数量时的金额表达式：按录入时保存的单价重新计算，不读取定额"""
+    return amount_cents_value(models.WorkRecord.__table__.c.unit_price_cents, quantity_hundredths)
+
+def reprice_work_records_statement(*conditions):
+    """按定额的现行单价重新计算工作记录的单价和金额（只更新价格不同的记录）"""
+    record_table = models.WorkRecord.__table__
+    values = captured_price_values(record_table.c.quota_id, record_table.c.quantity_hundredths)
+    return update(record_table).where(
+        *conditions, record_table.c.unit_price_cents.is_distinct_from(values["unit_price_cents"])
+    ).values(**values)
+
+def add_missing_columns(engine: Engine) -> list:
+    """
+    为已存在的表补建模型中新增的列（仅支持可空列）
+
+    Returns:
+        list: 新增的 (表名, 列名)
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with engine.begin() as conn:
+        for table in table_objects():
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                if not column.nullable:
+                    logger.warning(f"无法自动补建非空列: {table.name}.{column.name}")
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                added.append((table.name, column.name))
+    if added:
+        logger.info(f"已补建数据表列: {added}")
+    return added
+
+# 升级到整数存储的列：表 -> [(旧的小数列, 新的整数列, 放大倍数)]
+SCALED_INTEGER_COLUMNS = {
+    "quotas": [("unit_price", "unit_price_cents", CENTS)],
+    "current_quotas": [("unit_price", "unit_price_cents", CENTS)],
+    "work_records": [("quantity", "quantity_hundredths", HUNDREDTHS)],
+}
+
+def migrate_scaled_integers(engine: Engine) -> list:
+    """
+    将旧版本以小数保存的单价和数量迁移为整数列（分、数量×100），在一个事务中完成
+
+    引用旧列的视图、当前定额、月度汇总和修改标记触发器先删除，随后由init_schema按新定义重建。
+
+    Returns:
+        list: 迁移的 (表名, 旧列名)
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    pending = [
+        (table_name, old, new, scale)
+        for table_name, columns in SCALED_INTEGER_COLUMNS.items() if table_name in existing_tables
+        for old, new, scale in columns
+        if old in {column["name"] for column in inspector.get_columns(table_name)}
+    ]
+    if not pending:
+        return []
+
+    drop_views(engine)
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("DROP TRIGGER IF EXISTS trg_quotas_current ON quotas"))
+            for event in MONTH_TOTAL_TRIGGERS:
+                conn.execute(text(f"DROP TRIGGER IF EXISTS trg_work_records_month_total_{event} ON work_records"))
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {CHANGE_VERSION_TRIGGER} ON work_records"))
+        else:
+            for event in ("insert", "update", "delete"):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS trg_quotas_current_{event}"))
+                conn.execute(text(f"DROP TRIGGER IF EXISTS trg_work_records_month_total_{event}"))
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {CHANGE_VERSION_TRIGGER}"))
+        for table_name, old, new, scale in pending:
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {new} INTEGER NOT NULL DEFAULT 0"))
+            conn.execute(text(f"UPDATE {table_name} SET {new} = CAST(ROUND({old} * {scale}) AS INTEGER)"))
+            conn.execute(text(f"ALTER TABLE {table_name} DROP COLUMN {old}"))
+            if engine.dialect.name == "postgresql":
+                conn.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {new} DROP DEFAULT"))
+    migrated = [(table_name, old) for table_name, old, _, _ in pending]
+    logger.info(f"已将小数列迁移为整数列: {migrated}")
+    return migrated
+
+def backfill_work_record_prices(engine: Engine) -> None:
+    """为升级前录入的工作记录按当前定额单价补写单价和金额"""
+    record_table = models.WorkRecord.__table__
+    with engine.begin() as conn:
+        result = conn.execute(reprice_work_records_statement(record_table.c.unit_price_cents.is_(None)))
+    logger.info(f"已补写{result.rowcount}条工作记录的单价和金额")
+
+def create_missing_indexes(engine: Engine) -> None:
+    """为已存在的表补建模型中新增的索引（create_all只在新建表时创建索引）"""
+    with engine.begin() as conn:
+        for table in table_objects():
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+def backfill_motor_model_aliases(engine: Engine) -> None:
+    """别名表为空时，由motor_models.aliases拆分生成别名记录（升级已有数据库）"""
+    alias_table = models.MotorModelAlias.__table__
+    model_table = models.MotorModel.__table__
+    with engine.begin() as conn:
+        if conn.execute(select(alias_table.c.normalized_alias).limit(1)).first():
+            return
+        rows = {}
+        for name, aliases in conn.execute(select(model_table.c.name, model_table.c.aliases)):
+            for normalized, alias in split_aliases(aliases):
+                if normalized in rows:
+                    logger.warning(f"别名重复，跳过: alias={alias}, model_name={name}")
+                    continue
+                rows[normalized] = {"normalized_alias": normalized, "alias": alias, "model_name": name}
+        if rows:
+            conn.execute(alias_table.insert(), list(rows.values()))
+            logger.info(f"已生成{len(rows)}条电机型号别名记录")
+
+# SQLite FTS5全文检索：源表 -> (搜索类型, 主键列, 参与检索的列)
+# 使用外部内容表（content=源表）避免重复存储，trigram分词支持中文任意3字及以上片段的子串匹配
+FTS_SOURCES = {
+    "processes": ("process", "process_code", ("process_code", "name", "description")),
+    "process_cat1": ("cat1", "cat1_code", ("cat1_code", "name", "description")),
+    "process_cat2": ("cat2", "cat2_code", ("cat2_code", "name", "description")),
+    "motor_models": ("motor_model", "name", ("name", "aliases", "description")),
+}
+
+def fts_table_name(table_name: str) -> str:
+    """源表对应的全文检索表名"""
+    return f"{table_name}_fts"
+
+def fts_ddl(table_name: str) -> list:
+    """生成全文检索虚拟表及同步触发器的建表语句（SQLite）"""
+    fts = fts_table_name(table_name)
+    columns = FTS_SOURCES[table_name][2]
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column_list}, "
+        f"content='{table_name}', content_rowid='rowid', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table_name}_fts_insert AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.rowid, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table_name}_fts_delete AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.rowid, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table_name}_fts_update AFTER UPDATE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.rowid, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.rowid, {new_values}); END",
+    ]
+
+def create_fts_tables(engine: Engine) -> None:
+    """创建全文检索表和同步触发器（仅SQLite）；新建的检索表由源表数据重建索引"""
+    if engine.dialect.name != "sqlite":
+        return
+    existing_tables = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        for table_name in FTS_SOURCES:
+            fts = fts_table_name(table_name)
+            for statement in fts_ddl(table_name):
+                conn.execute(text(statement))
+            if fts not in existing_tables:
+                logger.debug(f"重建全文检索索引: {fts}")
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+def drop_fts_tables(engine: Engine) -> None:
+    """删除全文检索表（仅SQLite）"""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        for table_name in FTS_SOURCES:
+            conn.execute(text(f"DROP TABLE IF EXISTS {fts_table_name(table_name)}"))
+
+def table_objects():
+    """返回需要建表的表对象（排除以模型声明的视图）"""
+    return [table for table in Base.metadata.sorted_tables if not table.info.get("is_view")]
+
+def create_view_sql(dialect_name: str, name: str, select_sql: str) -> str:
+    """生成指定方言的建视图语句"""
+    if dialect_name == "postgresql":
+        return f"CREATE OR REPLACE VIEW {name} AS {select_sql}"
+    return f"CREATE VIEW IF NOT EXISTS {name} AS {select_sql}"
+
+def create_views(engine: Engine) -> None:
+    """创建所有视图（已存在时跳过）"""
+    inspector = inspect(engine)
+    existing_views = set(inspector.get_view_names())
+    existing_tables = set(inspector.get_table_names())
+    dialect_name = engine.dialect.name
+
+    with engine.begin() as conn:
+        for name, select_sql in VIEWS.items():
+            if name in existing_tables:
+                # 旧版本的create_all会把视图模型建成空表，这里替换为真正的视图
+                logger.warning(f"{name} 以表的形式存在，删除后重建为视图")
+                conn.execute(text(f"DROP TABLE {name}"))
+            elif name in existing_views and dialect_name != "postgresql":
+                existing_sql = conn.execute(
+                    text("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = :name"), {"name": name}
+                ).scalar() or ""
+                if select_sql.strip() in existing_sql:
+                    logger.debug(f"视图已存在: {name}")
+                    continue
+                # 视图定义已变化（如升级后），删除后按新定义重建
+                logger.info(f"视图定义已变化，重建: {name}")
+                conn.execute(text(f"DROP VIEW {name}"))
+            logger.debug(f"创建视图: {name}")
+            conn.execute(text(create_view_sql(dialect_name, name, select_sql)))
+
+def drop_views(engine: Engine) -> None:
+    """删除所有视图（旧版本的create_all建成表的同名对象按表删除）"""
+    existing_tables = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        for name in VIEWS:
+            if name in existing_tables:
+                logger.warning(f"{name} 以表的形式存在，按表删除")
+                conn.execute(text(f"DROP TABLE {name}"))
+            else:
+                conn.execute(text(f"DROP VIEW IF EXISTS {name}"))
+
+def init_schema(engine: Engine) -> None:
+    """创建所有表和视图"""
+    logger.debug("开始创建数据库表...")
+    migrate_scaled_integers(engine)
+    added_columns = add_missing_columns(engine)
+    Base.metadata.create_all(bind=engine, tables=table_objects())
+    create_missing_indexes(engine)
+    if ("work_records", "unit_price_cents") in added_columns:
+        backfill_work_record_prices(engine)
+    create_views(engine)
+    backfill_motor_model_aliases(engine)
+    create_version_triggers(engine)
+    create_row_count_triggers(engine)
+    create_month_total_triggers(engine)
+    create_change_version_triggers(engine)
+    create_current_quota_triggers(engine)
+    create_fts_tables(engine)
+    logger.debug("数据库表、视图和触发器创建完成")
+
+def drop_schema(engine: Engine) -> None:
+    """删除所有视图、全文检索表和表"""
+    drop_views(engine)
+    drop_fts_tables(engine)
+    Base.metadata.drop_all(bind=engine, tables=table_objects())
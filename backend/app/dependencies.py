@@ -1,12 +1,11 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 import os
 
-from . import crud, schemas
-from .database import get_db
+from . import async_crud, schemas
+from .database import AsyncSessionLocal
 from .utils.auth import SECRET_KEY, ALGORITHM
 
 # 加载环境变量
@@ -15,7 +14,11 @@ load_dotenv()
 # 创建OAuth2密码Bearer
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-async def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+# 查询当前用户的会话工厂：查询后立即关闭会话，连接归还连接池，
+# 不在整个请求期间占用第二个连接（同步路由另有自己的同步会话）
+auth_session_factory = AsyncSessionLocal
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     """获取当前用户"""
     import logging
     logger = logging.getLogger(__name__)
@@ -40,7 +43,8 @@ async def get_current_user(db: Session = Depends(get_db), token: str = Depends(o
     
     logger.debug(f"Token payload: {payload}, username: {username}")
     
-    user = crud.get_user_by_username(db, username=token_data.username)
+    async with auth_session_factory() as db:
+        user = await async_crud.get_user_by_username(db, username=token_data.username)
     if user is None:
         logger.error(f"User not found: {token_data.username}")
         raise credentials_exception
@@ -61,6 +65,14 @@ async def get_admin_user(current_user: schemas.User = Depends(get_current_active
         )
     return current_user
 
+def check_owner_or_admin(owner_id, current_user: schemas.User) -> None:
+    """检查当前用户是资源的创建者或管理员（后台任务、导入错误表等按用户隔离的资源）"""
+    if owner_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
 async def get_report_user(current_user: schemas.User = Depends(get_current_active_user)):
     """获取报表用户、统计员或管理员用户"""
     import logging
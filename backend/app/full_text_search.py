@@ -0,0 +1,143 @@
+"""
+全文检索
+
+跨工序、工段类别、工序类别和电机型号的统一搜索。SQLite使用FTS5（trigram分词）检索编码、名称、别名和描述，
+按bm25排序并返回高亮片段；查询词少于3个字符（trigram无法匹配）或使用PostgreSQL时，退化为LIKE匹配，
+按“编码/名称完全匹配 > 名称前缀匹配 > 其他”排序。结果以 (得分, 类型, 编码) 为键做游标分页。
+"""
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db_schema import FTS_SOURCES, fts_table_name
+from .utils.pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# 搜索类型 -> 源表
+SEARCH_TYPES = {search_type: table_name for table_name, (search_type, _, _) in FTS_SOURCES.items()}
+
+# trigram分词要求的最短查询词长度
+MIN_FTS_TERM_LENGTH = 3
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+SNIPPET_TOKENS = 16
+
+def split_terms(query: str) -> List[str]:
+    """按空白拆分查询词"""
+    return [term for term in query.split() if term]
+
+def fts_match_expression(terms: List[str]) -> Optional[str]:
+    """生成FTS5 MATCH表达式（各词作为短语AND连接）；有词短于trigram最短长度时返回None"""
+    if not terms or any(len(term) < MIN_FTS_TERM_LENGTH for term in terms):
+        return None
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _fts_select(table_name: str) -> str:
+    search_type, key_column, _ = FTS_SOURCES[table_name]
+    fts = fts_table_name(table_name)
+    return (
+        f"SELECT '{search_type}' AS type, {key_column} AS code, name, "
+        f"snippet({fts}, -1, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', {SNIPPET_TOKENS}) AS snippet, "
+        f"bm25({fts}) AS score "
+        f"FROM {fts} WHERE {fts} MATCH :match"
+    )
+
+def _like_select(table_name: str, term_count: int) -> str:
+    search_type, key_column, columns = FTS_SOURCES[table_name]
+    term_conditions = " AND ".join(
+        "(" + " OR ".join(f"lower(COALESCE({column}, '')) LIKE :term{i} ESCAPE '\\'" for column in columns) + ")"
+        for i in range(term_count)
+    )
+    # 除编码外的检索列拼接为片段原文，由highlight标记匹配位置
+    snippet_source = " || ' ' || ".join(f"COALESCE({column}, '')" for column in columns[1:])
+    return (
+        f"SELECT '{search_type}' AS type, {key_column} AS code, name, {snippet_source} AS snippet, "
+        f"CASE WHEN lower({key_column}) = :exact OR lower(name) = :exact THEN 0 "
+        f"WHEN lower(name) LIKE :prefix ESCAPE '\\' THEN 1 ELSE 2 END AS score "
+        f"FROM {table_name} WHERE {term_conditions}"
+    )
+
+def highlight(text_value: str, terms: List[str], width: int = 40) -> str:
+    """在文本中标记第一个匹配的查询词，过长时截取匹配位置附近的片段"""
+    lowered = text_value.lower()
+    for term in terms:
+        position = lowered.find(term.lower())
+        if position < 0:
+            continue
+        start = max(position - width // 2, 0)
+        end = min(position + len(term) + width // 2, len(text_value))
+        return (
+            ("…" if start > 0 else "")
+            + text_value[start:position]
+            + HIGHLIGHT_START + text_value[position:position + len(term)] + HIGHLIGHT_END
+            + text_value[position + len(term):end]
+            + ("…" if end < len(text_value) else "")
+        )
+    return text_value[:width]
+
+async def search(
+    db: AsyncSession,
+    query: str,
+    types: Optional[List[str]] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Dict[str, object]:
+    """
+    统一搜索
+
+    Args:
+        db: 数据库会话
+        query: 查询文本，多个词以空白分隔（各词都需匹配）
+        types: 限定的搜索类型（process/cat1/cat2/motor_model），None表示全部
+        limit: 每页条数
+        cursor: 上一页返回的next_cursor
+
+    Returns:
+        Dict: items为结果列表（type/code/name/snippet/score），next_cursor为下一页游标（没有下一页时为None）
+    """
+    terms = split_terms(query)
+    tables = [SEARCH_TYPES[search_type] for search_type in (types or SEARCH_TYPES) if search_type in SEARCH_TYPES]
+    if not terms or not tables:
+        return {"items": [], "next_cursor": None}
+
+    params: Dict[str, object] = {"limit": limit + 1}
+    match = fts_match_expression(terms) if db.bind.dialect.name == "sqlite" else None
+    if match:
+        params["match"] = match
+        union = " UNION ALL ".join(_fts_select(table_name) for table_name in tables)
+    else:
+        lowered = query.strip().lower()
+        params.update({f"term{i}": f"%{_escape_like(term.lower())}%" for i, term in enumerate(terms)})
+        params.update({"exact": lowered, "prefix": f"{_escape_like(lowered)}%"})
+        union = " UNION ALL ".join(_like_select(table_name, len(terms)) for table_name in tables)
+
+    keyset = ""
+    if cursor:
+        score, search_type, code = decode_cursor(cursor, 3)
+        if not isinstance(score, (int, float)):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        params.update({"cursor_score": score, "cursor_type": str(search_type), "cursor_code": str(code)})
+        keyset = (
+            "WHERE score > :cursor_score OR (score = :cursor_score AND "
+            "(type > :cursor_type OR (type = :cursor_type AND code > :cursor_code)))"
+        )
+    sql = f"SELECT type, code, name, snippet, score FROM ({union}) AS results {keyset} ORDER BY score, type, code LIMIT :limit"
+    logger.debug(f"统一搜索: query={query}, fts={bool(match)}, types={types}, cursor={cursor}")
+    rows = (await db.execute(text(sql), params)).all()
+
+    items = []
+    for row in rows[:limit]:
+        snippet = row.snippet if match else highlight(row.snippet.strip() or row.code, terms)
+        items.append({"type": row.type, "code": row.code, "name": row.name, "snippet": snippet, "score": float(row.score)})
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["score"], last["type"], last["code"])
+    return {"items": items, "next_cursor": next_cursor}
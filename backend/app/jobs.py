@@ -0,0 +1,347 @@
+"""
+后台任务
+
+在进程内线程池中执行耗时操作（大批量级联删除、月末报表和导出），与处理请求的线程池分开，
+任务状态、进度和结果持久化到 jobs 表，供 /api/jobs/{job_id} 查询；服务重启后已结束的任务仍可查询。
+任务可以请求取消（任务函数在分批处理之间调用 job.check_cancelled()），结果文件保存在 JOB_ARTIFACT_DIR。
+"""
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import delete, select, update
+
+from . import models
+from .database import ReadSessionLocal, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# 后台任务线程数
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# 结果文件目录、已结束任务的保留时间（秒，默认7天）和进度写入数据库的最小间隔（秒）
+JOB_ARTIFACT_DIR = os.getenv("JOB_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "payroll_job_artifacts"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", "1"))
+
+ACTIVE_STATUSES = ("pending", "running")
+
+# 当前进程的标识（主机名:进程号），启动时据此识别上次运行中断的任务
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+class JobCancelled(Exception):
+    """任务已被取消"""
+
+@dataclass
+class Job:
+    """后台任务"""
+    id: str
+    kind: str
+    status: str = "pending"  # pending/running/succeeded/failed/cancelled
+    total: int = 0
+    processed: int = 0
+    message: str = ""
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    artifact_name: Optional[str] = None
+    artifact_media_type: Optional[str] = None
+    cancel_requested: bool = False
+    created_by: Optional[int] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # 进度变化时的回调（由JobManager设置，按间隔写入数据库）
+    on_progress: Optional[Callable[["Job"], None]] = field(default=None, repr=False, compare=False)
+
+    @property
+    def progress(self) -> float:
+        """任务进度（0-1）"""
+        if self.status == "succeeded":
+            return 1.0
+        if not self.total:
+            return 0.0
+        return min(self.processed / self.total, 1.0)
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in ACTIVE_STATUSES
+
+    @property
+    def artifact_path(self) -> str:
+        """结果文件路径（每个任务一个文件，以任务ID命名）"""
+        return os.path.join(JOB_ARTIFACT_DIR, self.id)
+
+    def update(self, processed: int, message: str = None) -> None:
+        """更新任务进度"""
+        self.processed = processed
+        if message is not None:
+            self.message = message
+        if self.on_progress:
+            self.on_progress(self)
+
+    def check_cancelled(self) -> None:
+        """
+        检查是否已请求取消（任务函数在分批处理之间调用）
+
+        Raises:
+            JobCancelled: 已请求取消
+        """
+        if self.cancel_requested:
+            raise JobCancelled()
+
+    def set_artifact(self, name: str, media_type: str) -> str:
+        """
+        声明任务的结果文件，返回应写入的路径
+
+        Args:
+            name: 下载时的文件名
+            media_type: 文件类型
+        """
+        os.makedirs(JOB_ARTIFACT_DIR, exist_ok=True)
+        self.artifact_name = name
+        self.artifact_media_type = media_type
+        return self.artifact_path
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为API响应"""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "progress": round(self.progress, 4),
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "artifact_url": f"/api/jobs/{self.id}/artifact" if self.status == "succeeded" and self.artifact_name else None,
+            "cancel_requested": self.cancel_requested,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        """jobs表的列值"""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "message": self.message[:255],
+            "result": self.result,
+            "error": self.error,
+            "artifact_name": self.artifact_name,
+            "artifact_media_type": self.artifact_media_type,
+            "cancel_requested": self.cancel_requested,
+            "created_by": self.created_by,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    @classmethod
+    def from_record(cls, record: models.JobRecord) -> "Job":
+        """由jobs表的行构造（其他进程或上次运行的任务，只用于查询）"""
+        return cls(**{column: getattr(record, column) for column in cls.__dataclass_fields__ if column != "on_progress"})
+
+class JobManager:
+    """进程内后台任务管理器（任务状态同时保存在内存和jobs表中）"""
+
+    def __init__(self, max_workers: int = JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._saved_at: Dict[str, float] = {}
+        # 持久化任务状态的会话工厂，以及报表类任务读取数据的只读会话工厂（测试中替换为测试数据库）
+        self.session_factory = SessionLocal
+        self.read_session_factory = ReadSessionLocal
+
+    def submit(
+        self, kind: str, fn: Callable[[Job], Optional[Dict[str, Any]]], total: int = 0, created_by: Optional[int] = None
+    ) -> Job:
+        """
+        提交后台任务
+
+        Args:
+            kind: 任务类型
+            fn: 任务函数，参数为Job对象（用于上报进度、检查取消和声明结果文件），返回值作为任务结果
+            total: 预计处理的总数
+            created_by: 提交任务的用户ID
+
+        Returns:
+            Job: 新建的任务
+        """
+        self.remove_expired()
+        job = Job(id=uuid.uuid4().hex, kind=kind, total=total, created_by=created_by, on_progress=self._progress)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._save(job, insert=True)
+        logger.info(f"提交后台任务: id={job.id}, kind={kind}, total={total}")
+        future = self._executor.submit(self._run, job, fn)
+        with self._lock:
+            self._futures[job.id] = future
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """根据ID获取任务（本进程内的任务取内存中的最新状态，否则读取jobs表）"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job:
+            return job
+        with self.session_factory() as db:
+            record = db.get(models.JobRecord, job_id)
+            return Job.from_record(record) if record else None
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        请求取消任务：等待中的任务直接取消，运行中的任务在下一次检查时停止
+
+        Returns:
+            任务（不存在时返回None）；已结束的任务原样返回
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            future = self._futures.get(job_id)
+        if job is None:
+            job = self.get(job_id)
+            if job and not job.finished:
+                # 其他进程中的任务：记录取消请求，由执行任务的进程在下一次写入进度时读取
+                with self.session_factory() as db:
+                    db.execute(update(models.JobRecord).where(models.JobRecord.id == job_id).values(cancel_requested=True))
+                    db.commit()
+                job.cancel_requested = True
+            return job
+        if job.finished:
+            return job
+        job.cancel_requested = True
+        if future is not None and future.cancel():
+            self._finish(job, "cancelled")
+        else:
+            self._save(job)
+        logger.info(f"请求取消后台任务: id={job.id}, kind={job.kind}, status={job.status}")
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], Optional[Dict[str, Any]]]) -> None:
+        """执行任务并记录结果"""
+        job.status = "running"
+        job.started_at = datetime.now()
+        self._save(job)
+        try:
+            job.check_cancelled()
+            # 任务函数返回即视为完成（取消只在开始前和任务函数的分批处理之间生效，已完成的工作不会被记为取消）
+            result = fn(job)
+            job.result = result
+            self._finish(job, "succeeded")
+            logger.info(f"后台任务完成: id={job.id}, kind={job.kind}")
+        except JobCancelled:
+            self._finish(job, "cancelled")
+            logger.info(f"后台任务已取消: id={job.id}, kind={job.kind}")
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, "failed")
+            logger.error(f"后台任务失败: id={job.id}, kind={job.kind}, error={e}", exc_info=True)
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = datetime.now()
+        if status != "succeeded":
+            _remove_artifact(job.id)
+        self._save(job)
+        with self._lock:
+            self._futures.pop(job.id, None)
+            self._saved_at.pop(job.id, None)
+
+    def _progress(self, job: Job) -> None:
+        """进度变化时按间隔写入数据库，并读取其他进程写入的取消请求"""
+        now = time.monotonic()
+        if now - self._saved_at.get(job.id, 0) < JOB_PROGRESS_INTERVAL:
+            return
+        self._saved_at[job.id] = now
+        try:
+            with self.session_factory() as db:
+                if db.scalar(select(models.JobRecord.cancel_requested).where(models.JobRecord.id == job.id)):
+                    job.cancel_requested = True
+        except Exception as e:
+            logger.warning(f"读取任务取消请求失败: id={job.id}, error={e}")
+        self._save(job)
+
+    def _save(self, job: Job, insert: bool = False) -> None:
+        """将任务状态写入jobs表（写入失败只记录日志，不影响任务执行）"""
+        values = job.to_record()
+        try:
+            with self.session_factory() as db:
+                if insert:
+                    db.add(models.JobRecord(**values, owner=OWNER))
+                else:
+                    db.execute(update(models.JobRecord).where(models.JobRecord.id == job.id).values(**values))
+                db.commit()
+        except Exception as e:
+            logger.warning(f"保存任务状态失败: id={job.id}, error={e}")
+
+    def remove_expired(self) -> None:
+        """删除超过保留时间的已结束任务及其结果文件"""
+        expires = datetime.now() - timedelta(seconds=JOB_RETENTION_SECONDS)
+        job_table = models.JobRecord
+        try:
+            with self.session_factory() as db:
+                condition = (job_table.status.notin_(ACTIVE_STATUSES), job_table.finished_at < expires)
+                expired = db.scalars(select(job_table.id).where(*condition)).all()
+                if not expired:
+                    return
+                db.execute(delete(job_table).where(*condition))
+                db.commit()
+        except Exception as e:
+            logger.warning(f"清理过期任务失败: error={e}")
+            return
+        with self._lock:
+            for job_id in expired:
+                self._jobs.pop(job_id, None)
+        for job_id in expired:
+            _remove_artifact(job_id)
+        logger.info(f"已清理过期任务: count={len(expired)}")
+
+    def mark_interrupted(self) -> int:
+        """将本机上已退出的进程遗留的未完成任务标记为失败（服务启动时调用）"""
+        job_table = models.JobRecord
+        host = socket.gethostname()
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(job_table.id, job_table.owner).where(job_table.status.in_(ACTIVE_STATUSES))
+            ).all()
+            interrupted = [
+                job_id for job_id, owner in rows
+                if owner and owner.rsplit(":", 1)[0] == host and owner != OWNER and not _process_alive(owner)
+            ]
+            if interrupted:
+                db.execute(update(job_table).where(job_table.id.in_(interrupted)).values(
+                    status="failed", error="服务重启，任务中断", finished_at=datetime.now()
+                ))
+                db.commit()
+                logger.warning(f"上次运行中断的后台任务已标记为失败: {interrupted}")
+        return len(interrupted)
+
+def _process_alive(owner: str) -> bool:
+    try:
+        os.kill(int(owner.rsplit(":", 1)[1]), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _remove_artifact(job_id: str) -> None:
+    path = os.path.join(JOB_ARTIFACT_DIR, job_id)
+    if os.path.exists(path):
+        os.remove(path)
+
+job_manager = JobManager()
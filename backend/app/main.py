@@ -11,19 +11,27 @@ from sqlalchemy.exc import SQLAlchemyError
 
 logger = logging.getLogger(__name__)
 
-from . import models
 from .database import engine
-from .api import auth, user, worker, process, quota, salary, report, stats, process_cat1, process_cat2, motor_model
+from .db_schema import init_schema
+from .current_quotas import schedule_midnight_refresh
+from .jobs import job_manager
+from .api import auth, user, worker, process, quota, salary, report, stats, process_cat1, process_cat2, motor_model, jobs, search, simulation, analytics
 
 # 加载环境变量
 logger.debug("加载环境变量...")
 load_dotenv()
 
-# 创建数据库表
+# 创建数据库表和视图
 logger.debug("开始创建数据库表...")
-models.Base.metadata.create_all(bind=engine)
+init_schema(engine)
 logger.debug("数据库表创建完成")
 
+# 预先录入的未来定额在生效日零点成为当前定额
+schedule_midnight_refresh(engine)
+
+# 上次运行中断的后台任务标记为失败
+job_manager.mark_interrupted()
+
 # 创建FastAPI应用
 logger.debug("创建FastAPI应用...")
 app = FastAPI(
@@ -41,6 +49,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 分页信息通过响应头返回，跨域时需显式暴露给前端
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 logger.debug("CORS中间件配置完成")
 
@@ -113,6 +123,14 @@ app.include_router(process_cat2.router, prefix="/api")
 logger.debug("包含process_cat2路由完成")
 app.include_router(motor_model.router, prefix="/api")
 logger.debug("包含motor_model路由完成")
+app.include_router(jobs.router, prefix="/api")
+logger.debug("包含jobs路由完成")
+app.include_router(search.router, prefix="/api")
+logger.debug("包含search路由完成")
+app.include_router(simulation.router, prefix="/api")
+logger.debug("包含simulation路由完成")
+app.include_router(analytics.router, prefix="/api")
+logger.debug("包含analytics路由完成")
 logger.debug("所有API路由包含完成")
 
 # 健康检查端点
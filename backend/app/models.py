@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Numeric, UniqueConstraint, Boolean, CheckConstraint
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Numeric, UniqueConstraint, Boolean, CheckConstraint, Index, JSON, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -55,7 +55,7 @@ class Quota(Base):
     cat1_code = Column(String(4), ForeignKey("process_cat1.cat1_code", ondelete="CASCADE"), nullable=False, index=True)
     cat2_code = Column(String(4), ForeignKey("process_cat2.cat2_code", ondelete="CASCADE"), nullable=False, index=True)
     model_name = Column(String(20), ForeignKey("motor_models.name", ondelete="CASCADE"), nullable=False, index=True)
-    unit_price = Column(Numeric(10, 2), nullable=False, comment="单价，保留两位小数")
+    unit_price_cents = Column(Integer, nullable=False, comment="单价（分）")
     effective_date = Column(Date, nullable=False, comment="生效日期", index=True)
     created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -63,6 +63,10 @@ class Quota(Base):
     # 约束：同一工序、工段、工序类别、电机型号在同一日期只能有一个生效定额
     __table_args__ = (
         UniqueConstraint('process_code', 'cat1_code', 'cat2_code', 'model_name', 'effective_date', name='_process_effective_date_uc'),
+        # 定额目录的筛选+排序：按型号、类别或日期区间筛选，并以 (生效日期, id) 做游标分页
+        Index('ix_quotas_model_name_effective_date', 'model_name', 'effective_date', 'id'),
+        Index('ix_quotas_cat1_cat2_effective_date', 'cat1_code', 'cat2_code', 'effective_date', 'id'),
+        Index('ix_quotas_effective_date_id', 'effective_date', 'id'),
     )
     
     # 关系
@@ -73,6 +77,21 @@ class Quota(Base):
     creator = relationship("User", back_populates="quotas")
     work_records = relationship("WorkRecord", back_populates="quota", passive_deletes=True)
 
+class CurrentQuota(Base):
+    """当前生效定额表：每个（工序、工段类别、工序类别、电机型号）只保留今天生效的定额版本，由触发器和零点刷新维护"""
+    __tablename__ = "current_quotas"
+    
+    process_code = Column(String(20), primary_key=True)
+    cat1_code = Column(String(4), primary_key=True)
+    cat2_code = Column(String(4), primary_key=True)
+    model_name = Column(String(20), primary_key=True, index=True)
+    quota_id = Column(Integer, ForeignKey("quotas.id", ondelete="CASCADE"), nullable=False, unique=True, comment="生效的定额版本")
+    unit_price_cents = Column(Integer, nullable=False, comment="单价（分）")
+    effective_date = Column(Date, nullable=False, comment="生效日期")
+    
+    # 关系
+    quota = relationship("Quota", viewonly=True)
+
 class WorkRecord(Base):
     """工作记录表"""
     __tablename__ = "work_records"
@@ -80,10 +99,13 @@ class WorkRecord(Base):
     id = Column(Integer, primary_key=True, index=True)
     worker_code = Column(String(20), ForeignKey("workers.worker_code"), nullable=False, index=True)
     quota_id = Column(Integer, ForeignKey("quotas.id", ondelete="CASCADE"), nullable=False, index=True)
-    quantity = Column(Numeric(10, 2), nullable=False, comment="数量，保留两位小数")
+    quantity_hundredths = Column(Integer, nullable=False, comment="数量（百分之一为单位，即数量×100）")
+    unit_price_cents = Column(Integer, nullable=True, comment="录入时定额的单价（分），定额调价不影响已录入的记录")
+    amount_cents = Column(Integer, nullable=True, comment="金额（分）= 录入时单价 × 数量")
     record_date = Column(Date, nullable=False, comment="记录日期", index=True)
     created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    change_version = Column(Integer, nullable=True, index=True, comment="最近一次修改时工作记录表的版本号（触发器维护，未修改过的记录为空）")
     
     # 关系
     worker = relationship("Worker", back_populates="work_records")
@@ -133,16 +155,75 @@ class MotorModel(Base):
     quotas = relationship("Quota", back_populates="model", passive_deletes=True)
 
 
+class MotorModelAlias(Base):
+    """电机型号别名表（由motor_models.aliases拆分并规范化，写入电机型号时同步维护）"""
+    __tablename__ = "motor_model_aliases"
+    
+    normalized_alias = Column(String(50), primary_key=True, comment="规范化别名（大写，去除空白和连字符）")
+    alias = Column(String(50), nullable=False, comment="原始别名")
+    model_name = Column(String(20), ForeignKey("motor_models.name", ondelete="CASCADE"), nullable=False, index=True, comment="电机型号名称")
+
+
+class TableVersion(Base):
+    """数据表变更版本（由数据库触发器在增删改时递增，用于ETag和缓存失效）"""
+    __tablename__ = "table_versions"
+    
+    table_name = Column(String(50), primary_key=True, comment="表名")
+    version = Column(Integer, nullable=False, default=0, comment="变更版本号")
+
+
+class TableRowCount(Base):
+    """数据表行数计数器（由数据库触发器在插入和删除时维护，列表接口的总数不必COUNT全表）"""
+    __tablename__ = "table_row_counts"
+    
+    table_name = Column(String(50), primary_key=True, comment="表名")
+    row_count = Column(Integer, nullable=False, default=0, comment="行数")
+
+
+class WorkRecordMonthTotal(Base):
+    """工作记录按月汇总（由数据库触发器在工作记录增删改时维护，首页统计不必扫描工作记录表）"""
+    __tablename__ = "work_record_month_totals"
+    
+    month = Column(String(7), primary_key=True, comment="月份（YYYY-MM）")
+    record_count = Column(Integer, nullable=False, default=0, comment="记录数")
+    quantity_hundredths = Column(Integer, nullable=False, default=0, comment="数量合计（×100）")
+    amount_cents = Column(Integer, nullable=False, default=0, comment="金额合计（分，按录入时保存的金额）")
+
+
+class JobRecord(Base):
+    """后台任务表（任务状态、进度和结果持久化，服务重启后仍可查询）"""
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True, comment="任务ID")
+    kind = Column(String(50), nullable=False, comment="任务类型")
+    status = Column(String(20), nullable=False, index=True, comment="状态: pending/running/succeeded/failed/cancelled")
+    total = Column(Integer, nullable=False, default=0, comment="预计处理总数")
+    processed = Column(Integer, nullable=False, default=0, comment="已处理数")
+    message = Column(String(255), nullable=False, default="", comment="进度说明")
+    result = Column(JSON, nullable=True, comment="任务结果")
+    error = Column(Text, nullable=True, comment="失败原因")
+    artifact_name = Column(String(255), nullable=True, comment="结果文件名（文件保存在JOB_ARTIFACT_DIR）")
+    artifact_media_type = Column(String(100), nullable=True, comment="结果文件类型")
+    cancel_requested = Column(Boolean, nullable=False, default=False, comment="是否已请求取消")
+    owner = Column(String(100), nullable=True, comment="执行任务的进程: 主机名:进程号")
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
 class VSalaryRecord(Base):
     """工资记录视图"""
     __tablename__ = "v_salary_records"
+    # 标记为视图：建表时跳过，由db_schema.create_views创建
+    __table_args__ = {"info": {"is_view": True}}
     
     id = Column(Integer, primary_key=True, index=True)
     worker_code = Column(String(20), nullable=False, index=True)
     quota_id = Column(Integer, nullable=False, index=True)
-    quantity = Column(Numeric(10, 2), nullable=False, comment="数量，保留两位小数")
-    unit_price = Column(Numeric(10, 2), nullable=False, comment="单价，保留两位小数")
-    amount = Column(Numeric(10, 2), nullable=False, comment="金额，保留两位小数")
+    quantity_hundredths = Column(Integer, nullable=False, comment="数量×100")
+    unit_price_cents = Column(Integer, nullable=True, comment="单价（分）")
+    amount_cents = Column(Integer, nullable=True, comment="金额（分）")
     record_date = Column(Date, nullable=False, comment="记录日期", index=True)
     created_by = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False)
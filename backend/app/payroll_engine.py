@@ -0,0 +1,243 @@
+"""
+月末工资计算引擎
+
+将一个月的工作记录加载为NumPy列（工人序号、定额ID、数量×100、录入时单价），定额价目表加载为以定额ID为下标的数组，
+通过向量化的下标取值（gather）和 bincount 一次性算出按工人、工序和工序类别（cat2）的汇总。
+金额与SQL中的计算一致：(单价分 × 数量×100 + 50) // 100；未保存录入单价的旧记录按价目表的现行单价计算。
+计算结果可与SQL中按工人累加 amount_cents 的结果交叉核对。
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .reference_cache import reference_cache
+from .utils.money import HUNDREDTHS, from_cents, from_hundredths
+from .utils.query_helpers import month_filter
+
+logger = logging.getLogger(__name__)
+
+# 分批读取工作记录的行数
+LOAD_CHUNK_SIZE = 100_000
+
+# 工作记录未保存录入单价时的占位值
+NO_CAPTURED_PRICE = -1
+
+# 价目表中的定额维度 -> 定额表的列名
+QUOTA_DIMENSIONS = {
+    "process": "process_code",
+    "cat1": "cat1_code",
+    "cat2": "cat2_code",
+    "model": "model_name",
+}
+
+@dataclass
+class PayrollRecords:
+    """一个月的工作记录列"""
+    worker_codes: List[str]
+    worker_index: np.ndarray
+    quota_id: np.ndarray
+    quantity_hundredths: np.ndarray
+    unit_price_cents: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.quota_id)
+
+@dataclass
+class PriceBook:
+    """定额价目表：以定额ID为下标的单价和各维度（工序、工段类别、工序类别、型号）的序号"""
+    unit_price_cents: np.ndarray
+    indexes: Dict[str, np.ndarray]
+    codes: Dict[str, List[str]]
+
+@dataclass
+class GroupTotals:
+    """按分组键汇总的记录数、数量（×100）和金额（分）"""
+    codes: List[str]
+    record_count: np.ndarray
+    quantity_hundredths: np.ndarray
+    amount_cents: np.ndarray
+
+    def rows(self):
+        """按编码输出有记录的分组：(编码, 记录数, 数量×100, 金额分)"""
+        for i in np.flatnonzero(self.record_count):
+            yield self.codes[i], int(self.record_count[i]), int(self.quantity_hundredths[i]), int(self.amount_cents[i])
+
+@dataclass
+class PayrollTotals:
+    """工资计算结果"""
+    record_count: int
+    amount_cents: int
+    quantity_hundredths: int
+    workers: GroupTotals
+    processes: GroupTotals
+    categories: GroupTotals
+
+def load_month_records(db: Session, month: str) -> PayrollRecords:
+    """
+    分批读取一个月的工作记录并转换为NumPy列
+
+    Raises:
+        ValueError: 月份格式不合法
+    """
+    return load_records(db, month_filter(models.WorkRecord.record_date, month))
+
+def load_records(db: Session, *conditions) -> PayrollRecords:
+    """分批读取满足条件的工作记录并转换为NumPy列"""
+    record = models.WorkRecord
+    query = select(
+        record.worker_code,
+        record.quota_id,
+        record.quantity_hundredths,
+        func.coalesce(record.unit_price_cents, NO_CAPTURED_PRICE),
+    ).where(*conditions).execution_options(yield_per=LOAD_CHUNK_SIZE)
+
+    worker_positions: Dict[str, int] = {}
+    columns = ([], [], [], [])
+    for chunk in db.execute(query).partitions():
+        size = len(chunk)
+        worker_codes, quota_ids, quantities, unit_prices = zip(*chunk)
+        columns[0].append(np.fromiter(
+            (worker_positions.setdefault(code, len(worker_positions)) for code in worker_codes), np.int64, size
+        ))
+        columns[1].append(np.fromiter(quota_ids, np.int64, size))
+        columns[2].append(np.fromiter(quantities, np.int64, size))
+        columns[3].append(np.fromiter(unit_prices, np.int64, size))
+
+    worker_index, quota_id, quantity_hundredths, unit_price_cents = (
+        np.concatenate(parts) if parts else np.empty(0, np.int64) for parts in columns
+    )
+    return PayrollRecords(list(worker_positions), worker_index, quota_id, quantity_hundredths, unit_price_cents)
+
+def load_price_book(db: Session) -> PriceBook:
+    """读取全部定额，生成以定额ID为下标的价目表数组"""
+    quota = models.Quota
+    columns = [getattr(quota, column) for column in QUOTA_DIMENSIONS.values()]
+    rows = db.execute(select(quota.id, quota.unit_price_cents, *columns)).all()
+    size = max((row.id for row in rows), default=0) + 1
+    ids = np.fromiter((row.id for row in rows), np.int64, len(rows))
+
+    unit_price_cents = np.zeros(size, np.int64)
+    unit_price_cents[ids] = np.fromiter((row.unit_price_cents for row in rows), np.int64, len(rows))
+    indexes, codes = {}, {}
+    for dimension, column in QUOTA_DIMENSIONS.items():
+        values = [getattr(row, column) for row in rows]
+        codes[dimension] = sorted(set(values))
+        positions = {code: i for i, code in enumerate(codes[dimension])}
+        indexes[dimension] = np.zeros(size, np.int64)
+        indexes[dimension][ids] = np.fromiter((positions[value] for value in values), np.int64, len(rows))
+    return PriceBook(unit_price_cents, indexes, codes)
+
+def record_unit_prices(records: PayrollRecords, book: PriceBook) -> np.ndarray:
+    """工作记录的计价单价（分）：录入时保存的单价，未保存时取价目表的现行单价"""
+    return np.where(
+        records.unit_price_cents != NO_CAPTURED_PRICE, records.unit_price_cents, book.unit_price_cents[records.quota_id]
+    )
+
+def amounts(unit_price_cents: np.ndarray, quantity_hundredths: np.ndarray) -> np.ndarray:
+    """向量化计算金额（分），与SQL和utils.money.amount_cents的整数公式一致"""
+    return (unit_price_cents * quantity_hundredths + HUNDREDTHS // 2) // HUNDREDTHS
+
+def _group_totals(index: np.ndarray, codes: List[str], quantity: np.ndarray, amount: np.ndarray) -> GroupTotals:
+    # bincount的权重按float64累加，整数和小于2**53时结果精确
+    size = len(codes)
+    return GroupTotals(
+        codes,
+        np.bincount(index, minlength=size),
+        np.rint(np.bincount(index, weights=quantity, minlength=size)).astype(np.int64),
+        np.rint(np.bincount(index, weights=amount, minlength=size)).astype(np.int64),
+    )
+
+def compute_payroll(records: PayrollRecords, book: PriceBook) -> PayrollTotals:
+    """向量化计算金额并按工人、工序和工序类别汇总"""
+    quota_id = records.quota_id
+    amount = amounts(record_unit_prices(records, book), records.quantity_hundredths)
+    quantity = records.quantity_hundredths
+    return PayrollTotals(
+        record_count=len(records),
+        amount_cents=int(amount.sum()),
+        quantity_hundredths=int(quantity.sum()),
+        workers=_group_totals(records.worker_index, records.worker_codes, quantity, amount),
+        processes=_group_totals(book.indexes["process"][quota_id], book.codes["process"], quantity, amount),
+        categories=_group_totals(book.indexes["cat2"][quota_id], book.codes["cat2"], quantity, amount),
+    )
+
+def sql_worker_totals(db: Session, month: str) -> Dict[str, tuple]:
+    """SQL中按工人累加录入时保存的金额：工号 -> (记录数, 数量×100, 金额分)"""
+    record = models.WorkRecord
+    rows = db.execute(
+        select(
+            record.worker_code,
+            func.count(record.id),
+            func.sum(record.quantity_hundredths),
+            func.coalesce(func.sum(record.amount_cents), 0),
+        ).where(month_filter(record.record_date, month)).group_by(record.worker_code)
+    ).all()
+    return {worker_code: (count, int(quantity), int(amount)) for worker_code, count, quantity, amount in rows}
+
+def cross_check(totals: PayrollTotals, sql_totals: Dict[str, tuple]) -> Dict[str, Any]:
+    """比较引擎与SQL的按工人汇总结果"""
+    engine_totals = {code: (count, quantity, amount) for code, count, quantity, amount in totals.workers.rows()}
+    mismatched = sorted(
+        code for code in engine_totals.keys() | sql_totals.keys() if engine_totals.get(code) != sql_totals.get(code)
+    )
+    if mismatched:
+        logger.warning(f"工资计算与SQL汇总不一致: workers={mismatched[:20]}")
+    return {
+        "sql_total_amount": from_cents(sum(amount for _, _, amount in sql_totals.values())),
+        "matches": not mismatched,
+        "mismatched_workers": mismatched,
+    }
+
+def _group_report(groups: GroupTotals, names, default_name: str) -> List[Dict[str, Any]]:
+    report = []
+    for code, count, quantity, amount in groups.rows():
+        row = names.get(code)
+        report.append({
+            "code": code,
+            "name": row.name if row else default_name,
+            "record_count": count,
+            "total_quantity": from_hundredths(quantity),
+            "total_amount": from_cents(amount),
+        })
+    return report
+
+def payroll_report(db: Session, month: str, check: bool = True) -> Dict[str, Any]:
+    """
+    计算月末工资并生成报表（可选与SQL汇总交叉核对）
+
+    Raises:
+        ValueError: 月份格式不合法
+    """
+    started = time.perf_counter()
+    records = load_month_records(db, month)
+    book = load_price_book(db)
+    loaded = time.perf_counter()
+    totals = compute_payroll(records, book)
+    computed = time.perf_counter()
+    logger.info(
+        f"月末工资计算完成: month={month}, records={totals.record_count}, "
+        f"load={(loaded - started) * 1000:.0f}ms, compute={(computed - loaded) * 1000:.0f}ms"
+    )
+
+    reference = reference_cache.get(db)
+    report = {
+        "month": month,
+        "record_count": totals.record_count,
+        "total_quantity": from_hundredths(totals.quantity_hundredths),
+        "total_amount": from_cents(totals.amount_cents),
+        "workers": _group_report(totals.workers, reference.workers, "未知工人"),
+        "processes": _group_report(totals.processes, reference.processes, "未知工序"),
+        "categories": _group_report(totals.categories, reference.process_cat2, "未知类别"),
+        "load_ms": round((loaded - started) * 1000, 1),
+        "compute_ms": round((computed - loaded) * 1000, 1),
+        "cross_check": None,
+    }
+    if check:
+        report["cross_check"] = cross_check(totals, sql_worker_totals(db, month))
+    return report
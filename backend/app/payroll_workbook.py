@@ -0,0 +1,170 @@
+"""
+月度工资工作簿
+
+从一个按工号、日期排序的游标分批读取当月工作记录，用openpyxl只写模式（write_only）生成工作簿：
+汇总表（每名工人一行、工段合计和总计）、每个工段（cat1）一张表（该工段内每名工人一行）和工人明细表（逐条记录，每名工人后加小计行）。
+只写模式的各工作表逐行写入临时文件，内存占用只与工段数有关，与记录数无关。
+保存时的压缩输出经 utils.streaming 分块放入有界队列，由响应一边生成一边发送给客户端。
+"""
+import logging
+import os
+from datetime import datetime
+from typing import Any, Callable, Iterator, List, Optional
+
+from openpyxl import Workbook
+from sqlalchemy import distinct, func, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .db_schema import amount_cents_value
+from .reference_cache import reference_cache
+from .utils.money import from_cents, from_hundredths
+from .utils.query_helpers import month_filter
+from .utils.streaming import StreamCancelled, stream_in_thread
+
+logger = logging.getLogger(__name__)
+
+# 分批读取工作记录的行数
+WORKBOOK_CHUNK_SIZE = int(os.getenv("WORKBOOK_CHUNK_SIZE", "10000"))
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+WORKER_COLUMNS = ["工号", "姓名", "记录数", "数量", "金额"]
+DETAIL_COLUMNS = ["工号", "姓名", "日期", "工序", "工段类别", "工序类别", "型号", "数量", "单价", "金额"]
+
+# 工作表名称中不允许的字符和最大长度
+INVALID_TITLE_CHARACTERS = str.maketrans({character: "_" for character in "[]:*?/\\"})
+MAX_TITLE_LENGTH = 31
+
+def sheet_title(code: str, name: Optional[str]) -> str:
+    """工段工作表名称：编码 名称（去掉Excel不允许的字符，截断到31个字符）"""
+    title = f"{code} {name}" if name else code
+    return title.translate(INVALID_TITLE_CHARACTERS)[:MAX_TITLE_LENGTH]
+
+def month_record_rows(month: str):
+    """当月工作记录按工号、日期排序的查询（含定额维度和计价单价、金额），分批读取"""
+    record, quota = models.WorkRecord, models.Quota
+    return select(
+        record.worker_code,
+        record.record_date,
+        quota.process_code,
+        quota.cat1_code,
+        quota.cat2_code,
+        quota.model_name,
+        record.quantity_hundredths,
+        # 未保存录入单价的旧记录按定额的现行单价计算，与月末工资计算一致
+        func.coalesce(record.unit_price_cents, quota.unit_price_cents),
+        func.coalesce(record.amount_cents, amount_cents_value(quota.unit_price_cents, record.quantity_hundredths)),
+    ).join(quota, record.quota_id == quota.id).where(
+        month_filter(record.record_date, month)
+    ).order_by(record.worker_code, record.record_date, record.id).execution_options(yield_per=WORKBOOK_CHUNK_SIZE)
+
+def _totals_row(code: str, name: str, totals: List[int]) -> List[Any]:
+    count, quantity, amount = totals
+    return [code, name, count, from_hundredths(quantity), from_cents(amount)]
+
+def _add(totals: List[int], count: int, quantity: int, amount: int) -> None:
+    totals[0] += count
+    totals[1] += quantity
+    totals[2] += amount
+
+def _discard(workbook: Workbook) -> None:
+    """生成中断时结束各工作表的写入并删除只写模式的临时文件"""
+    for sheet in workbook.worksheets:
+        if not sheet.closed:
+            sheet.close()
+        if sheet._writer is not None and os.path.exists(sheet._writer.out):
+            sheet._writer.cleanup()
+
+def build_payroll_workbook(
+    db: Session, month: str, output, should_stop: Callable[[], bool] = lambda: False
+) -> int:
+    """
+    生成月度工资工作簿并写入output（路径或可写的文件对象，可以不支持seek）
+
+    Returns:
+        工作记录数
+
+    Raises:
+        ValueError: 月份格式不合法
+        StreamCancelled: should_stop() 返回True
+    """
+    condition = month_filter(models.WorkRecord.record_date, month)
+    reference = reference_cache.get(db)
+    workbook = Workbook(write_only=True)
+    try:
+        count = _write_sheets(db, month, condition, reference, workbook, should_stop)
+        workbook.save(output)
+    except BaseException:
+        _discard(workbook)
+        raise
+    logger.info(f"月度工资工作簿生成完成: month={month}, records={count}")
+    return count
+
+def _write_sheets(db: Session, month: str, condition, reference, workbook: Workbook, should_stop) -> int:
+    cat1_codes = db.execute(
+        select(distinct(models.Quota.cat1_code)).join(models.WorkRecord).where(condition).order_by(models.Quota.cat1_code)
+    ).scalars().all()
+    summary = workbook.create_sheet("汇总")
+    summary.append([f"{month} 工资汇总"])
+    summary.append(WORKER_COLUMNS)
+    workshops = {}
+    for code in cat1_codes:
+        workshop = reference.process_cat1.get(code)
+        sheet = workbook.create_sheet(sheet_title(code, workshop.name if workshop else None))
+        sheet.append(WORKER_COLUMNS)
+        workshops[code] = (sheet, [0, 0, 0])
+    detail = workbook.create_sheet("工人明细")
+    detail.append(DETAIL_COLUMNS)
+
+    grand_total = [0, 0, 0]
+    worker_code, worker_name = None, ""
+    worker_total, worker_workshops = [0, 0, 0], {}
+
+    def flush_worker() -> None:
+        summary.append(_totals_row(worker_code, worker_name, worker_total))
+        detail.append(["小计", worker_name, None, None, None, None, None,
+                       from_hundredths(worker_total[1]), None, from_cents(worker_total[2])])
+        for code, totals in worker_workshops.items():
+            sheet, workshop_total = workshops[code]
+            sheet.append(_totals_row(worker_code, worker_name, totals))
+            _add(workshop_total, *totals)
+        _add(grand_total, *worker_total)
+
+    for chunk in db.execute(month_record_rows(month)).partitions():
+        if should_stop():
+            raise StreamCancelled()
+        for code, record_date, process_code, cat1_code, cat2_code, model_name, quantity, unit_price, amount in chunk:
+            if code != worker_code:
+                if worker_code is not None:
+                    flush_worker()
+                worker = reference.workers.get(code)
+                worker_code, worker_name = code, worker.name if worker else "未知工人"
+                worker_total, worker_workshops = [0, 0, 0], {}
+            process = reference.processes.get(process_code)
+            detail.append([
+                code, worker_name, record_date, process.name if process else process_code, cat1_code, cat2_code,
+                model_name, from_hundredths(quantity), from_cents(unit_price), from_cents(amount),
+            ])
+            _add(worker_total, 1, quantity, amount)
+            _add(worker_workshops.setdefault(cat1_code, [0, 0, 0]), 1, quantity, amount)
+    if worker_code is not None:
+        flush_worker()
+
+    summary.append(_totals_row("合计", "", grand_total))
+    summary.append([])
+    summary.append(["工段", "名称", "记录数", "数量", "金额"])
+    for code, (sheet, totals) in workshops.items():
+        workshop = reference.process_cat1.get(code)
+        summary.append(_totals_row(code, workshop.name if workshop else "未知工段", totals))
+        sheet.append(_totals_row("合计", "", totals))
+    summary.append([])
+    summary.append(["生成时间", datetime.now().strftime("%Y-%m-%d %H:%M:%S")])
+    return grand_total[0]
+
+def stream_payroll_workbook(db: Session, month: str) -> Iterator[bytes]:
+    """在后台线程中生成工作簿，逐块返回xlsx文件内容（生成线程独占db会话直到结束）"""
+    return stream_in_thread(
+        lambda output: build_payroll_workbook(db, month, output, should_stop=output.cancelled.is_set),
+        name=f"payroll-workbook-{month}",
+    )
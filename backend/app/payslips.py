@@ -0,0 +1,248 @@
+"""
+批量工资条
+
+从一个按工号、日期排序的游标读取当月全部工作记录，按工人分组为工资条数据（不按工人逐个查询），
+分批交给进程池渲染为HTML（jinja2模板，每个进程编译一次后缓存）和PDF（reportlab，内置宋体CID字体，无需字体文件），
+渲染结果按顺序写入zip，经 utils.streaming 边生成边发送。进程池中同时在途的批次有上限，内存占用与工人数无关。
+"""
+import io
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfgen import canvas
+from sqlalchemy.orm import Session
+
+from .payroll_workbook import month_record_rows
+from .reference_cache import reference_cache
+from .utils.money import from_cents, from_hundredths
+from .utils.streaming import StreamCancelled, stream_in_thread
+
+logger = logging.getLogger(__name__)
+
+# 渲染进程数（1表示在生成线程中直接渲染）、每批工资条数和每个进程在途的批次数
+PAYSLIP_WORKERS = int(os.getenv("PAYSLIP_WORKERS", str(os.cpu_count() or 1)))
+PAYSLIP_BATCH_SIZE = int(os.getenv("PAYSLIP_BATCH_SIZE", "25"))
+PAYSLIP_BATCHES_IN_FLIGHT = 2
+
+# 工资条格式
+PAYSLIP_FORMATS = {"html": ("html",), "pdf": ("pdf",), "all": ("html", "pdf")}
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+PDF_FONT = "STSong-Light"
+
+# 文件名中不允许的字符
+INVALID_FILENAME_CHARACTERS = str.maketrans({character: "_" for character in '<>:"/\\|?*'})
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+@lru_cache(maxsize=None)
+def payslip_template():
+    """编译后的工资条模板（每个进程编译一次）"""
+    environment = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(["html"]))
+    return environment.get_template("payslip.html")
+
+@lru_cache(maxsize=None)
+def _register_pdf_font() -> str:
+    pdfmetrics.registerFont(UnicodeCIDFont(PDF_FONT))
+    return PDF_FONT
+
+def _warm_up() -> None:
+    """渲染进程的初始化：预先编译模板、注册字体"""
+    payslip_template()
+    _register_pdf_font()
+
+def render_html(payslip: Dict[str, Any]) -> bytes:
+    """渲染HTML工资条"""
+    return payslip_template().render(**payslip).encode("utf-8")
+
+# PDF表格的列：(标题, 字段, 右对齐时的右边界或左对齐时的左边界, 是否右对齐)
+PDF_COLUMNS = (
+    ("日期", "date", 40, False),
+    ("工序", "process", 120, False),
+    ("型号", "model", 270, False),
+    ("数量", "quantity", 420, True),
+    ("单价", "unit_price", 480, True),
+    ("金额", "amount", 555, True),
+)
+PDF_LINE_HEIGHT = 16
+PDF_MARGIN = 50
+
+def render_pdf(payslip: Dict[str, Any]) -> bytes:
+    """渲染PDF工资条（A4，明细超过一页时分页并重复表头）"""
+    font = _register_pdf_font()
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+    pdf.setTitle(f"{payslip['month']} 工资条 - {payslip['worker_name']}")
+    _, height = A4
+
+    def draw_row(y: float, values: Dict[str, str]) -> None:
+        for _, key, x, right in PDF_COLUMNS:
+            text = str(values.get(key, ""))
+            if right:
+                pdf.drawRightString(x, y, text)
+            else:
+                pdf.drawString(x, y, text)
+
+    def start_page() -> float:
+        pdf.setFont(font, 16)
+        pdf.drawString(PDF_COLUMNS[0][2], height - PDF_MARGIN, f"{payslip['month']} 计件工资条")
+        pdf.setFont(font, 11)
+        pdf.drawString(PDF_COLUMNS[0][2], height - PDF_MARGIN - 24,
+                       f"工号：{payslip['worker_code']}    姓名：{payslip['worker_name']}")
+        y = height - PDF_MARGIN - 54
+        draw_row(y, {key: title for title, key, _, _ in PDF_COLUMNS})
+        pdf.line(PDF_COLUMNS[0][2], y - 4, PDF_COLUMNS[-1][2], y - 4)
+        return y - PDF_LINE_HEIGHT
+
+    y = start_page()
+    for line in payslip["lines"]:
+        if y < PDF_MARGIN + PDF_LINE_HEIGHT:
+            pdf.showPage()
+            y = start_page()
+        draw_row(y, line)
+        y -= PDF_LINE_HEIGHT
+    pdf.line(PDF_COLUMNS[0][2], y + PDF_LINE_HEIGHT - 4, PDF_COLUMNS[-1][2], y + PDF_LINE_HEIGHT - 4)
+    draw_row(y - 4, {
+        "date": f"合计（{len(payslip['lines'])} 条）",
+        "quantity": payslip["total_quantity"],
+        "amount": payslip["total_amount"],
+    })
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+RENDERERS = {"html": render_html, "pdf": render_pdf}
+
+def payslip_filename(payslip: Dict[str, Any], extension: str) -> str:
+    """zip中的文件名：工号-姓名.扩展名"""
+    return f"{payslip['worker_code']}-{payslip['worker_name']}.{extension}".translate(INVALID_FILENAME_CHARACTERS)
+
+def render_batch(payslips: List[Dict[str, Any]], formats: Tuple[str, ...]) -> List[Tuple[str, bytes]]:
+    """渲染一批工资条（在渲染进程中执行）：[(文件名, 内容)]"""
+    return [
+        (payslip_filename(payslip, extension), RENDERERS[extension](payslip))
+        for payslip in payslips for extension in formats
+    ]
+
+def month_payslips(db: Session, month: str, should_stop=lambda: False) -> Iterator[Dict[str, Any]]:
+    """
+    按工号顺序逐个生成当月工资条数据（一个有序游标，内存中只保留当前工人的明细）
+
+    Raises:
+        ValueError: 月份格式不合法
+        StreamCancelled: should_stop() 返回True
+    """
+    reference = reference_cache.get(db)
+
+    def rows():
+        for chunk in db.execute(month_record_rows(month)).partitions():
+            if should_stop():
+                raise StreamCancelled()
+            yield from chunk
+
+    for worker_code, worker_rows in itertools.groupby(rows(), key=lambda row: row[0]):
+        worker = reference.workers.get(worker_code)
+        lines, total_quantity, total_amount = [], 0, 0
+        for _, record_date, process_code, _, _, model_name, quantity, unit_price, amount in worker_rows:
+            process = reference.processes.get(process_code)
+            lines.append({
+                "date": record_date.isoformat(),
+                "process": process.name if process else process_code,
+                "model": model_name,
+                "quantity": str(from_hundredths(quantity)),
+                "unit_price": str(from_cents(unit_price)),
+                "amount": str(from_cents(amount)),
+            })
+            total_quantity += quantity
+            total_amount += amount
+        yield {
+            "month": month,
+            "worker_code": worker_code,
+            "worker_name": worker.name if worker else "未知工人",
+            "lines": lines,
+            "total_quantity": str(from_hundredths(total_quantity)),
+            "total_amount": str(from_cents(total_amount)),
+        }
+
+def _pool() -> Optional[ProcessPoolExecutor]:
+    """渲染进程池（按需创建；spawn方式启动，不继承服务进程的线程和数据库连接）"""
+    global _executor
+    if PAYSLIP_WORKERS <= 1:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=PAYSLIP_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_up,
+            )
+            logger.info(f"工资条渲染进程池已启动: workers={PAYSLIP_WORKERS}")
+        return _executor
+
+def write_payslip_archive(db: Session, month: str, formats: Tuple[str, ...], output, should_stop=lambda: False) -> int:
+    """
+    渲染当月全部工资条并写入zip（output可以不支持seek）
+
+    Returns:
+        工资条数
+
+    Raises:
+        ValueError: 月份格式不合法
+        StreamCancelled: should_stop() 返回True
+    """
+    pool = _pool()
+    batches = _batches(month_payslips(db, month, should_stop), PAYSLIP_BATCH_SIZE)
+    count = 0
+    with ZipFile(output, "w", ZIP_DEFLATED) as archive:
+        def write(files: List[Tuple[str, bytes]]) -> None:
+            for filename, content in files:
+                # PDF的内容流已压缩，直接存储
+                archive.writestr(filename, content, ZIP_STORED if filename.endswith(".pdf") else ZIP_DEFLATED)
+
+        if pool is None:
+            for batch in batches:
+                write(render_batch(batch, formats))
+                count += len(batch)
+        else:
+            pending = deque()
+            try:
+                for batch in batches:
+                    pending.append(pool.submit(render_batch, batch, formats))
+                    count += len(batch)
+                    if len(pending) >= PAYSLIP_WORKERS * PAYSLIP_BATCHES_IN_FLIGHT:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+            finally:
+                for future in pending:
+                    future.cancel()
+    logger.info(f"工资条生成完成: month={month}, payslips={count}, formats={formats}")
+    return count
+
+def _batches(items, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def stream_payslip_archive(db: Session, month: str, formats: Tuple[str, ...]) -> Iterator[bytes]:
+    """在后台线程中生成工资条zip，逐块返回（生成线程独占db会话直到结束）"""
+    return stream_in_thread(
+        lambda output: write_payslip_archive(db, month, formats, output, should_stop=output.cancelled.is_set),
+        name=f"payslips-{month}",
+    )
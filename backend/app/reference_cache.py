@@ -0,0 +1,164 @@
+"""
+基础数据缓存
+
+将工人、工序、工段类别、工序类别、电机型号及其别名以不可变快照的形式缓存在进程内，供crud查询和路由校验使用。
+每个请求（数据库会话）只查询一次table_versions检查版本号，版本号由数据库触发器维护，
+因此多个服务进程之间也能保持一致：任一进程写入后，其他进程在下一个请求中重新加载变更的表。
+"""
+import logging
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models
+from .db_schema import VERSIONED_TABLES
+
+logger = logging.getLogger(__name__)
+
+# 会话info中保存本请求快照的键
+SESSION_KEY = "reference_data"
+
+# 表名 -> 表对象
+REFERENCE_TABLES = {table_name: models.Base.metadata.tables[table_name] for table_name in VERSIONED_TABLES}
+
+VERSION_QUERY = select(models.TableVersion.table_name, models.TableVersion.version).where(
+    models.TableVersion.table_name.in_(VERSIONED_TABLES)
+)
+
+class ReferenceTable:
+    """单张基础数据表的不可变快照：主键索引和名称索引"""
+
+    __slots__ = ("version", "rows", "by_name")
+
+    def __init__(self, version: Optional[int], rows: Iterable[Any], key_column: str):
+        self.version = version
+        self.rows: Mapping[str, Any] = MappingProxyType({getattr(row, key_column): row for row in rows})
+        self.by_name: Mapping[str, Any] = MappingProxyType(
+            {row.name: row for row in self.rows.values() if hasattr(row, "name")}
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        """按主键获取行"""
+        return self.rows.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.rows
+
+class ReferenceData:
+    """基础数据快照（整体不可变，更新时替换为新对象）"""
+
+    def __init__(self, tables: Dict[str, ReferenceTable]):
+        self._tables = MappingProxyType(dict(tables))
+
+    def table(self, table_name: str) -> ReferenceTable:
+        return self._tables[table_name]
+
+    def version(self, table_name: str) -> int:
+        """表的变更版本号"""
+        return self._tables[table_name].version or 0
+
+    @property
+    def workers(self) -> ReferenceTable:
+        return self._tables["workers"]
+
+    @property
+    def processes(self) -> ReferenceTable:
+        return self._tables["processes"]
+
+    @property
+    def process_cat1(self) -> ReferenceTable:
+        return self._tables["process_cat1"]
+
+    @property
+    def process_cat2(self) -> ReferenceTable:
+        return self._tables["process_cat2"]
+
+    @property
+    def motor_models(self) -> ReferenceTable:
+        return self._tables["motor_models"]
+
+    @property
+    def motor_model_aliases(self) -> ReferenceTable:
+        return self._tables["motor_model_aliases"]
+
+def _key_column(table_name: str) -> str:
+    return REFERENCE_TABLES[table_name].primary_key.columns.values()[0].name
+
+class ReferenceCache:
+    """进程内基础数据缓存"""
+
+    def __init__(self):
+        self._data: Optional[ReferenceData] = None
+        self._lock = threading.Lock()
+
+    def _stale_tables(self, versions: Dict[str, int]) -> list:
+        """版本号发生变化（或没有版本记录）需要重新加载的表"""
+        data = self._data
+        return [
+            table_name for table_name in VERSIONED_TABLES
+            if data is None or versions.get(table_name) is None
+            or data.table(table_name).version != versions[table_name]
+        ]
+
+    def _apply(self, versions: Dict[str, int], loaded: Dict[str, list]) -> ReferenceData:
+        """用新加载的表生成新快照（未变更的表沿用旧快照）"""
+        with self._lock:
+            tables = {}
+            for table_name in VERSIONED_TABLES:
+                if table_name in loaded:
+                    tables[table_name] = ReferenceTable(versions.get(table_name), loaded[table_name], _key_column(table_name))
+                else:
+                    tables[table_name] = self._data.table(table_name)
+            self._data = ReferenceData(tables)
+            logger.debug(f"基础数据缓存已刷新: tables={list(loaded)}, versions={versions}")
+            return self._data
+
+    def get(self, db: Session) -> ReferenceData:
+        """获取基础数据快照（同一会话内只检查一次版本号）"""
+        cached = db.info.get(SESSION_KEY)
+        if cached is not None:
+            return cached
+        versions = dict(db.execute(VERSION_QUERY).all())
+        stale = self._stale_tables(versions)
+        data = self._data
+        if stale:
+            loaded = {table_name: db.execute(select(*REFERENCE_TABLES[table_name].c)).all() for table_name in stale}
+            data = self._apply(versions, loaded)
+        db.info[SESSION_KEY] = data
+        return data
+
+    async def get_async(self, db: AsyncSession) -> ReferenceData:
+        """获取基础数据快照（异步会话）"""
+        cached = db.info.get(SESSION_KEY)
+        if cached is not None:
+            return cached
+        versions = dict((await db.execute(VERSION_QUERY)).all())
+        stale = self._stale_tables(versions)
+        data = self._data
+        if stale:
+            loaded = {}
+            for table_name in stale:
+                loaded[table_name] = (await db.execute(select(*REFERENCE_TABLES[table_name].c))).all()
+            data = self._apply(versions, loaded)
+        db.info[SESSION_KEY] = data
+        return data
+
+    def discard(self, db) -> None:
+        """丢弃会话中的快照，下次访问时重新检查版本号（如写入因外键失败，说明快照可能已过期）"""
+        db.info.pop(SESSION_KEY, None)
+
+    def clear(self) -> None:
+        """清空缓存（下次访问时全部重新加载）"""
+        with self._lock:
+            self._data = None
+
+reference_cache = ReferenceCache()
+
+@event.listens_for(Session, "after_commit")
+def _discard_session_snapshot(session):
+    """会话提交后丢弃本会话的快照，同一请求中写入后的查询会重新检查版本号"""
+    session.info.pop(SESSION_KEY, None)
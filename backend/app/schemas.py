@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, computed_field
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Any, Optional, List
 from decimal import Decimal
 
+from .utils.money import from_cents, from_hundredths
+
 # 用户相关模型
 class UserBase(BaseModel):
     """用户基础模型"""
@@ -111,15 +113,27 @@ class QuotaUpdate(BaseModel):
     unit_price: Optional[Decimal] = Field(None, ge=0, decimal_places=2)
     effective_date: Optional[date] = None
 
-class QuotaInDB(QuotaBase):
-    """数据库中的定额模型"""
+class QuotaInDB(BaseModel):
+    """数据库中的定额模型（单价以分保存，响应时转换为元）"""
     id: int
+    process_code: str
+    cat1_code: str
+    cat2_code: str
+    model_name: str
+    unit_price_cents: int = Field(..., exclude=True)
+    effective_date: date
     created_by: int
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+    @computed_field
+    @property
+    def unit_price(self) -> Decimal:
+        """单价（元）"""
+        return from_cents(self.unit_price_cents)
+
 class Quota(QuotaInDB):
     """返回给客户端的定额模型"""
     process: Optional[Process] = None
@@ -142,21 +156,79 @@ class WorkRecordUpdate(BaseModel):
     quantity: Optional[Decimal] = Field(None, ge=0, decimal_places=2)
     record_date: Optional[date] = None
 
-class WorkRecordInDB(WorkRecordBase):
-    """数据库中的工作记录模型"""
+class WorkRecordInDB(BaseModel):
+    """数据库中的工作记录模型（数量、单价和金额以整数保存，响应时转换为两位小数）"""
     id: int
+    worker_code: str
+    quota_id: int
+    quantity_hundredths: int = Field(..., exclude=True)
+    unit_price_cents: Optional[int] = Field(None, exclude=True)
+    amount_cents: Optional[int] = Field(None, exclude=True)
+    record_date: date
     created_by: int
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+    @computed_field
+    @property
+    def quantity(self) -> Decimal:
+        """数量"""
+        return from_hundredths(self.quantity_hundredths)
+
+    @computed_field
+    @property
+    def unit_price(self) -> Optional[Decimal]:
+        """录入时的单价（元）"""
+        return from_cents(self.unit_price_cents)
+
+    @computed_field
+    @property
+    def amount(self) -> Optional[Decimal]:
+        """金额（元）"""
+        return from_cents(self.amount_cents)
+
 class WorkRecord(WorkRecordInDB):
     """返回给客户端的工作记录模型"""
     worker: Optional[Worker] = None
     quota: Optional[Quota] = None
     creator: Optional[User] = None
 
+class WorkRecordRepriceRequest(BaseModel):
+    """工作记录重新计价请求（条件均为空时处理全部记录）"""
+    quota_id: Optional[int] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+class WorkRecordRepriceResult(BaseModel):
+    """工作记录重新计价结果"""
+    updated: int = Field(..., description="单价发生变化并被更新的记录数")
+
+class WorkRecordImportError(BaseModel):
+    """导入失败的行及其全部问题"""
+    row: int = Field(..., description="上传文件中的行号（表头为第1行）；批量提交时为数组中的序号（从1开始）")
+    errors: List[str]
+
+class WorkRecordImportResult(BaseModel):
+    """工作记录导入结果"""
+    dry_run: bool = False
+    total_rows: int
+    imported: int
+    failed: int
+    errors: List[WorkRecordImportError] = Field(..., description="正式导入时为前100个错误（完整列表见错误表），试算时为全部错误")
+    error_report_url: Optional[str] = Field(None, description="错误表下载地址（没有错误或试算时为空）")
+
+class WorkRecordBatchRow(BaseModel):
+    """批量提交的一行：各字段与导入文件的列相同，按原样接收，在逐行诊断中报告问题"""
+    worker: Any = None
+    process: Any = None
+    cat1: Any = None
+    cat2: Any = None
+    model: Any = None
+    quantity: Any = None
+    record_date: Any = None
+
 # 工资记录视图相关模型
 class SalaryRecordBase(BaseModel):
     """工资记录基础模型"""
@@ -174,11 +246,15 @@ class SalaryRecordUpdate(BaseModel):
     quantity: Optional[Decimal] = Field(None, ge=0, decimal_places=2)
     record_date: Optional[date] = None
 
-class SalaryRecordInDB(SalaryRecordBase):
-    """数据库中的工资记录模型"""
+class SalaryRecordInDB(BaseModel):
+    """数据库中的工资记录模型（数量、单价和金额以整数保存，响应时转换为两位小数）"""
     id: int
-    unit_price: Decimal
-    amount: Decimal
+    worker_code: str
+    quota_id: int
+    quantity_hundredths: int = Field(..., exclude=True)
+    unit_price_cents: Optional[int] = Field(None, exclude=True)
+    amount_cents: Optional[int] = Field(None, exclude=True)
+    record_date: date
     created_by: int
     created_at: datetime
     model_display: Optional[str] = None
@@ -189,6 +265,24 @@ class SalaryRecordInDB(SalaryRecordBase):
     class Config:
         from_attributes = True
 
+    @computed_field
+    @property
+    def quantity(self) -> Decimal:
+        """数量"""
+        return from_hundredths(self.quantity_hundredths)
+
+    @computed_field
+    @property
+    def unit_price(self) -> Optional[Decimal]:
+        """录入时的单价（元）"""
+        return from_cents(self.unit_price_cents)
+
+    @computed_field
+    @property
+    def amount(self) -> Optional[Decimal]:
+        """金额（元）"""
+        return from_cents(self.amount_cents)
+
 class SalaryRecord(SalaryRecordInDB):
     """返回给客户端的工资记录模型"""
     worker: Optional[Worker] = None
@@ -242,6 +336,100 @@ class SalarySummaryReport(BaseModel):
     total_amount: Decimal
     category_summary: List[dict]
 
+class PayrollGroupTotal(BaseModel):
+    """月末工资按工人/工序/工序类别的汇总"""
+    code: str
+    name: str
+    record_count: int
+    total_quantity: Decimal
+    total_amount: Decimal
+
+class PayrollCrossCheck(BaseModel):
+    """月末工资与SQL汇总的交叉核对结果"""
+    sql_total_amount: Decimal
+    matches: bool
+    mismatched_workers: List[str]
+
+class PayrollReport(BaseModel):
+    """月末工资计算结果"""
+    month: str
+    record_count: int
+    total_quantity: Decimal
+    total_amount: Decimal
+    workers: List[PayrollGroupTotal]
+    processes: List[PayrollGroupTotal]
+    categories: List[PayrollGroupTotal]
+    load_ms: float = Field(..., description="读取工作记录和价目表的耗时（毫秒）")
+    compute_ms: float = Field(..., description="向量化计算的耗时（毫秒）")
+    cross_check: Optional[PayrollCrossCheck] = None
+
+# 调价模拟相关模型
+class RepriceRule(BaseModel):
+    """拟调整的价目规则：按维度编码设定新单价或调整百分比（二选一）"""
+    scope: str = Field(..., pattern="^(model|cat1|cat2|process)$", description="维度：型号、工段类别、工序类别或工序")
+    code: str = Field(..., min_length=1, max_length=20)
+    unit_price: Optional[Decimal] = Field(None, ge=0, decimal_places=2, description="新单价（元）")
+    percent: Optional[Decimal] = Field(None, gt=-100, decimal_places=2, description="调整百分比，如 5 表示上调5%")
+
+class RepriceSimulationRequest(BaseModel):
+    """调价模拟请求"""
+    start_month: str = Field(..., pattern=r"^\d{4}-\d{2}$")
+    end_month: str = Field(..., pattern=r"^\d{4}-\d{2}$")
+    rules: List[RepriceRule] = Field(..., min_length=1)
+    refresh: bool = Field(False, description="忽略缓存的列式副本，重新读取工作记录")
+
+class PayrollDelta(BaseModel):
+    """按工人或工段的工资变化"""
+    code: str
+    name: str
+    record_count: int
+    baseline_amount: Decimal
+    proposed_amount: Decimal
+    delta_amount: Decimal
+
+class RepriceSimulationResult(BaseModel):
+    """调价模拟结果"""
+    start_month: str
+    end_month: str
+    record_count: int
+    affected_records: int
+    baseline_amount: Decimal
+    proposed_amount: Decimal
+    delta_amount: Decimal
+    workers: List[PayrollDelta]
+    workshops: List[PayrollDelta]
+    compute_ms: float
+
+# 多维汇总相关模型
+class AggregateRow(BaseModel):
+    """汇总结果的一个分组：只包含请求的维度（编码维度附带名称，日期为YYYY-MM-DD，周为周一的日期）和度量"""
+    worker: Optional[str] = None
+    worker_name: Optional[str] = None
+    process: Optional[str] = None
+    process_name: Optional[str] = None
+    cat1: Optional[str] = None
+    cat1_name: Optional[str] = None
+    cat2: Optional[str] = None
+    cat2_name: Optional[str] = None
+    model: Optional[str] = None
+    day: Optional[str] = None
+    week: Optional[str] = None
+    month: Optional[str] = None
+    quantity: Optional[Decimal] = None
+    amount: Optional[Decimal] = None
+    record_count: Optional[int] = None
+    distinct_workers: Optional[int] = None
+
+class AggregateResult(BaseModel):
+    """多维汇总结果"""
+    dimensions: List[str]
+    measures: List[str]
+    source: str = Field(..., description="数据来源：rollup（月度汇总表）或 raw（工作记录）")
+    engine: str = Field(..., description="执行汇总的数据库引擎")
+    cached: bool
+    group_count: int = Field(..., description="过滤后的分组总数（取前K名之前）")
+    rows: List[AggregateRow]
+
 
 # 工段类别相关模型
 class ProcessCat1Base(BaseModel):
@@ -328,3 +516,35 @@ class MotorModelSchemaInDB(MotorModelSchemaBase):
 class MotorModelSchema(MotorModelSchemaInDB):
     """返回给客户端的电机型号模型"""
     pass
+
+class MotorModelResolveRequest(BaseModel):
+    """批量解析电机型号请求"""
+    names: List[str] = Field(..., max_length=10000, description="导入表格中的原始型号文本")
+
+class MotorModelResolveResult(BaseModel):
+    """电机型号解析结果"""
+    input: str
+    model_name: Optional[str] = None
+    match: str = Field(..., description="exact/prefix/ambiguous/none")
+    candidates: List[str] = []
+
+# 搜索相关模型
+class TypeaheadResult(BaseModel):
+    """输入联想结果"""
+    type: str = Field(..., description="worker/process")
+    code: str
+    name: Optional[str] = None
+    matched: str = Field(..., description="匹配字段：code/name/pinyin/initials")
+
+class SearchResultItem(BaseModel):
+    """统一搜索结果"""
+    type: str = Field(..., description="process/cat1/cat2/motor_model")
+    code: str
+    name: Optional[str] = None
+    snippet: Optional[str] = Field(None, description="匹配片段，匹配词以<mark>标记")
+    score: float = Field(..., description="排序得分，越小越相关")
+
+class SearchResponse(BaseModel):
+    """统一搜索分页结果"""
+    items: List[SearchResultItem]
+    next_cursor: Optional[str] = None
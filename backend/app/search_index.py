@@ -0,0 +1,147 @@
+"""
+输入联想索引
+
+在内存中维护工人（工号、姓名）和工序（编码、名称）的有序前缀索引，中文名称同时以拼音全拼和首字母建立索引
+（如 "zs"、"zhangsan" 均可匹配 "张三"）。索引跟随基础数据缓存同步：工人或工序表版本变化时，
+只对新增、修改和删除的记录增量更新索引键，不重建整个索引。
+"""
+import bisect
+import logging
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from pypinyin import lazy_pinyin
+
+logger = logging.getLogger(__name__)
+
+# 参与索引的实体类型 -> 基础数据快照中的表
+INDEXED_KINDS = {
+    "worker": "workers",
+    "process": "processes",
+}
+
+_CJK = re.compile(r"[\u4e00-\u9fff]")
+
+def index_keys(code: str, name: str) -> List[Tuple[str, str]]:
+    """
+    生成实体的索引键
+
+    Returns:
+        List[Tuple[str, str]]: (索引键, 匹配字段) 列表，匹配字段为 code/name/pinyin/initials
+    """
+    keys = {code.lower(): "code"}
+    name_key = (name or "").strip().lower()
+    if name_key:
+        keys.setdefault(name_key, "name")
+        if _CJK.search(name_key):
+            syllables = [syllable for syllable in lazy_pinyin(name_key) if syllable.strip()]
+            keys.setdefault("".join(syllables).replace(" ", ""), "pinyin")
+            keys.setdefault("".join(syllable[0] for syllable in syllables), "initials")
+    return [(key, field) for key, field in keys.items() if key]
+
+class TypeaheadIndex:
+    """有序前缀索引：条目为 (索引键, 实体类型, 编码, 匹配字段)，按索引键排序"""
+
+    def __init__(self):
+        self._entries: List[Tuple[str, str, str, str]] = []
+        # (实体类型, 编码) -> (名称, 索引条目列表)
+        self._items: Dict[Tuple[str, str], Tuple[str, List[Tuple[str, str, str, str]]]] = {}
+        # 实体类型 -> 最近一次同步的快照表对象
+        self._sources: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, kind: str, code: str, name: str) -> None:
+        """新增或更新实体（名称未变化时不做任何操作）"""
+        current = self._items.get((kind, code))
+        if current and current[0] == name:
+            return
+        if current:
+            self._remove_entries(current[1])
+        entries = [(key, kind, code, field) for key, field in index_keys(code, name)]
+        for entry in entries:
+            bisect.insort(self._entries, entry)
+        self._items[(kind, code)] = (name, entries)
+
+    def load(self, kind: str, rows) -> None:
+        """首次建立某类实体的索引：一次性生成全部条目后整体排序（避免逐条插入的平方复杂度）"""
+        for code, row in rows.items():
+            entries = [(key, kind, code, field) for key, field in index_keys(code, row.name)]
+            self._entries.extend(entries)
+            self._items[(kind, code)] = (row.name, entries)
+        self._entries.sort()
+
+    def remove(self, kind: str, code: str) -> None:
+        """删除实体"""
+        current = self._items.pop((kind, code), None)
+        if current:
+            self._remove_entries(current[1])
+
+    def _remove_entries(self, entries) -> None:
+        for entry in entries:
+            position = bisect.bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def sync(self, reference) -> None:
+        """与基础数据快照同步：首次同步整体建立索引，之后表对象变化时按记录比对，增量更新变化的实体"""
+        with self._lock:
+            for kind, table_name in INDEXED_KINDS.items():
+                table = reference.table(table_name)
+                if self._sources.get(kind) is table:
+                    continue
+                rows = table.rows
+                if kind not in self._sources:
+                    self.load(kind, rows)
+                    self._sources[kind] = table
+                    logger.debug(f"输入联想索引已建立: kind={kind}, items={len(rows)}, entries={len(self._entries)}")
+                    continue
+                changed = 0
+                for code in [code for item_kind, code in self._items if item_kind == kind and code not in rows]:
+                    self.remove(kind, code)
+                    changed += 1
+                for code, row in rows.items():
+                    current = self._items.get((kind, code))
+                    if not current or current[0] != row.name:
+                        self.upsert(kind, code, row.name)
+                        changed += 1
+                self._sources[kind] = table
+                logger.debug(f"输入联想索引已同步: kind={kind}, changed={changed}, entries={len(self._entries)}")
+
+    def search(self, query: str, limit: int = 10, kinds: Optional[List[str]] = None) -> List[dict]:
+        """
+        前缀查询
+
+        Args:
+            query: 查询文本（编码、名称、拼音全拼或首字母的前缀，不区分大小写）
+            limit: 最多返回的实体数
+            kinds: 限定的实体类型，None表示全部
+
+        Returns:
+            List[dict]: 匹配的实体，完全匹配的键排在前面，其余按键的字典序
+        """
+        prefix = query.strip().lower().replace(" ", "")
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        with self._lock:
+            entries = self._entries
+            position = bisect.bisect_left(entries, (prefix,))
+            while position < len(entries) and len(results) < limit:
+                key, kind, code, field = entries[position]
+                position += 1
+                if not key.startswith(prefix):
+                    break
+                if (kinds and kind not in kinds) or (kind, code) in seen:
+                    continue
+                seen.add((kind, code))
+                results.append({
+                    "type": kind,
+                    "code": code,
+                    "name": self._items[(kind, code)][0],
+                    "matched": field,
+                })
+        return results
+
+typeahead_index = TypeaheadIndex()
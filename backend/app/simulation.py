@@ -0,0 +1,163 @@
+"""
+定额调价模拟
+
+按拟调整的价目规则（按型号、工段类别、工序类别或工序设定新单价或调整百分比）重新计算一段月份的工资，
+返回按工人和工段（cat1）的工资变化。计算在工作记录的内存列式副本上进行，不修改数据库。
+同一月份区间的列式副本按工作记录和定额表的版本号缓存，交互式地反复调整规则时不必重复读取数据库，
+数据变更后自动重新读取。
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+from .payroll_engine import (
+    QUOTA_DIMENSIONS, PayrollRecords, PriceBook, amounts, load_price_book, load_records, record_unit_prices,
+)
+from .reference_cache import reference_cache
+from .utils.money import from_cents, to_cents, to_hundredths
+from .utils.query_helpers import month_bounds
+
+logger = logging.getLogger(__name__)
+
+# 最多缓存的月份区间数
+SIMULATION_CACHE_SIZE = int(os.getenv("SIMULATION_CACHE_SIZE", "4"))
+
+# 价目规则的调整方式
+KEEP, ABSOLUTE, PERCENT = 0, 1, 2
+# 百分比以万分之一为单位（percent × 100）
+PERCENT_SCALE = 10000
+
+# 列式副本依赖的表（版本号由数据库触发器维护，任一表变化后缓存失效）
+DEPENDENT_TABLES = ("work_records", "quotas")
+
+# (起始月份, 结束月份) -> (加载时间, 表版本号, 工作记录, 价目表)
+_cache: Dict[Tuple[str, str], Tuple[float, Tuple[Optional[int], ...], PayrollRecords, PriceBook]] = {}
+_cache_lock = threading.Lock()
+
+def _data_version(db: Session) -> Tuple[Optional[int], ...]:
+    versions = dict(db.execute(
+        select(models.TableVersion.table_name, models.TableVersion.version)
+        .where(models.TableVersion.table_name.in_(DEPENDENT_TABLES))
+    ).all())
+    return tuple(versions.get(table_name) for table_name in DEPENDENT_TABLES)
+
+def _load(db: Session, start_month: str, end_month: str, refresh: bool) -> Tuple[PayrollRecords, PriceBook]:
+    start, _ = month_bounds(start_month)
+    _, end = month_bounds(end_month)
+    if start >= end:
+        raise ValueError("start_month must not be after end_month")
+
+    key = (start_month, end_month)
+    version = _data_version(db)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached and not refresh and cached[1] == version:
+        return cached[2], cached[3]
+
+    record_date = models.WorkRecord.record_date
+    records = load_records(db, record_date >= start, record_date < end)
+    book = load_price_book(db)
+    logger.debug(f"加载调价模拟数据: months={key}, version={version}, records={len(records)}")
+    with _cache_lock:
+        _cache[key] = (time.monotonic(), version, records, book)
+        # 超出容量时淘汰最早加载的区间
+        while len(_cache) > SIMULATION_CACHE_SIZE:
+            del _cache[min(_cache, key=lambda k: _cache[k][0])]
+    return records, book
+
+def clear_cache() -> None:
+    """清空列式副本缓存"""
+    with _cache_lock:
+        _cache.clear()
+
+def quota_adjustments(book: PriceBook, rules: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    将价目规则展开为以定额ID为下标的调整方式和调整值（同一定额匹配多条规则时后面的规则生效）
+
+    Raises:
+        ValueError: 规则的维度不合法，或没有恰好给出新单价和调整百分比之一
+    """
+    kind = np.full(len(book.unit_price_cents), KEEP, np.int8)
+    value = np.zeros(len(book.unit_price_cents), np.int64)
+    for rule in rules:
+        scope = rule["scope"]
+        if scope not in QUOTA_DIMENSIONS:
+            raise ValueError(f"Unknown scope: {scope}")
+        if (rule.get("unit_price") is None) == (rule.get("percent") is None):
+            raise ValueError("Each rule needs exactly one of unit_price or percent")
+        codes = book.codes[scope]
+        if rule["code"] not in codes:
+            continue
+        mask = book.indexes[scope] == codes.index(rule["code"])
+        if rule.get("unit_price") is not None:
+            kind[mask], value[mask] = ABSOLUTE, to_cents(rule["unit_price"])
+        else:
+            kind[mask], value[mask] = PERCENT, to_hundredths(rule["percent"])
+    return kind, value
+
+def proposed_unit_prices(records: PayrollRecords, book: PriceBook, rules: List[Dict[str, Any]]) -> np.ndarray:
+    """按价目规则计算每条工作记录的拟调整单价（分）；百分比按记录原单价调整，四舍五入到分"""
+    kind, value = quota_adjustments(book, rules)
+    baseline = record_unit_prices(records, book)
+    record_kind = kind[records.quota_id]
+    record_value = value[records.quota_id]
+    scaled = (baseline * (PERCENT_SCALE + record_value) + PERCENT_SCALE // 2) // PERCENT_SCALE
+    return np.where(record_kind == ABSOLUTE, record_value, np.where(record_kind == PERCENT, scaled, baseline))
+
+def _delta_report(index: np.ndarray, codes: List[str], baseline: np.ndarray, proposed: np.ndarray, names, default_name: str):
+    size = len(codes)
+    counts = np.bincount(index, minlength=size)
+    baseline_totals = np.rint(np.bincount(index, weights=baseline, minlength=size)).astype(np.int64)
+    proposed_totals = np.rint(np.bincount(index, weights=proposed, minlength=size)).astype(np.int64)
+    report = []
+    for i in sorted(np.flatnonzero(counts), key=lambda i: codes[i]):
+        row = names.get(codes[i])
+        report.append({
+            "code": codes[i],
+            "name": row.name if row else default_name,
+            "record_count": int(counts[i]),
+            "baseline_amount": from_cents(int(baseline_totals[i])),
+            "proposed_amount": from_cents(int(proposed_totals[i])),
+            "delta_amount": from_cents(int(proposed_totals[i] - baseline_totals[i])),
+        })
+    return report
+
+def simulate_reprice(
+    db: Session, start_month: str, end_month: str, rules: List[Dict[str, Any]], refresh: bool = False
+) -> Dict[str, Any]:
+    """
+    模拟按价目规则调价后的工资变化（不修改数据库）
+
+    Raises:
+        ValueError: 月份格式或区间不合法、规则不合法
+    """
+    records, book = _load(db, start_month, end_month, refresh)
+    started = time.perf_counter()
+    baseline_prices = record_unit_prices(records, book)
+    proposed_prices = proposed_unit_prices(records, book, rules)
+    baseline = amounts(baseline_prices, records.quantity_hundredths)
+    proposed = amounts(proposed_prices, records.quantity_hundredths)
+    workshop_index = book.indexes["cat1"][records.quota_id]
+
+    reference = reference_cache.get(db)
+    result = {
+        "start_month": start_month,
+        "end_month": end_month,
+        "record_count": len(records),
+        "affected_records": int(np.count_nonzero(baseline_prices != proposed_prices)),
+        "baseline_amount": from_cents(int(baseline.sum())),
+        "proposed_amount": from_cents(int(proposed.sum())),
+        "delta_amount": from_cents(int(proposed.sum() - baseline.sum())),
+        "workers": _delta_report(records.worker_index, records.worker_codes, baseline, proposed, reference.workers, "未知工人"),
+        "workshops": _delta_report(workshop_index, book.codes["cat1"], baseline, proposed, reference.process_cat1, "未知工段"),
+    }
+    result["compute_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(f"调价模拟完成: months=({start_month}, {end_month}), records={len(records)}, compute={result['compute_ms']}ms")
+    return result
@@ -0,0 +1,39 @@
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from ..jobs import Job, job_manager
+
+logger = logging.getLogger(__name__)
+
+def submit_cascade_delete(
+    kind: str, delete_fn: Callable[..., Optional[Dict[str, Any]]], key: Any, total: int, created_by: Optional[int] = None
+) -> Job:
+    """
+    将级联删除提交为后台任务
+    
+    Args:
+        kind: 删除对象类型（worker/process/quota）
+        delete_fn: crud中的删除函数，需支持job参数以分批删除并上报进度
+        key: 删除对象的主键
+        total: 需要删除的工作记录数
+        created_by: 提交删除的用户ID（任务只对该用户和管理员可见）
+        
+    Returns:
+        Job: 后台任务
+    """
+    def run(job: Job) -> Optional[Dict[str, Any]]:
+        db = job_manager.session_factory()
+        try:
+            info = delete_fn(db, key, job=job)
+            if info is None:
+                raise ValueError(f"{kind} {key} 不存在")
+            return info
+        finally:
+            db.close()
+
+    logger.info(f"级联删除转为后台任务: kind={kind}, key={key}, total={total}")
+    return job_manager.submit(f"cascade_delete_{kind}", run, total=total, created_by=created_by)
+
+def accepted_response(job: Job, **extra) -> Dict[str, Any]:
+    """后台删除任务已受理时的响应内容"""
+    return {"message": "删除任务已提交，请通过任务接口查询进度", "job_id": job.id, "status": job.status, **extra}
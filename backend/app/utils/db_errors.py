@@ -0,0 +1,36 @@
+import re
+from typing import Set
+from sqlalchemy.exc import IntegrityError
+
+# SQLite: "UNIQUE constraint failed: processes.name"
+_SQLITE_COLUMNS = re.compile(r"constraint failed: (.+)$")
+# PostgreSQL: 'DETAIL:  Key (process_code)=(P001) already exists.'
+_POSTGRESQL_KEY = re.compile(r"Key \(([^)]+)\)=")
+
+def violated_columns(exc: IntegrityError) -> Set[str]:
+    """
+    从完整性错误中解析出违反约束的列名（兼容SQLite和PostgreSQL的错误信息）
+    
+    Args:
+        exc: 完整性错误
+        
+    Returns:
+        Set[str]: 列名集合，无法解析时为空集合（SQLite的外键错误不包含列信息）
+    """
+    message = str(exc.orig)
+    match = _POSTGRESQL_KEY.search(message)
+    if match:
+        return {column.strip() for column in match.group(1).split(",")}
+    match = _SQLITE_COLUMNS.search(message.splitlines()[0] if message else "")
+    if match:
+        return {column.strip().split(".")[-1] for column in match.group(1).split(",")}
+    return set()
+
+def is_unique_violation(exc: IntegrityError) -> bool:
+    """是否为唯一约束（含主键）冲突"""
+    message = str(exc.orig).lower()
+    return "unique" in message or "duplicate key" in message
+
+def is_foreign_key_violation(exc: IntegrityError) -> bool:
+    """是否为外键约束冲突"""
+    return "foreign key" in str(exc.orig).lower()
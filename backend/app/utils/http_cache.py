@@ -0,0 +1,62 @@
+import hashlib
+import logging
+import os
+from typing import Optional
+from fastapi import Request, Response, status
+from sqlalchemy.orm import Session
+
+from ..reference_cache import reference_cache
+
+logger = logging.getLogger(__name__)
+
+# 基础数据响应的缓存时间（秒），默认0：浏览器可缓存但每次使用前需用ETag重新验证
+REFERENCE_DATA_MAX_AGE = int(os.getenv("REFERENCE_DATA_MAX_AGE", "0"))
+
+def get_table_version(db: Session, table_name: str) -> int:
+    """获取数据表的变更版本号（取自本请求的基础数据快照，不访问数据表本身）"""
+    return reference_cache.get(db).version(table_name)
+
+def make_etag(table_name: str, version: int, *key_parts) -> str:
+    """
+    生成强ETag
+
+    Args:
+        table_name: 表名
+        version: 表的变更版本号
+        key_parts: 区分同一张表不同响应的参数（如分页参数、主键）
+
+    Returns:
+        str: 带引号的ETag
+    """
+    key = "|".join(str(part) for part in key_parts)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    return f'"{table_name}-{version}-{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判断If-None-Match请求头是否与ETag匹配（按RFC 7232使用弱比较）"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def cache_headers(etag: str) -> dict:
+    """基础数据响应的缓存相关头"""
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={REFERENCE_DATA_MAX_AGE}, must-revalidate",
+    }
+
+def conditional_get(request: Request, response: Response, db: Session, table_name: str, *key_parts) -> Optional[Response]:
+    """
+    处理基础数据的条件请求
+
+    If-None-Match与当前ETag一致时返回304响应（不查询数据表），否则在响应上设置ETag和Cache-Control并返回None，
+    由调用方继续正常查询。
+    """
+    etag = make_etag(table_name, get_table_version(db, table_name), *key_parts)
+    headers = cache_headers(etag)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        logger.debug(f"基础数据未变更，返回304: table={table_name}, etag={etag}")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,106 @@
+import bisect
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+# 别名分隔符：英文/中文逗号、分号和顿号
+_ALIAS_SEPARATORS = re.compile(r"[,，;；、]")
+# 规范化时去除的字符：空白、连字符、下划线和点
+_IGNORED_CHARACTERS = re.compile(r"[\s\-_.]+")
+
+def normalize_model_name(value: str) -> str:
+    """
+    规范化电机型号名称或别名
+
+    全角转半角、转大写并去除空白和连字符等分隔字符，如 " y-100 " 和 "Ｙ100" 均规范化为 "Y100"。
+    """
+    return _IGNORED_CHARACTERS.sub("", unicodedata.normalize("NFKC", value or "")).upper()
+
+def split_aliases(aliases: Optional[str]) -> List[Tuple[str, str]]:
+    """
+    拆分别名字符串
+
+    Args:
+        aliases: 以逗号等分隔的别名字符串
+
+    Returns:
+        List[Tuple[str, str]]: (规范化别名, 原始别名) 列表，按规范化别名去重
+    """
+    result = {}
+    for alias in _ALIAS_SEPARATORS.split(aliases or ""):
+        alias = alias.strip()
+        normalized = normalize_model_name(alias)
+        if normalized and normalized not in result:
+            result[normalized] = alias
+    return list(result.items())
+
+class ModelNameIndex:
+    """电机型号名称索引：规范化名称/别名的精确匹配表和用于前缀查找的有序键列表"""
+
+    def __init__(self, model_names: List[str], aliases: List[Tuple[str, str]]):
+        exact: Dict[str, str] = {}
+        # 别名先写入，型号名称本身优先级更高，覆盖同名别名
+        for normalized, model_name in aliases:
+            exact[normalized] = model_name
+        for model_name in model_names:
+            exact[normalize_model_name(model_name)] = model_name
+        self.exact = exact
+        self.keys = sorted(exact)
+
+    def prefix_candidates(self, normalized: str, limit: int = 10) -> List[str]:
+        """以normalized为前缀的键对应的型号（去重，按键排序）"""
+        candidates = []
+        start = bisect.bisect_left(self.keys, normalized)
+        for key in self.keys[start:]:
+            if not key.startswith(normalized):
+                break
+            model_name = self.exact[key]
+            if model_name not in candidates:
+                candidates.append(model_name)
+                if len(candidates) >= limit:
+                    break
+        return candidates
+
+    def resolve(self, raw: str) -> dict:
+        """
+        将导入表格中的型号文本解析为标准型号名称
+
+        先按规范化后的名称/别名精确匹配；否则按前缀查找，唯一候选时视为匹配，多个候选时返回ambiguous。
+        """
+        normalized = normalize_model_name(raw)
+        if not normalized:
+            return {"input": raw, "model_name": None, "match": "none", "candidates": []}
+        model_name = self.exact.get(normalized)
+        if model_name:
+            return {"input": raw, "model_name": model_name, "match": "exact", "candidates": [model_name]}
+        candidates = self.prefix_candidates(normalized)
+        if len(candidates) == 1:
+            return {"input": raw, "model_name": candidates[0], "match": "prefix", "candidates": candidates}
+        return {
+            "input": raw,
+            "model_name": None,
+            "match": "ambiguous" if candidates else "none",
+            "candidates": candidates,
+        }
+
+_index_lock = threading.Lock()
+_index_source = None
+_index: Optional[ModelNameIndex] = None
+
+def get_model_name_index(reference) -> ModelNameIndex:
+    """
+    获取基础数据快照对应的型号名称索引
+
+    电机型号或别名表的版本变化（即型号写入）后快照中的表对象会被替换，此时重建索引；否则复用已有索引。
+    """
+    global _index_source, _index
+    source = (reference.motor_models, reference.motor_model_aliases)
+    with _index_lock:
+        if _index is None or _index_source is None or any(a is not b for a, b in zip(source, _index_source)):
+            _index = ModelNameIndex(
+                list(reference.motor_models.rows),
+                [(row.normalized_alias, row.model_name) for row in reference.motor_model_aliases.rows.values()],
+            )
+            _index_source = source
+        return _index
@@ -0,0 +1,60 @@
+"""
+金额和数量的整数表示
+
+数据库中金额以分、数量以百分之一为单位保存为整数，汇总在SQL中做精确的整数求和；
+只在API边界（请求解析和响应序列化）与保留两位小数的Decimal互相转换。
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+
+# 金额和数量的放大倍数（两位小数）
+CENTS = 100
+HUNDREDTHS = 100
+
+def _to_scaled(value: Decimal, scale: int) -> int:
+    return int((Decimal(value) * scale).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+def _from_scaled(value: Optional[int], exponent: int) -> Optional[Decimal]:
+    if value is None:
+        return None
+    return Decimal(int(value)).scaleb(exponent)
+
+def to_cents(value: Decimal) -> int:
+    """将元（Decimal）转换为分（四舍五入）"""
+    return _to_scaled(value, CENTS)
+
+def from_cents(cents: Optional[int]) -> Optional[Decimal]:
+    """将分转换为保留两位小数的元（Decimal）"""
+    return _from_scaled(cents, -2)
+
+def to_hundredths(value: Decimal) -> int:
+    """将数量（Decimal）转换为以百分之一为单位的整数（四舍五入）"""
+    return _to_scaled(value, HUNDREDTHS)
+
+def from_hundredths(hundredths: Optional[int]) -> Optional[Decimal]:
+    """将以百分之一为单位的整数转换为保留两位小数的数量（Decimal）"""
+    return _from_scaled(hundredths, -2)
+
+def amount_cents(unit_price_cents: int, quantity_hundredths: int) -> int:
+    """金额（分）= 单价（分）× 数量，按分四舍五入（整数运算，与SQL中的计算一致）"""
+    return (unit_price_cents * quantity_hundredths + HUNDREDTHS // 2) // HUNDREDTHS
+
+# 接口字段 -> (数据库整数列, 转换函数)
+SCALED_FIELDS = {
+    "unit_price": ("unit_price_cents", to_cents),
+    "quantity": ("quantity_hundredths", to_hundredths),
+}
+
+def scaled_values(data: dict) -> dict:
+    """
+    将请求数据中的小数单价和数量替换为对应的整数列（用于写入数据库）
+
+    显式传入的null视为未提供（对应列不能为空，更新时保持原值）。
+    """
+    values = dict(data)
+    for field, (column, convert) in SCALED_FIELDS.items():
+        if field in values:
+            value = values.pop(field)
+            if value is not None:
+                values[column] = convert(value)
+    return values
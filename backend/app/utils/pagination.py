@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List
+
+from sqlalchemy import Date, DateTime, Integer, Numeric, tuple_
+
+def encode_cursor(*values: Any) -> str:
+    """将排序键编码为不透明的游标（日期和Decimal按字符串保存）"""
+    raw = json.dumps(list(values), ensure_ascii=False, default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    解析游标
+
+    Args:
+        cursor: encode_cursor生成的游标
+        size: 排序键的个数
+
+    Raises:
+        ValueError: 游标格式不合法
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+def column_value(column, value: Any) -> Any:
+    """将游标中的值按列类型还原（格式不合法时抛出ValueError）"""
+    try:
+        if isinstance(column.type, Date):
+            return date.fromisoformat(value)
+        if isinstance(column.type, DateTime):
+            return datetime.fromisoformat(value)
+        if isinstance(column.type, Numeric):
+            return Decimal(str(value))
+        if isinstance(column.type, Integer):
+            return int(value)
+        return str(value)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor value: {value}") from e
+
+def keyset_condition(sort_column, id_column, descending: bool, cursor: str):
+    """
+    构造游标分页的条件：(排序列, id) 在上一页最后一行之后
+
+    使用行值比较，SQLite与PostgreSQL都可以直接利用 (排序列, id) 上的复合索引。
+    """
+    sort_value, id_value = decode_cursor(cursor, 2)
+    key = tuple_(sort_column, id_column)
+    last = tuple_(column_value(sort_column, sort_value), column_value(id_column, id_value))
+    return key < last if descending else key > last
@@ -0,0 +1,56 @@
+import logging
+from datetime import date, datetime
+from typing import Tuple
+from sqlalchemy import and_
+
+logger = logging.getLogger(__name__)
+
+def month_bounds(month: str) -> Tuple[date, date]:
+    """
+    获取月份的日期区间
+    
+    Args:
+        month: 月份（格式：YYYY-MM）
+        
+    Returns:
+        Tuple[date, date]: 月初日期和下月初日期，区间为左闭右开
+        
+    Raises:
+        ValueError: 月份格式不合法
+    """
+    start = datetime.strptime(month, "%Y-%m").date()
+    end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start, end
+
+def month_filter(column, month: str):
+    """
+    构造按月份过滤的条件
+    
+    使用日期区间比较而不是strftime等方言函数，SQLite与PostgreSQL通用，且可以使用日期列上的索引。
+    
+    Args:
+        column: 日期列
+        month: 月份（格式：YYYY-MM）
+        
+    Returns:
+        按月份过滤的SQL条件
+    """
+    start, end = month_bounds(month)
+    return and_(column >= start, column < end)
+
+def month_or_date_filter(column, value: str):
+    """
+    构造按月份（YYYY-MM）过滤的条件，格式不合法时按具体日期（YYYY-MM-DD）过滤
+    
+    Args:
+        column: 日期列
+        value: 月份或日期字符串
+        
+    Returns:
+        SQL过滤条件
+    """
+    try:
+        return month_filter(column, value)
+    except ValueError:
+        logger.warning(f"Invalid record_date format: {value}, expected YYYY-MM")
+        return column == value
@@ -0,0 +1,149 @@
+"""
+相同请求合并（single-flight）
+
+并发的相同只读请求（按路由和规范化后的参数组成键）共享同一次正在进行的计算：第一个请求执行查询，
+其余请求等待并得到同一个结果（或同一个异常）。计算结束后立即移除，之后的请求重新计算，不缓存结果。
+异步路由在事件循环中用Future等待，同步路由（在线程池中执行）用Event等待。
+共享的结果对象由多个请求同时序列化，调用方不得修改。
+"""
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+@dataclass
+class FlightStats:
+    """按路由统计的合并情况"""
+    calls: int = 0
+    executions: int = 0
+    coalesced: int = 0
+    waiting: int = 0
+    max_waiters: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "waiting": self.waiting,
+            "max_waiters": self.max_waiters,
+        }
+
+@dataclass
+class _Call:
+    """正在进行的一次计算"""
+    waiters: int = 0
+    done: threading.Event = field(default_factory=threading.Event)
+    future: Optional[asyncio.Future] = None
+    result: Any = None
+    error: Optional[BaseException] = None
+
+def flight_key(route: str, **params) -> Tuple[str, Tuple[Tuple[str, Any], ...]]:
+    """请求键：路由名和按名称排序的参数（字符串参数去掉首尾空白）"""
+    return route, tuple(sorted((name, value.strip() if isinstance(value, str) else value) for name, value in params.items()))
+
+class SingleFlight:
+    """相同请求合并器"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats: Dict[str, FlightStats] = {}
+        self._lock = threading.Lock()
+
+    def _enter(self, key: Tuple[str, Any], make_future: bool) -> Tuple[_Call, bool]:
+        """登记一次调用，返回(计算, 是否由本调用执行)"""
+        with self._lock:
+            stats = self._stats.setdefault(key[0], FlightStats())
+            stats.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                stats.coalesced += 1
+                stats.waiting += 1
+                stats.max_waiters = max(stats.max_waiters, call.waiters)
+                return call, False
+            call = _Call(future=asyncio.get_running_loop().create_future() if make_future else None)
+            self._calls[key] = call
+            stats.executions += 1
+            return call, True
+
+    def _leave_waiter(self, key: Tuple[str, Any]) -> None:
+        with self._lock:
+            self._stats[key[0]].waiting -= 1
+
+    def _finish(self, key: Tuple[str, Any], call: _Call) -> None:
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def do(self, key: Tuple[str, Any], fn: Callable[[], T]) -> T:
+        """同步路由：相同键的并发调用只执行一次fn"""
+        call, leader = self._enter(key, make_future=False)
+        if not leader:
+            try:
+                call.done.wait()
+            finally:
+                self._leave_waiter(key)
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+            call.done.set()
+
+    async def do_async(self, key: Tuple[str, Any], fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        异步路由：相同键的并发调用只执行一次fn
+
+        等待方被取消不影响执行方；执行方被取消（客户端断开）时，等待方各自重新执行。
+        """
+        call, leader = self._enter(key, make_future=True)
+        if not leader:
+            try:
+                return await asyncio.shield(call.future)
+            except asyncio.CancelledError:
+                if not call.future.cancelled():
+                    raise
+            finally:
+                self._leave_waiter(key)
+            logger.debug(f"合并请求的执行方已取消，重新执行: key={key}")
+            return await self.do_async(key, fn)
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            call.future.cancel()
+            raise
+        except BaseException as e:
+            if call.waiters:
+                call.future.set_exception(e)
+            else:
+                call.future.cancel()
+            raise
+        else:
+            call.future.set_result(result)
+            return result
+        finally:
+            self._finish(key, call)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """按路由的合并统计：调用数、实际执行数、被合并的调用数、当前等待数和单次计算的最大等待数"""
+        with self._lock:
+            return {route: stats.to_dict() for route, stats in sorted(self._stats.items())}
+
+    def clear(self) -> None:
+        """清空统计（测试用）"""
+        with self._lock:
+            self._stats.clear()
+
+single_flight = SingleFlight()
@@ -0,0 +1,102 @@
+"""
+边生成边发送的文件响应
+
+生成方（openpyxl、zipfile等只接受文件对象的库）在后台线程中写入 ChunkQueue，数据按块放入有界队列；
+响应迭代 stream_in_thread 返回的迭代器逐块发送。队列有界，客户端读取慢时生成方等待，内存占用与文件大小无关。
+"""
+import logging
+import os
+import queue
+import threading
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# 发送给客户端的数据块大小（字节）和队列中最多积压的块数
+STREAM_CHUNK_BYTES = int(os.getenv("STREAM_CHUNK_BYTES", "65536"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "16"))
+
+class StreamCancelled(Exception):
+    """客户端断开连接，停止生成"""
+
+class ChunkQueue:
+    """
+    可写的文件对象：写入的数据按块放入有界队列，由响应逐块读取
+
+    不提供tell/seek，ZipFile以流式模式写入（每个文件后写数据描述符）。
+    读取方停止读取（客户端断开）时设置cancelled，写入方在下一次写入时抛出StreamCancelled。
+    """
+
+    def __init__(self, chunk_bytes: int, max_chunks: int):
+        self.chunk_bytes = chunk_bytes
+        self.chunks: queue.Queue = queue.Queue(max_chunks)
+        self.cancelled = threading.Event()
+        self._buffer = bytearray()
+        self._stopped = False
+
+    def put(self, item) -> None:
+        """放入一个块（队列已满时等待；取消后第一次写入抛出StreamCancelled，之后的写入直接丢弃）"""
+        while True:
+            if self.cancelled.is_set():
+                if self._stopped:
+                    return
+                self._stopped = True
+                raise StreamCancelled()
+            try:
+                self.chunks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_bytes:
+            self.put(bytes(self._buffer))
+            self._buffer.clear()
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        """发送剩余数据和结束标记"""
+        if self._buffer:
+            self.put(bytes(self._buffer))
+            self._buffer.clear()
+        self.put(None)
+
+def stream_in_thread(produce: Callable[[ChunkQueue], None], name: str) -> Iterator[bytes]:
+    """
+    在后台线程中执行produce(output)，逐块返回写入output的数据
+
+    produce应在耗时的循环中检查 output.cancelled；迭代器被关闭（客户端断开）时通知生成线程停止并等待其退出。
+    produce抛出的异常在迭代器中重新抛出。
+    """
+    output = ChunkQueue(STREAM_CHUNK_BYTES, STREAM_QUEUE_SIZE)
+
+    def run() -> None:
+        try:
+            produce(output)
+            output.close()
+        except StreamCancelled:
+            logger.info(f"客户端已断开，停止生成: {name}")
+        except Exception as e:
+            logger.error(f"生成失败: {name}, error={e}", exc_info=True)
+            try:
+                output.put(e)
+            except StreamCancelled:
+                pass
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk = output.chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        output.cancelled.set()
+        thread.join()
@@ -0,0 +1,514 @@
+"""
+工作记录批量导入
+
+流式解析上传的 .xlsx（openpyxl只读模式）或 .csv 文件，逐行通过内存中的基础数据快照解析工人（工号或姓名）、
+工序（编码或名称）、工段/工序类别和电机型号（名称或别名），按记录日期绑定当日生效的定额，并按批插入工作记录。
+解析失败的行写入错误表（与上传文件同格式，附行号和错误原因）供下载。试算与实际导入使用相同的校验（包括文件内的重复行）。
+内存占用只与批大小和定额数量有关，另外每个有效行只保留一个整数哈希和行号用于重复检查，不保留行内容。
+"""
+import bisect
+import csv
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import Workbook, load_workbook
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .reference_cache import ReferenceData, reference_cache
+from .utils.model_aliases import normalize_model_name
+from .utils.money import amount_cents, from_cents, from_hundredths, to_hundredths
+
+logger = logging.getLogger(__name__)
+
+# 每批插入的行数
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+# 错误表的保存目录和保留时间（秒）
+IMPORT_ERROR_DIR = os.getenv("IMPORT_ERROR_DIR", os.path.join(tempfile.gettempdir(), "payroll_import_errors"))
+IMPORT_ERROR_RETENTION_SECONDS = int(os.getenv("IMPORT_ERROR_RETENTION_SECONDS", "86400"))
+# 响应中直接返回的错误行数（完整列表见错误表）
+MAX_REPORTED_ERRORS = 100
+
+SUPPORTED_EXTENSIONS = (".xlsx", ".csv")
+
+# 数量和金额保存为32位整数列（百分之一/分），导入时超出范围的行作为错误行返回
+MAX_SCALED_VALUE = 2 ** 31 - 1
+MAX_QUANTITY = from_hundredths(MAX_SCALED_VALUE)
+
+# 导入字段 -> 可识别的表头
+HEADER_ALIASES = {
+    "worker": ("工号", "工人", "姓名", "worker", "worker_code", "worker_name"),
+    "process": ("工序", "工序编码", "工序名称", "process", "process_code"),
+    "cat1": ("工段类别", "工段", "cat1", "cat1_code"),
+    "cat2": ("工序类别", "cat2", "cat2_code"),
+    "model": ("型号", "电机型号", "model", "model_name"),
+    "quantity": ("数量", "quantity"),
+    "record_date": ("日期", "记录日期", "record_date", "date"),
+}
+REQUIRED_FIELDS = ("worker", "process", "model", "quantity", "record_date")
+
+class ImportFormatError(ValueError):
+    """上传文件无法解析（格式不支持或缺少必需的列）"""
+
+def _cell_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def read_rows(filename: str, file) -> Iterator[Tuple[int, List[str], List[Any]]]:
+    """
+    逐行读取上传文件
+
+    Yields:
+        第一项为表头 (1, 表头, 表头)，之后为 (行号, 表头, 单元格值)
+
+    Raises:
+        ImportFormatError: 文件扩展名不支持
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".xlsx":
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            yield from _numbered_rows(rows)
+        finally:
+            workbook.close()
+    elif extension == ".csv":
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        try:
+            yield from _numbered_rows(csv.reader(text))
+        finally:
+            text.detach()
+    else:
+        raise ImportFormatError(f"Unsupported file type, expected one of {', '.join(SUPPORTED_EXTENSIONS)}")
+
+def _numbered_rows(rows) -> Iterator[Tuple[int, List[str], List[Any]]]:
+    header = None
+    for row_number, values in enumerate(rows, start=1):
+        values = list(values)
+        if header is None:
+            header = [_cell_text(value) for value in values]
+            yield row_number, header, header
+            continue
+        if any(_cell_text(value) for value in values):
+            yield row_number, header, values
+
+def map_columns(header: List[str]) -> Dict[str, int]:
+    """
+    根据表头确定各导入字段所在的列
+
+    Raises:
+        ImportFormatError: 缺少必需的列
+    """
+    positions = {}
+    lowered = [name.lower() for name in header]
+    for field_name, aliases in HEADER_ALIASES.items():
+        for alias in aliases:
+            if alias.lower() in lowered:
+                positions[field_name] = lowered.index(alias.lower())
+                break
+    missing = [field_name for field_name in REQUIRED_FIELDS if field_name not in positions]
+    if missing:
+        raise ImportFormatError(f"Missing columns: {', '.join(missing)}")
+    return positions
+
+def parse_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = _cell_text(value)
+    for pattern in ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d"):
+        try:
+            return datetime.strptime(text, pattern).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date: {text}")
+
+def parse_quantity(value: Any) -> Decimal:
+    try:
+        quantity = Decimal(_cell_text(value))
+    except InvalidOperation:
+        raise ValueError(f"Invalid quantity: {_cell_text(value)}")
+    if not quantity.is_finite():
+        raise ValueError(f"Invalid quantity: {_cell_text(value)}")
+    if quantity > MAX_QUANTITY:
+        raise ValueError(f"Quantity out of range: {_cell_text(value)}")
+    if quantity.normalize().as_tuple().exponent < -2:
+        raise ValueError(f"Quantity must have at most 2 decimal places: {_cell_text(value)}")
+    return quantity
+
+class ImportResolver:
+    """导入时解析编码/名称并绑定生效定额的内存查找表（基础数据快照 + 全部定额的生效日期）"""
+
+    def __init__(self, reference: ReferenceData, quotas, quota_version: Optional[int] = None):
+        self.reference = reference
+        self.quota_version = quota_version
+        self.worker_codes_by_name: Dict[str, List[str]] = {}
+        for worker in reference.workers.rows.values():
+            self.worker_codes_by_name.setdefault(worker.name, []).append(worker.worker_code)
+        self.model_names = {normalize_model_name(name): name for name in reference.motor_models.rows}
+
+        # (工序, 工段类别, 工序类别, 型号) -> 按生效日期升序的 ([生效日期], [(定额ID, 单价分)])
+        self.quota_versions: Dict[Tuple[str, str, str, str], Tuple[List[date], List[Tuple[int, int]]]] = {}
+        # (工序, 型号) -> 定额业务键列表
+        self.quota_keys: Dict[Tuple[str, str], List[Tuple[str, str, str, str]]] = {}
+        for quota in quotas:
+            key = (quota.process_code, quota.cat1_code, quota.cat2_code, quota.model_name)
+            if key not in self.quota_versions:
+                self.quota_versions[key] = ([], [])
+                self.quota_keys.setdefault((quota.process_code, quota.model_name), []).append(key)
+            dates, versions = self.quota_versions[key]
+            dates.append(quota.effective_date)
+            versions.append((quota.id, quota.unit_price_cents))
+
+    def worker_code(self, value: str) -> str:
+        if value in self.reference.workers:
+            return value
+        codes = self.worker_codes_by_name.get(value, [])
+        if len(codes) == 1:
+            return codes[0]
+        if codes:
+            raise ValueError(f"Worker name is ambiguous, use the worker code: {value}")
+        raise ValueError(f"Worker not found: {value}")
+
+    @staticmethod
+    def _code(table, key_column: str, value: str, label: str) -> str:
+        if value in table:
+            return value
+        row = table.by_name.get(value)
+        if row is None:
+            raise ValueError(f"{label} not found: {value}")
+        return getattr(row, key_column)
+
+    def process_code(self, value: str) -> str:
+        return self._code(self.reference.processes, "process_code", value, "Process")
+
+    def cat1_code(self, value: str) -> str:
+        return self._code(self.reference.process_cat1, "cat1_code", value, "Process category 1")
+
+    def cat2_code(self, value: str) -> str:
+        return self._code(self.reference.process_cat2, "cat2_code", value, "Process category 2")
+
+    def model_name(self, value: str) -> str:
+        if value in self.reference.motor_models:
+            return value
+        normalized = normalize_model_name(value)
+        if normalized in self.model_names:
+            return self.model_names[normalized]
+        alias = self.reference.motor_model_aliases.get(normalized)
+        if alias is None:
+            raise ValueError(f"Motor model not found: {value}")
+        return alias.model_name
+
+    def quota(self, process_code: str, model_name: str, record_date: date,
+              cat1_code: Optional[str] = None, cat2_code: Optional[str] = None) -> Tuple[int, int]:
+        """
+        绑定记录日期当天生效的定额
+
+        Returns:
+            Tuple[int, int]: (定额ID, 单价分)
+
+        Raises:
+            ValueError: 没有生效的定额，或未填写类别时匹配到多个定额
+        """
+        matches = []
+        for key in self.quota_keys.get((process_code, model_name), []):
+            if (cat1_code and key[1] != cat1_code) or (cat2_code and key[2] != cat2_code):
+                continue
+            dates, versions = self.quota_versions[key]
+            position = bisect.bisect_right(dates, record_date)
+            if position:
+                matches.append(versions[position - 1])
+        if not matches:
+            raise ValueError(f"No quota in effect for {process_code}/{model_name} on {record_date}")
+        if len(matches) > 1:
+            raise ValueError("Several quotas match, fill in the process categories")
+        return matches[0]
+
+_resolver: Optional[ImportResolver] = None
+_resolver_lock = threading.Lock()
+
+def load_resolver(db: Session) -> ImportResolver:
+    """
+    获取查找表：基础数据快照或定额的版本号（由触发器维护）变化时重建，否则复用上一次的查找表
+
+    试算（dry_run）在每次保存时执行，复用查找表后只需一次版本号查询。
+    """
+    global _resolver
+    reference = reference_cache.get(db)
+    quota_version = db.execute(
+        select(models.TableVersion.version).where(models.TableVersion.table_name == "quotas")
+    ).scalar()
+    resolver = _resolver
+    if (resolver is not None and quota_version is not None
+            and resolver.reference is reference and resolver.quota_version == quota_version):
+        return resolver
+
+    quota = models.Quota
+    quotas = db.execute(
+        select(quota.id, quota.process_code, quota.cat1_code, quota.cat2_code, quota.model_name,
+               quota.effective_date, quota.unit_price_cents).order_by(quota.effective_date, quota.id)
+    ).all()
+    resolver = ImportResolver(reference, quotas, quota_version)
+    with _resolver_lock:
+        _resolver = resolver
+    logger.debug(f"导入查找表已重建: quotas={len(quotas)}, quota_version={quota_version}")
+    return resolver
+
+def resolve_row(resolver: ImportResolver, columns: Dict[str, int], values: List[Any]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """
+    将一行单元格解析为工作记录的列值，收集该行的全部问题而不是遇到第一个就停止
+
+    Returns:
+        (列值, []) 或 (None, 错误列表)
+    """
+    errors = []
+
+    def cell(field_name: str) -> Any:
+        position = columns.get(field_name)
+        return values[position] if position is not None and position < len(values) else None
+
+    def text(field_name: str) -> str:
+        return _cell_text(cell(field_name))
+
+    def attempt(field_name: str, parse, raw: bool = False):
+        if not text(field_name):
+            if field_name in REQUIRED_FIELDS:
+                errors.append(f"Missing {field_name}")
+            return None
+        try:
+            return parse(cell(field_name) if raw else text(field_name))
+        except ValueError as e:
+            errors.append(str(e))
+            return None
+
+    record_date = attempt("record_date", parse_date, raw=True)
+    quantity = attempt("quantity", parse_quantity, raw=True)
+    if quantity is not None and quantity < 0:
+        errors.append(f"Quantity must not be negative: {quantity}")
+    worker_code = attempt("worker", resolver.worker_code)
+    process_code = attempt("process", resolver.process_code)
+    model_name = attempt("model", resolver.model_name)
+    cat1_code = attempt("cat1", resolver.cat1_code)
+    cat2_code = attempt("cat2", resolver.cat2_code)
+    if errors:
+        return None, errors
+    try:
+        quota_id, unit_price_cents = resolver.quota(process_code, model_name, record_date, cat1_code, cat2_code)
+    except ValueError as e:
+        return None, [str(e)]
+    quantity_hundredths = to_hundredths(quantity)
+    amount = amount_cents(unit_price_cents, quantity_hundredths)
+    if amount > MAX_SCALED_VALUE:
+        return None, [f"Amount out of range: {quantity} x {from_cents(unit_price_cents)}"]
+    return {
+        "worker_code": worker_code,
+        "quota_id": quota_id,
+        "quantity_hundredths": quantity_hundredths,
+        "unit_price_cents": unit_price_cents,
+        "amount_cents": amount,
+        "record_date": record_date,
+    }, []
+
+class RowValidator:
+    """逐行校验：解析单元格并检查批次内的重复行（同一工人、定额、日期和数量）"""
+
+    def __init__(self, resolver: ImportResolver, columns: Dict[str, int]):
+        self.resolver = resolver
+        self.columns = columns
+        # 已见过的行的哈希 -> 首次出现的行号（只保存整数，不保存行内容）
+        self.seen: Dict[int, int] = {}
+
+    def validate(self, row_number: int, values: List[Any]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        record, errors = resolve_row(self.resolver, self.columns, values)
+        if record is None:
+            return None, errors
+        key = (record["worker_code"], record["quota_id"], record["record_date"], record["quantity_hundredths"])
+        first = self.seen.setdefault(hash(key), row_number)
+        if first != row_number:
+            return None, [f"Duplicate of row {first}"]
+        return record, []
+
+class ErrorSheet:
+    """
+    错误表：原始表头加“行号”和“错误”两列，按上传文件的格式逐行写入磁盘
+
+    文件名为“{报告ID}_{上传用户ID}{扩展名}”，下载时据此检查只有上传者和管理员可以访问。
+    """
+
+    def __init__(self, extension: str, header: List[str], created_by: int):
+        os.makedirs(IMPORT_ERROR_DIR, exist_ok=True)
+        self.report_id = uuid.uuid4().hex
+        self.path = os.path.join(IMPORT_ERROR_DIR, f"{self.report_id}_{created_by}{extension}")
+        self.rows = 0
+        header = ["行号", "错误"] + header
+        if extension == ".xlsx":
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet("errors")
+            self._sheet.append(header)
+        else:
+            self._workbook = None
+            self._file = open(self.path, "w", encoding="utf-8-sig", newline="")
+            self._sheet = csv.writer(self._file)
+            self._sheet.writerow(header)
+
+    def append(self, row_number: int, message: str, values: List[Any]) -> None:
+        row = [row_number, message] + [_cell_text(value) for value in values]
+        if self._workbook is not None:
+            self._sheet.append(row)
+        else:
+            self._sheet.writerow(row)
+        self.rows += 1
+
+    def close(self) -> Optional[str]:
+        """保存错误表；没有错误行时删除并返回None"""
+        if self._workbook is not None:
+            if self.rows:
+                self._workbook.save(self.path)
+            self._workbook.close()
+        else:
+            self._file.close()
+            if not self.rows:
+                os.remove(self.path)
+        return self.report_id if self.rows else None
+
+def find_error_sheet(report_id: str) -> Optional[Tuple[str, int]]:
+    """
+    查找错误表
+
+    Returns:
+        (文件路径, 上传用户ID)，不存在时返回None
+    """
+    if not os.path.isdir(IMPORT_ERROR_DIR):
+        return None
+    prefix = report_id + "_"
+    for name in os.listdir(IMPORT_ERROR_DIR):
+        stem, extension = os.path.splitext(name)
+        owner = stem[len(prefix):]
+        if stem.startswith(prefix) and extension in SUPPORTED_EXTENSIONS and owner.isdigit():
+            return os.path.join(IMPORT_ERROR_DIR, name), int(owner)
+    return None
+
+def remove_expired_error_sheets() -> None:
+    """删除超过保留时间的错误表"""
+    if not os.path.isdir(IMPORT_ERROR_DIR):
+        return
+    expires = time.time() - IMPORT_ERROR_RETENTION_SECONDS
+    for name in os.listdir(IMPORT_ERROR_DIR):
+        path = os.path.join(IMPORT_ERROR_DIR, name)
+        if os.path.getmtime(path) < expires:
+            os.remove(path)
+
+@dataclass
+class ImportResult:
+    """导入结果（errors为有问题的行：{"row": 行号, "errors": [错误]}）"""
+    total_rows: int = 0
+    imported: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    failed: int = 0
+    error_report_id: Optional[str] = None
+
+    def add_failure(self, row_number: int, errors: List[str], limit: Optional[int]) -> None:
+        self.failed += 1
+        if limit is None or len(self.errors) < limit:
+            self.errors.append({"row": row_number, "errors": errors})
+
+def _insert_batch(db: Session, batch: List[Dict[str, Any]], result: ImportResult) -> None:
+    db.execute(insert(models.WorkRecord), batch)
+    result.imported += len(batch)
+
+def import_work_records(db: Session, filename: str, file, created_by: int, dry_run: bool = False) -> ImportResult:
+    """
+    流式导入工作记录：逐行解析，有效行按批插入（整个文件在一个事务中提交），无效行写入错误表
+
+    dry_run 时只在内存中按缓存的基础数据和定额校验，不写数据库也不生成错误表，返回全部有问题的行。
+
+    Raises:
+        ImportFormatError: 文件格式不支持或缺少必需的列
+    """
+    remove_expired_error_sheets()
+    resolver = load_resolver(db)
+    result = ImportResult()
+    limit = None if dry_run else MAX_REPORTED_ERRORS
+    with closing(read_rows(filename, file)) as rows:
+        _, header, _ = next(rows, (None, [], None))
+        validator = RowValidator(resolver, map_columns(header))
+        sheet = None if dry_run else ErrorSheet(os.path.splitext(filename)[1].lower(), header, created_by)
+        batch = []
+        try:
+            for row_number, _, values in rows:
+                result.total_rows += 1
+                record, row_errors = validator.validate(row_number, values)
+                if row_errors:
+                    result.add_failure(row_number, row_errors, limit)
+                    if sheet:
+                        sheet.append(row_number, "; ".join(row_errors), values)
+                elif not dry_run:
+                    batch.append({**record, "created_by": created_by})
+                    if len(batch) >= IMPORT_BATCH_SIZE:
+                        _insert_batch(db, batch, result)
+                        batch = []
+            if batch:
+                _insert_batch(db, batch, result)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            if sheet:
+                result.error_report_id = sheet.close()
+    logger.info(
+        f"工作记录导入完成: file={filename}, dry_run={dry_run}, rows={result.total_rows}, "
+        f"imported={result.imported}, failed={result.failed}"
+    )
+    return result
+
+# JSON批量提交的字段顺序（与导入字段一致）和单次提交的最大行数
+MAX_BATCH_ROWS = int(os.getenv("MAX_BATCH_ROWS", "10000"))
+BATCH_COLUMNS = {field_name: position for position, field_name in enumerate(HEADER_ALIASES)}
+
+def submit_work_record_batch(db: Session, rows: List[Dict[str, Any]], created_by: int, dry_run: bool = False) -> ImportResult:
+    """
+    JSON批量提交工作记录：先在内存中校验全部行，全部有效且非dry_run时在一个事务中插入，否则不写入任何行
+
+    行号从1开始，对应提交数组中的位置。
+
+    Raises:
+        ImportFormatError: 行数超过 MAX_BATCH_ROWS
+    """
+    if len(rows) > MAX_BATCH_ROWS:
+        raise ImportFormatError(f"Batch must not exceed {MAX_BATCH_ROWS} rows")
+    validator = RowValidator(load_resolver(db), BATCH_COLUMNS)
+    result = ImportResult(total_rows=len(rows))
+    records = []
+    for row_number, row in enumerate(rows, start=1):
+        record, row_errors = validator.validate(row_number, [row.get(field_name) for field_name in BATCH_COLUMNS])
+        if row_errors:
+            result.add_failure(row_number, row_errors, None)
+        else:
+            records.append({**record, "created_by": created_by})
+    if dry_run or result.failed or not records:
+        return result
+    try:
+        for start in range(0, len(records), IMPORT_BATCH_SIZE):
+            _insert_batch(db, records[start:start + IMPORT_BATCH_SIZE], result)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    logger.info(f"工作记录批量提交完成: rows={result.total_rows}, imported={result.imported}")
+    return result
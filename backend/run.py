@@ -23,11 +23,11 @@ logger = logging.getLogger(__name__)
 # 从app.database导入配置，不再直接检查当前目录的数据库文件
 from app.main import app
 from app.database import engine
-from app import models
+from app.db_schema import init_schema
 
-# 创建所有数据库表
+# 创建所有数据库表和视图
 logger.debug("开始创建数据库表...")
-models.Base.metadata.create_all(bind=engine)
+init_schema(engine)
 logger.debug("数据库表创建完成")
 
 if __name__ == "__main__":
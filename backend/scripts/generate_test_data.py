@@ -10,11 +10,13 @@ from decimal import Decimal
 import random
 
 from app.database import SessionLocal, engine
-from app import models
+from app import crud, models
+from app.db_schema import init_schema
 from app.utils.auth import get_password_hash
+from app.utils.money import amount_cents, to_cents, to_hundredths
 
-# 创建数据库表
-models.Base.metadata.create_all(bind=engine)
+# 创建数据库表和视图
+init_schema(engine)
 
 # 测试数据配置
 NUM_WORKERS = 10  # 生成的工人数量
@@ -245,6 +247,8 @@ def main():
                     description=model_info["description"]
                 )
                 db.add(model)
+                db.flush()
+                crud.replace_motor_model_aliases(db, model_info["name"], model_info["aliases"])
                 models_list.append(model)
                 print(f"生成型号: {model_info['name']} - {model_info['aliases']}")
             else:
@@ -288,7 +292,7 @@ def main():
                         cat1_code=cat1.cat1_code,
                         cat2_code=cat2.cat2_code,
                         model_name=model.name,
-                        unit_price=unit_price,
+                        unit_price_cents=to_cents(unit_price),
                         effective_date=effective_date,
                         created_by=test_user.id
                     )
@@ -320,11 +324,13 @@ def main():
             # 生成随机日期（2023-01-01 到 2025-12-31）
             record_date = random_date(date(2023, 1, 1), date(2025, 12, 31))
             
-            # 创建工作记录
+            # 创建工作记录（保存录入时的单价和金额）
             work_record = models.WorkRecord(
                 worker_code=worker.worker_code,
                 quota_id=quota.id,
-                quantity=quantity,
+                quantity_hundredths=to_hundredths(quantity),
+                unit_price_cents=quota.unit_price_cents,
+                amount_cents=amount_cents(quota.unit_price_cents, to_hundredths(quantity)),
                 record_date=record_date,
                 created_by=test_user.id
             )
@@ -1,96 +1,18 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import text
 from app.database import SessionLocal, engine
 from app import models
+from app.db_schema import init_schema, create_views
 from app.utils.auth import get_password_hash
 
 # 创建数据库表
-models.Base.metadata.create_all(bind=engine)
+init_schema(engine)
 
 def create_salary_records_view():
-    """创建工资记录视图"""
-    db = SessionLocal()
+    """创建工资记录视图（SQLite与PostgreSQL通用）"""
     try:
-        # 检查视图是否已存在
-        view_exists = db.execute(
-            text("SELECT name FROM sqlite_master WHERE type='view' AND name='v_salary_records'")
-        ).fetchone()
-        
-        if not view_exists:
-            # 创建视图
-            create_view_sql = """
-            CREATE VIEW v_salary_records AS
-            SELECT 
-                wr.id,
-                wr.worker_code,
-                wr.quota_id,
-                wr.quantity,
-                q.unit_price,
-                (wr.quantity * q.unit_price) AS amount,
-                wr.record_date,
-                wr.created_by,
-                wr.created_at,
-                -- 电机型号: 型号名称 (别名)
-                mm.name || ' (' || COALESCE(mm.aliases, '') || ')' AS model_display,
-                -- 工段类别: 编码 (名称)
-                pc1.cat1_code || ' (' || pc1.name || ')' AS cat1_display,
-                -- 工序类别: 编码 (名称)
-                pc2.cat2_code || ' (' || pc2.name || ')' AS cat2_display,
-                -- 工序名称: 编码 (名称)
-                p.process_code || ' (' || p.name || ')' AS process_display
-            FROM work_records wr
-            JOIN quotas q ON wr.quota_id = q.id
-            JOIN processes p ON q.process_code = p.process_code
-            JOIN process_cat1 pc1 ON q.cat1_code = pc1.cat1_code
-            JOIN process_cat2 pc2 ON q.cat2_code = pc2.cat2_code
-            JOIN motor_models mm ON q.model_name = mm.name
-            """
-            db.execute(text(create_view_sql))
-            db.commit()
-            print("工资记录视图创建成功!")
-        else:
-            print("工资记录视图已存在")
+        create_views(engine)
+        print("工资记录视图已就绪")
     except Exception as e:
         print(f"创建工资记录视图时出错: {e}")
-        # 如果视图创建失败，尝试删除并重新创建
-        try:
-            print("尝试删除现有视图并重新创建...")
-            db.execute(text("DROP VIEW IF EXISTS v_salary_records"))
-            db.commit()
-            create_view_sql = """
-            CREATE VIEW v_salary_records AS
-            SELECT 
-                wr.id,
-                wr.worker_code,
-                wr.quota_id,
-                wr.quantity,
-                q.unit_price,
-                (wr.quantity * q.unit_price) AS amount,
-                wr.record_date,
-                wr.created_by,
-                wr.created_at,
-                -- 电机型号: 型号名称 (别名)
-                mm.name || ' (' || COALESCE(mm.aliases, '') || ')' AS model_display,
-                -- 工段类别: 编码 (名称)
-                pc1.cat1_code || ' (' || pc1.name || ')' AS cat1_display,
-                -- 工序类别: 编码 (名称)
-                pc2.cat2_code || ' (' || pc2.name || ')' AS cat2_display,
-                -- 工序名称: 编码 (名称)
-                p.process_code || ' (' || p.name || ')' AS process_display
-            FROM work_records wr
-            JOIN quotas q ON wr.quota_id = q.id
-            JOIN processes p ON q.process_code = p.process_code
-            JOIN process_cat1 pc1 ON q.cat1_code = pc1.cat1_code
-            JOIN process_cat2 pc2 ON q.cat2_code = pc2.cat2_code
-            JOIN motor_models mm ON q.model_name = mm.name
-            """
-            db.execute(text(create_view_sql))
-            db.commit()
-            print("工资记录视图重新创建成功!")
-        except Exception as e2:
-            print(f"重新创建视图失败: {e2}")
-    finally:
-        db.close()
 
 def init_db():
     """初始化数据库，创建root用户"""
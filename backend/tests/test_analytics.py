@@ -0,0 +1,122 @@
+import pytest
+
+from app import analytics, analytics_engine, models
+
+
+@pytest.fixture(autouse=True)
+def clear_analytics_cache():
+    analytics.clear_cache()
+    yield
+    analytics.clear_cache()
+
+
+@pytest.fixture
+def model_records(client, auth_headers, reference_data, test_db):
+    """两名工人、两个型号：W001 三月做Y100两次、四月做Y200一次，W002 三月做Y200一次"""
+    test_db.add_all([models.Worker(worker_code="W002", name="李四"), models.MotorModel(name="Y200")])
+    test_db.commit()
+    quota_ids = {}
+    for model_name, unit_price in (("Y100", "1.00"), ("Y200", "2.00")):
+        quota_ids[model_name] = client.post("/api/quotas/", headers=auth_headers, json={
+            "process_code": "P001", "cat1_code": "C1", "cat2_code": "C2", "model_name": model_name,
+            "unit_price": unit_price, "effective_date": "2024-01-01",
+        }).json()["id"]
+    for worker_code, model_name, quantity, record_date in (
+        ("W001", "Y100", "1", "2024-03-04"),
+        ("W001", "Y100", "2", "2024-03-06"),
+        ("W001", "Y200", "3", "2024-04-01"),
+        ("W002", "Y200", "4", "2024-03-10"),
+    ):
+        client.post("/api/salary-records/", headers=auth_headers, json={
+            "worker_code": worker_code, "quota_id": quota_ids[model_name], "quantity": quantity, "record_date": record_date,
+        })
+    return quota_ids
+
+
+def get_aggregate(client, auth_headers, **params):
+    return client.get("/api/analytics/aggregate", headers=auth_headers, params=params)
+
+
+def test_monthly_rollup_and_cache(client, auth_headers, model_records):
+    """测试只按月份汇总时读取月度汇总表，相同请求命中缓存，新增记录后缓存失效"""
+    params = {"dimensions": "month", "measures": "amount,record_count"}
+    result = get_aggregate(client, auth_headers, **params).json()
+    assert (result["source"], result["cached"]) == ("rollup", False)
+    assert result["rows"] == [
+        {"month": "2024-03", "amount": "11.00", "record_count": 3},
+        {"month": "2024-04", "amount": "6.00", "record_count": 1},
+    ]
+    assert get_aggregate(client, auth_headers, **params).json()["cached"] is True
+
+    client.post("/api/salary-records/", headers=auth_headers, json={
+        "worker_code": "W002", "quota_id": model_records["Y100"], "quantity": "5", "record_date": "2024-04-20",
+    })
+    result = get_aggregate(client, auth_headers, **params).json()
+    assert result["cached"] is False
+    assert result["rows"][1] == {"month": "2024-04", "amount": "11.00", "record_count": 2}
+
+    # 需要工人数或日期区间不是整月时在工作记录上汇总，结果与汇总表一致
+    result = get_aggregate(client, auth_headers, dimensions="month", start_date="2024-03-05", end_date="2024-03-31").json()
+    assert result["source"] == "raw"
+    assert result["rows"] == [
+        {"month": "2024-03", "quantity": "6.00", "amount": "10.00", "record_count": 2, "distinct_workers": 2},
+    ]
+
+
+def test_dimensions_filters_and_top(client, auth_headers, model_records):
+    """测试多维分组、过滤和取前K名，编码维度附带名称"""
+    result = get_aggregate(client, auth_headers, dimensions="model,worker", measures="quantity", top=2).json()
+    assert result["source"] == "raw"
+    assert result["group_count"] == 3
+    assert result["rows"] == [
+        {"model": "Y200", "worker": "W002", "worker_name": "李四", "quantity": "4.00"},
+        {"model": "Y100", "worker": "W001", "worker_name": "张三", "quantity": "3.00"},
+    ]
+
+    result = get_aggregate(client, auth_headers, dimensions="week", measures="record_count,distinct_workers",
+                           model=["Y100", "Y200"], worker="W001").json()
+    assert result["rows"] == [
+        {"week": "2024-03-04", "record_count": 2, "distinct_workers": 1},
+        {"week": "2024-04-01", "record_count": 1, "distinct_workers": 1},
+    ]
+
+    totals = get_aggregate(client, auth_headers, measures="distinct_workers,amount").json()
+    assert totals["rows"] == [{"distinct_workers": 2, "amount": "17.00"}]
+
+    assert get_aggregate(client, auth_headers, dimensions="shift").status_code == 400
+    assert get_aggregate(client, auth_headers, measures="amount", order_by="quantity", top=1).status_code == 400
+    assert get_aggregate(client, auth_headers, start_date="2024-04-01", end_date="2024-03-01").status_code == 400
+
+
+def test_duckdb_mirror_matches_sqlite(client, auth_headers, model_records, monkeypatch, tmp_path):
+    """测试DuckDB镜像：结果与业务库一致，新增、修改（包括同月内改日期）和删除记录后增量同步"""
+    pytest.importorskip("duckdb")
+    params = {"dimensions": "model,week,worker", "measures": "quantity,amount,record_count,distinct_workers"}
+
+    def compare():
+        monkeypatch.setattr(analytics_engine, "ANALYTICS_BACKEND", "sqlite")
+        analytics.clear_cache()
+        expected = get_aggregate(client, auth_headers, **params).json()
+        monkeypatch.setattr(analytics_engine, "ANALYTICS_BACKEND", "duckdb")
+        analytics.clear_cache()
+        actual = get_aggregate(client, auth_headers, **params).json()
+        assert (expected["engine"], actual["engine"]) == ("sqlite", "duckdb")
+        assert actual["rows"] == expected["rows"]
+
+    monkeypatch.setattr(analytics_engine, "ANALYTICS_DUCKDB_PATH", str(tmp_path / "analytics.duckdb"))
+    analytics_engine.reset_duckdb_analytics()
+    try:
+        compare()
+        records = client.get("/api/salary-records/", headers=auth_headers).json()
+        # 同月内改日期不改变月度汇总，由修改标记发现
+        moved = next(record for record in records if record["record_date"] == "2024-03-04")
+        client.put(f"/api/salary-records/{moved['id']}", headers=auth_headers, json={"record_date": "2024-03-20"})
+        compare()
+        client.put(f"/api/salary-records/{records[0]['id']}", headers=auth_headers, json={"quantity": "7", "record_date": "2024-05-02"})
+        client.delete(f"/api/salary-records/{records[1]['id']}", headers=auth_headers)
+        client.post("/api/salary-records/", headers=auth_headers, json={
+            "worker_code": "W002", "quota_id": model_records["Y100"], "quantity": "5", "record_date": "2024-04-20",
+        })
+        compare()
+    finally:
+        analytics_engine.reset_duckdb_analytics()
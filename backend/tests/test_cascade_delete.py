@@ -0,0 +1,96 @@
+import time
+from datetime import date
+
+import pytest
+
+from app import crud, models
+from app.jobs import Job, JobCancelled
+
+
+def _add_work_records(test_db, reference_data, count):
+    """为基础数据添加一个定额和若干工作记录，返回定额ID"""
+    quota = models.Quota(
+        process_code=reference_data["process_code"],
+        cat1_code=reference_data["cat1_code"],
+        cat2_code=reference_data["cat2_code"],
+        model_name=reference_data["model_name"],
+        unit_price_cents=100,
+        effective_date=date(2024, 1, 1)
+    )
+    test_db.add(quota)
+    test_db.flush()
+    test_db.add_all([
+        models.WorkRecord(worker_code=reference_data["worker_code"], quota_id=quota.id, quantity_hundredths=100, record_date=date(2024, 1, 2))
+        for _ in range(count)
+    ])
+    test_db.commit()
+    return quota.id
+
+
+def _wait_for_job(client, auth_headers, job_id):
+    """轮询后台任务直到结束"""
+    for _ in range(100):
+        job = client.get(f"/api/jobs/{job_id}", headers=auth_headers).json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def test_delete_process_cascades(client, auth_headers, test_db, reference_data):
+    """测试删除工序时级联删除定额和工作记录"""
+    _add_work_records(test_db, reference_data, 5)
+
+    response = client.delete("/api/processes/P001", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert test_db.query(models.Quota).count() == 0
+    assert test_db.query(models.WorkRecord).count() == 0
+
+
+def test_delete_quota_cascades(client, auth_headers, test_db, reference_data):
+    """测试删除定额时由外键级联删除工作记录"""
+    quota_id = _add_work_records(test_db, reference_data, 3)
+
+    response = client.delete(f"/api/quotas/{quota_id}", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert test_db.query(models.WorkRecord).count() == 0
+
+    response = client.delete(f"/api/quotas/{quota_id}", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_large_worker_delete_runs_as_job(client, auth_headers, test_db, reference_data, monkeypatch):
+    """测试关联记录较多时删除工人转为分批后台任务"""
+    _add_work_records(test_db, reference_data, 7)
+    monkeypatch.setattr(crud, "CASCADE_BACKGROUND_THRESHOLD", 5)
+    monkeypatch.setattr(crud, "CASCADE_CHUNK_SIZE", 3)
+
+    response = client.delete("/api/workers/W001", headers=auth_headers)
+
+    assert response.status_code == 202
+    job = _wait_for_job(client, auth_headers, response.json()["job_id"])
+    assert job["status"] == "succeeded"
+    assert job["processed"] == 7
+    assert job["progress"] == 1.0
+    assert job["result"]["worker_code"] == "W001"
+    test_db.expire_all()
+    assert test_db.query(models.WorkRecord).count() == 0
+    assert test_db.query(models.Worker).count() == 0
+
+
+def test_chunked_delete_stops_when_cancelled(test_db, reference_data, monkeypatch):
+    """测试分批删除在批次之间检查取消请求，已提交的批次保留"""
+    quota_id = _add_work_records(test_db, reference_data, 7)
+    monkeypatch.setattr(crud, "CASCADE_CHUNK_SIZE", 3)
+
+    def cancel_after_first_chunk(job):
+        job.cancel_requested = True
+
+    job = Job(id="cascade", kind="test", on_progress=cancel_after_first_chunk)
+    with pytest.raises(JobCancelled):
+        crud.delete_quota(test_db, quota_id, job=job)
+    assert job.processed == 3
+    test_db.expire_all()
+    assert test_db.query(models.WorkRecord).count() == 4
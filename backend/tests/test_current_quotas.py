@@ -0,0 +1,75 @@
+from datetime import date, datetime, timedelta
+
+from app import models
+from app.current_quotas import MIDNIGHT_DELAY_SECONDS, seconds_until_midnight
+from app.db_schema import refresh_current_quotas
+from app.utils.money import from_cents
+from tests.conftest import engine
+
+
+def create_quota(client, auth_headers, reference_data, unit_price, effective_date):
+    response = client.post("/api/quotas/", headers=auth_headers, json={
+        "process_code": reference_data["process_code"],
+        "cat1_code": reference_data["cat1_code"],
+        "cat2_code": reference_data["cat2_code"],
+        "model_name": reference_data["model_name"],
+        "unit_price": unit_price,
+        "effective_date": str(effective_date),
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def current_rows(test_db):
+    test_db.expire_all()
+    return [(row.quota_id, str(from_cents(row.unit_price_cents))) for row in test_db.query(models.CurrentQuota).all()]
+
+
+def test_triggers_maintain_current_quota(client, auth_headers, reference_data, test_db):
+    """测试定额增删改后current_quotas只保留今天生效的版本"""
+    today = date.today()
+    old_id = create_quota(client, auth_headers, reference_data, "1.00", today - timedelta(days=30))
+    current_id = create_quota(client, auth_headers, reference_data, "1.50", today)
+    create_quota(client, auth_headers, reference_data, "2.00", today + timedelta(days=1))
+    assert current_rows(test_db) == [(current_id, "1.50")]
+
+    response = client.get("/api/quotas/latest/P001", headers=auth_headers)
+    assert response.json()["id"] == current_id
+
+    client.put(f"/api/quotas/{current_id}", headers=auth_headers, json={"unit_price": "1.60"})
+    assert current_rows(test_db) == [(current_id, "1.60")]
+
+    client.delete(f"/api/quotas/{current_id}", headers=auth_headers)
+    assert current_rows(test_db) == [(old_id, "1.00")]
+    assert client.get("/api/quotas/latest/P001", headers=auth_headers).json()["id"] == old_id
+
+
+def test_midnight_refresh_activates_future_quota(client, auth_headers, reference_data, test_db):
+    """测试零点刷新后未来定额成为当前定额"""
+    today = date.today()
+    create_quota(client, auth_headers, reference_data, "1.00", today)
+    future_id = create_quota(client, auth_headers, reference_data, "2.00", today + timedelta(days=1))
+
+    assert refresh_current_quotas(engine, today + timedelta(days=1)) == 1
+    assert current_rows(test_db) == [(future_id, "2.00")]
+
+
+def test_current_price_list(client, auth_headers, reference_data, test_db):
+    """测试价目表接口只返回每个业务键的当前版本"""
+    test_db.add(models.MotorModel(name="Y200"))
+    test_db.commit()
+    today = date.today()
+    create_quota(client, auth_headers, reference_data, "1.00", today - timedelta(days=1))
+    create_quota(client, auth_headers, reference_data, "1.20", today)
+    create_quota(client, auth_headers, {**reference_data, "model_name": "Y200"}, "3.00", today)
+
+    quotas = client.get("/api/quotas/current", headers=auth_headers).json()
+    assert [(quota["model_name"], quota["unit_price"]) for quota in quotas] == [("Y100", "1.20"), ("Y200", "3.00")]
+
+    quotas = client.get("/api/quotas/current?model_name=Y200", headers=auth_headers).json()
+    assert [quota["unit_price"] for quota in quotas] == ["3.00"]
+
+
+def test_seconds_until_midnight():
+    """测试距零点的秒数计算"""
+    assert seconds_until_midnight(datetime(2024, 1, 1, 23, 59, 0)) == 60 + MIDNIGHT_DELAY_SECONDS
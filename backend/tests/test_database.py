@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import to_read_only_url, to_async_url, configure_read_only, read_only_engine_options
+from app.utils.query_helpers import month_bounds
+
+
+def test_read_only_url_for_sqlite_file():
+    """测试文件型SQLite的只读URL"""
+    assert to_read_only_url("sqlite:///./payroll.db") == "sqlite:///file:./payroll.db?mode=ro&uri=true"
+    assert to_read_only_url("sqlite:///:memory:") == "sqlite:///:memory:"
+
+
+def test_async_url_conversion():
+    """测试同步URL到异步驱动URL的转换"""
+    assert to_async_url("sqlite:///./payroll.db") == "sqlite+aiosqlite:///./payroll.db"
+    assert to_async_url("postgresql://u:p@localhost/db") == "postgresql+asyncpg://u:p@localhost/db"
+
+
+def test_read_only_engine_rejects_writes(tmp_path):
+    """测试读库连接无法写入"""
+    db_file = tmp_path / "ro.db"
+    writer = create_engine(f"sqlite:///{db_file}")
+    with writer.begin() as conn:
+        conn.execute(text("CREATE TABLE t (a INTEGER)"))
+
+    read_url = to_read_only_url(f"sqlite:///{db_file}")
+    reader = create_engine(read_url, **read_only_engine_options(read_url))
+    configure_read_only(reader)
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM t")).scalar() == 0
+        with pytest.raises(OperationalError):
+            conn.execute(text("INSERT INTO t VALUES (1)"))
+
+
+def test_month_bounds():
+    """测试月份区间（含跨年）"""
+    assert [str(d) for d in month_bounds("2024-12")] == ["2024-12-01", "2025-01-01"]
+    with pytest.raises(ValueError):
+        month_bounds("2024-13")
@@ -0,0 +1,56 @@
+from app import models
+
+
+def test_search_description_fragment(client, auth_headers, reference_data):
+    """测试按描述片段全文检索并返回高亮片段"""
+    response = client.get("/api/search?q=定子绕", headers=auth_headers)
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [(item["type"], item["code"]) for item in items] == [("process", "P001")]
+    assert "<mark>定子绕</mark>" in items[0]["snippet"]
+
+    items = client.get("/api/search?q=100L", headers=auth_headers).json()["items"]
+    assert [(item["type"], item["code"], item["name"]) for item in items] == [("motor_model", "Y100", "Y100")]
+
+
+def test_search_short_query_falls_back_to_like(client, auth_headers, reference_data):
+    """测试少于3个字符的查询词使用LIKE匹配，完全匹配排在前面"""
+    items = client.get("/api/search?q=装配", headers=auth_headers).json()["items"]
+    assert [(item["type"], item["code"], item["score"]) for item in items] == [("cat2", "C2", 0.0)]
+
+    items = client.get("/api/search?q=绕&types=process,cat2", headers=auth_headers).json()["items"]
+    assert [item["code"] for item in items] == ["P001"]
+    assert "<mark>绕</mark>" in items[0]["snippet"]
+
+
+def test_search_keyset_paging(client, auth_headers, test_db):
+    """测试游标分页依次返回全部结果且不重复"""
+    test_db.add_all([
+        models.Process(process_code=f"P{i:03d}", name=f"装配工序{i}", description="总装线")
+        for i in range(7)
+    ])
+    test_db.commit()
+
+    codes, cursor = [], None
+    while True:
+        url = "/api/search?q=总装线&limit=3" + (f"&cursor={cursor}" if cursor else "")
+        page = client.get(url, headers=auth_headers).json()
+        codes.extend(item["code"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(codes) == [f"P{i:03d}" for i in range(7)]
+    assert len(codes) == len(set(codes))
+
+    response = client.get("/api/search?q=总装线&cursor=bad", headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_search_follows_updates_and_deletes(client, auth_headers, reference_data):
+    """测试触发器在更新和删除后同步全文检索表"""
+    client.put("/api/processes/P001", headers=auth_headers, json={"description": "转子压装"})
+    assert client.get("/api/search?q=定子绕", headers=auth_headers).json()["items"] == []
+    assert client.get("/api/search?q=转子压装", headers=auth_headers).json()["items"][0]["code"] == "P001"
+
+    client.delete("/api/processes/P001", headers=auth_headers)
+    assert client.get("/api/search?q=转子压装", headers=auth_headers).json()["items"] == []
@@ -0,0 +1,33 @@
+def test_reference_list_etag_and_304(client, auth_headers, reference_data):
+    """测试基础数据列表返回ETag，未变更时对If-None-Match返回304"""
+    response = client.get("/api/workers/", headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert "must-revalidate" in response.headers["cache-control"]
+
+    response = client.get("/api/workers/", headers=dict(auth_headers, **{"If-None-Match": etag}))
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+
+def test_reference_etag_changes_after_write(client, auth_headers, reference_data):
+    """测试写入后版本号递增，旧ETag不再匹配"""
+    etag = client.get("/api/processes/", headers=auth_headers).headers["etag"]
+
+    response = client.put("/api/processes/P001", headers=auth_headers, json={"name": "嵌线"})
+    assert response.status_code == 200
+
+    response = client.get("/api/processes/", headers=dict(auth_headers, **{"If-None-Match": etag}))
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()[0]["name"] == "嵌线"
+
+
+def test_reference_etag_depends_on_query(client, auth_headers, reference_data):
+    """测试不同分页参数和明细主键对应不同的ETag"""
+    first = client.get("/api/motor-models/?limit=10").headers["etag"]
+    second = client.get("/api/motor-models/?limit=20").headers["etag"]
+    detail = client.get("/api/motor-models/Y100", headers=auth_headers).headers["etag"]
+
+    assert len({first, second, detail}) == 3
@@ -0,0 +1,114 @@
+import io
+import threading
+import time
+
+from openpyxl import load_workbook
+
+from app import models
+from app.jobs import job_manager
+from app.utils.auth import get_password_hash
+
+
+def wait_for_job(client, auth_headers, job_id):
+    """轮询后台任务直到结束"""
+    for _ in range(200):
+        job = client.get(f"/api/jobs/{job_id}", headers=auth_headers).json()
+        if job["status"] not in ("pending", "running"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def create_month_records(client, auth_headers):
+    quota_id = client.post("/api/quotas/", headers=auth_headers, json={
+        "process_code": "P001", "cat1_code": "C1", "cat2_code": "C2", "model_name": "Y100",
+        "unit_price": "0.35", "effective_date": "2024-01-01",
+    }).json()["id"]
+    for quantity in ("1.1", "2.2", "4"):
+        client.post("/api/salary-records/", headers=auth_headers, json={
+            "worker_code": "W001", "quota_id": quota_id, "quantity": quantity, "record_date": "2024-03-15",
+        })
+
+
+def test_background_reports(client, auth_headers, reference_data):
+    """测试报表的后台模式：返回202，任务结果持久化，结果文件可下载"""
+    create_month_records(client, auth_headers)
+
+    response = client.get("/api/reports/payroll/2024-03?background=true", headers=auth_headers)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    job = wait_for_job(client, auth_headers, job_id)
+    assert (job["status"], job["kind"], job["result"]["total_amount"]) == ("succeeded", "payroll_report", "2.56")
+
+    # 其他进程（或重启后）从jobs表读取任务状态
+    job_manager._jobs.pop(job_id)
+    assert client.get(f"/api/jobs/{job_id}", headers=auth_headers).json()["result"]["total_amount"] == "2.56"
+
+    job_id = client.get("/api/reports/payroll-workbook/2024-03?background=true", headers=auth_headers).json()["job_id"]
+    job = wait_for_job(client, auth_headers, job_id)
+    assert job["result"] == {"record_count": 3}
+    response = client.get(job["artifact_url"], headers=auth_headers)
+    assert response.status_code == 200
+    assert 'filename="payroll-2024-03.xlsx"' in response.headers["content-disposition"]
+    assert load_workbook(io.BytesIO(response.content)).sheetnames[0] == "汇总"
+
+    assert client.get("/api/reports/payslips/2024-3x?background=true", headers=auth_headers).status_code == 400
+
+
+def test_cancel_job(client, auth_headers):
+    """测试取消运行中的任务和已结束的任务"""
+    started, release = threading.Event(), threading.Event()
+
+    def run(job):
+        started.set()
+        release.wait(5)
+        job.check_cancelled()
+        return {"done": True}
+
+    job = job_manager.submit("test", run)
+    assert started.wait(5)
+    response = client.post(f"/api/jobs/{job.id}/cancel", headers=auth_headers)
+    assert response.json()["cancel_requested"] is True
+    release.set()
+    assert wait_for_job(client, auth_headers, job.id)["status"] == "cancelled"
+
+    assert client.post(f"/api/jobs/{job.id}/cancel", headers=auth_headers).status_code == 409
+    assert client.get(f"/api/jobs/{job.id}/artifact", headers=auth_headers).status_code == 404
+    assert client.post("/api/jobs/missing/cancel", headers=auth_headers).status_code == 404
+
+
+def test_job_access_is_limited_to_owner_and_admin(client, auth_headers, test_user, test_db):
+    """测试只有提交任务的用户和管理员可以查询、取消和下载任务"""
+    test_db.add(models.User(username="clerk", name="Clerk", role="statistician",
+                            password=get_password_hash("clerkpass123"), need_change_password=False))
+    test_db.commit()
+    token = client.post("/api/auth/login", json={"username": "clerk", "password": "clerkpass123"}).json()["access_token"]
+    clerk_headers = {"Authorization": f"Bearer {token}"}
+    clerk_id = test_db.query(models.User).filter_by(username="clerk").one().id
+
+    job = job_manager.submit("test", lambda job: {"done": True}, created_by=test_user.id)
+    wait_for_job(client, auth_headers, job.id)
+    assert client.get(f"/api/jobs/{job.id}", headers=clerk_headers).status_code == 403
+    assert client.post(f"/api/jobs/{job.id}/cancel", headers=clerk_headers).status_code == 403
+    assert client.get(f"/api/jobs/{job.id}/artifact", headers=clerk_headers).status_code == 403
+
+    job = job_manager.submit("test", lambda job: {"done": True}, created_by=clerk_id)
+    assert wait_for_job(client, clerk_headers, job.id)["status"] == "succeeded"
+    assert client.get(f"/api/jobs/{job.id}", headers=auth_headers).status_code == 200
+
+
+def test_cancel_after_last_chunk_keeps_result(client, auth_headers):
+    """测试任务函数已完成全部处理后收到的取消请求不会把任务记为取消"""
+    started, release = threading.Event(), threading.Event()
+
+    def run(job):
+        started.set()
+        release.wait(5)
+        return {"done": True}
+
+    job = job_manager.submit("test", run)
+    assert started.wait(5)
+    client.post(f"/api/jobs/{job.id}/cancel", headers=auth_headers)
+    release.set()
+    job = wait_for_job(client, auth_headers, job.id)
+    assert (job["status"], job["result"]) == ("succeeded", {"done": True})
@@ -0,0 +1,49 @@
+from app import crud, models
+from app.utils.model_aliases import normalize_model_name, split_aliases
+
+
+def test_normalize_and_split_aliases():
+    """测试别名规范化和拆分"""
+    assert normalize_model_name(" y-100 l ") == "Y100L"
+    assert normalize_model_name("Ｙ１００") == "Y100"
+    assert split_aliases("A系列, A-100，a100") == [("A系列", "A系列"), ("A100", "A-100")]
+
+
+def test_alias_rows_synced_on_write(client, auth_headers, test_db):
+    """测试创建和更新电机型号时同步别名表"""
+    response = client.post("/api/motor-models/", headers=auth_headers, json={"name": "Y132", "aliases": "Y-132, Y132S"})
+    assert response.status_code == 201
+
+    aliases = test_db.query(models.MotorModelAlias).filter_by(model_name="Y132").all()
+    assert sorted(alias.normalized_alias for alias in aliases) == ["Y132", "Y132S"]
+
+    response = client.put("/api/motor-models/Y132", headers=auth_headers, json={"aliases": "Y132M"})
+    assert response.status_code == 200
+    test_db.expire_all()
+    aliases = test_db.query(models.MotorModelAlias).filter_by(model_name="Y132").all()
+    assert [alias.normalized_alias for alias in aliases] == ["Y132M"]
+
+    # 别名不能与其他型号重复，也不会因子串误匹配
+    response = client.post("/api/motor-models/", headers=auth_headers, json={"name": "Y160", "aliases": "y-132m"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Motor model alias already exists"
+    assert crud.get_motor_model_by_alias(test_db, "132") is None
+    assert crud.get_motor_model_by_alias(test_db, "y132-m").name == "Y132"
+
+
+def test_resolve_motor_models(client, auth_headers):
+    """测试批量解析型号：精确、别名、前缀和无法匹配"""
+    client.post("/api/motor-models/", headers=auth_headers, json={"name": "Y100", "aliases": "Y-100,Y100L"})
+    client.post("/api/motor-models/", headers=auth_headers, json={"name": "Y200", "aliases": "Y200L2"})
+    client.post("/api/motor-models/", headers=auth_headers, json={"name": "Y250"})
+
+    response = client.post(
+        "/api/motor-models/resolve",
+        headers=auth_headers,
+        json={"names": ["y100", "Y-100", "Y100L", "Y200L", "Y2", "Z999", ""]}
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["model_name"] for result in results] == ["Y100", "Y100", "Y100", "Y200", None, None, None]
+    assert [result["match"] for result in results] == ["exact", "exact", "exact", "prefix", "ambiguous", "none", "none"]
+    assert results[4]["candidates"] == ["Y200", "Y250"]
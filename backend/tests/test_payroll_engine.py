@@ -0,0 +1,59 @@
+import numpy as np
+
+from app.payroll_engine import NO_CAPTURED_PRICE, PayrollRecords, PriceBook, compute_payroll
+
+
+def create_record(client, auth_headers, reference_data, quota_id, quantity, record_date="2024-03-15"):
+    response = client.post("/api/salary-records/", headers=auth_headers, json={
+        "worker_code": reference_data["worker_code"],
+        "quota_id": quota_id,
+        "quantity": quantity,
+        "record_date": record_date,
+    })
+    assert response.status_code == 201
+
+
+def test_payroll_matches_sql(client, auth_headers, reference_data):
+    """测试月末工资按工人、工序和类别汇总，并与SQL汇总一致"""
+    quota_id = client.post("/api/quotas/", headers=auth_headers, json={
+        "process_code": reference_data["process_code"],
+        "cat1_code": reference_data["cat1_code"],
+        "cat2_code": reference_data["cat2_code"],
+        "model_name": reference_data["model_name"],
+        "unit_price": "0.35",
+        "effective_date": "2024-01-01",
+    }).json()["id"]
+    for quantity in ("1.1", "2.2", "4"):
+        create_record(client, auth_headers, reference_data, quota_id, quantity)
+    create_record(client, auth_headers, reference_data, quota_id, "100", record_date="2024-04-01")
+
+    response = client.get("/api/reports/payroll/2024-03", headers=auth_headers)
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["record_count"], report["total_quantity"], report["total_amount"]) == (3, "7.30", "2.56")
+    assert [(row["code"], row["total_amount"]) for row in report["workers"]] == [(reference_data["worker_code"], "2.56")]
+    assert [row["code"] for row in report["processes"]] == [reference_data["process_code"]]
+    assert [row["code"] for row in report["categories"]] == [reference_data["cat2_code"]]
+    assert report["cross_check"] == {"sql_total_amount": "2.56", "matches": True, "mismatched_workers": []}
+
+    assert client.get("/api/reports/payroll/2024-3x", headers=auth_headers).status_code == 400
+
+
+def test_compute_falls_back_to_price_book():
+    """测试未保存录入单价的记录按价目表单价计算，金额按分四舍五入"""
+    records = PayrollRecords(
+        worker_codes=["W1", "W2"],
+        worker_index=np.array([0, 1, 1]),
+        quota_id=np.array([1, 2, 2]),
+        quantity_hundredths=np.array([150, 50, 100]),
+        unit_price_cents=np.array([NO_CAPTURED_PRICE, 35, 35]),
+    )
+    book = PriceBook(
+        unit_price_cents=np.array([0, 200, 999]),
+        indexes={"process": np.array([0, 0, 1]), "cat2": np.array([0, 0, 0])},
+        codes={"process": ["P1", "P2"], "cat2": ["C1"]},
+    )
+    totals = compute_payroll(records, book)
+    assert list(totals.workers.rows()) == [("W1", 1, 150, 300), ("W2", 2, 150, 53)]
+    assert list(totals.processes.rows()) == [("P1", 1, 150, 300), ("P2", 2, 150, 53)]
+    assert totals.amount_cents == 353
@@ -0,0 +1,49 @@
+import io
+
+from openpyxl import load_workbook
+
+from openpyxl.worksheet._writer import ALL_TEMP_FILES
+
+from app import models, payroll_workbook
+from app.utils import streaming
+
+
+def test_payroll_workbook(client, auth_headers, reference_data, test_db):
+    """测试月度工资工作簿：汇总表、工段表和带小计的工人明细表"""
+    test_db.add(models.Worker(worker_code="W002", name="李四"))
+    test_db.commit()
+    quota_id = client.post("/api/quotas/", headers=auth_headers, json={
+        "process_code": "P001", "cat1_code": "C1", "cat2_code": "C2", "model_name": "Y100",
+        "unit_price": "0.35", "effective_date": "2024-01-01",
+    }).json()["id"]
+    for worker_code, quantity, record_date in (
+        ("W002", "4", "2024-03-02"), ("W001", "1.1", "2024-03-15"), ("W001", "2.2", "2024-03-01"), ("W001", "9", "2024-04-01"),
+    ):
+        client.post("/api/salary-records/", headers=auth_headers, json={
+            "worker_code": worker_code, "quota_id": quota_id, "quantity": quantity, "record_date": record_date,
+        })
+
+    response = client.get("/api/reports/payroll-workbook/2024-03", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == payroll_workbook.XLSX_MEDIA_TYPE
+    workbook = load_workbook(io.BytesIO(response.content))
+    assert workbook.sheetnames == ["汇总", "C1 精加工", "工人明细"]
+
+    summary = [row for row in workbook["汇总"].iter_rows(min_row=3, max_row=5, values_only=True)]
+    assert summary == [("W001", "张三", 2, 3.3, 1.16), ("W002", "李四", 1, 4, 1.4), ("合计", None, 3, 7.3, 2.56)]
+    workshop = [row for row in workbook["C1 精加工"].iter_rows(min_row=2, values_only=True)]
+    assert [row[0] for row in workshop] == ["W001", "W002", "合计"]
+    detail = [row for row in workbook["工人明细"].iter_rows(min_row=2, values_only=True)]
+    assert [(row[0], row[7]) for row in detail] == [("W001", 2.2), ("W001", 1.1), ("小计", 3.3), ("W002", 4), ("小计", 4)]
+
+    assert client.get("/api/reports/payroll-workbook/2024-3x", headers=auth_headers).status_code == 400
+
+
+def test_stream_stops_when_client_disconnects(test_db, reference_data, monkeypatch):
+    """测试读取方关闭迭代器后生成线程停止（不会因队列已满而一直阻塞），并删除只写模式的临时文件"""
+    monkeypatch.setattr(streaming, "STREAM_CHUNK_BYTES", 16)
+    monkeypatch.setattr(streaming, "STREAM_QUEUE_SIZE", 1)
+    chunks = payroll_workbook.stream_payroll_workbook(test_db, "2024-03")
+    assert next(chunks).startswith(b"PK")
+    chunks.close()
+    assert not ALL_TEMP_FILES
@@ -0,0 +1,48 @@
+import io
+import zipfile
+
+import pytest
+
+from app import payslips
+
+
+@pytest.fixture
+def month_records(client, auth_headers, reference_data):
+    quota_id = client.post("/api/quotas/", headers=auth_headers, json={
+        "process_code": "P001", "cat1_code": "C1", "cat2_code": "C2", "model_name": "Y100",
+        "unit_price": "0.35", "effective_date": "2024-01-01",
+    }).json()["id"]
+    for quantity, record_date in (("1.1", "2024-03-15"), ("2.2", "2024-03-01"), ("9", "2024-04-01")):
+        client.post("/api/salary-records/", headers=auth_headers, json={
+            "worker_code": "W001", "quota_id": quota_id, "quantity": quantity, "record_date": record_date,
+        })
+
+
+def test_payslip_archive(client, auth_headers, month_records, monkeypatch):
+    """测试工资条zip：每名工人一个HTML和PDF文件，明细来自当月记录"""
+    monkeypatch.setattr(payslips, "PAYSLIP_WORKERS", 1)
+    response = client.get("/api/reports/payslips/2024-03?format=all", headers=auth_headers)
+    assert response.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == ["W001-张三.html", "W001-张三.pdf"]
+    html = archive.read("W001-张三.html").decode("utf-8")
+    assert "2024-03-01" in html and "2024-04-01" not in html
+    assert "<td class=\"number\">1.16</td>" in html
+    assert archive.read("W001-张三.pdf").startswith(b"%PDF")
+
+    assert client.get("/api/reports/payslips/2024-03?format=doc", headers=auth_headers).status_code == 422
+    assert client.get("/api/reports/payslips/2024-3x", headers=auth_headers).status_code == 400
+
+
+def test_render_in_process_pool():
+    """测试进程池渲染（spawn方式启动的进程中编译模板并注册字体）"""
+    payslip = {
+        "month": "2024-03", "worker_code": "W/1", "worker_name": "<李四>", "total_quantity": "1.00", "total_amount": "0.35",
+        "lines": [{"date": "2024-03-01", "process": "绕线", "model": "Y100", "quantity": "1.00", "unit_price": "0.35", "amount": "0.35"}] * 80,
+    }
+    with payslips.ProcessPoolExecutor(1, mp_context=payslips.multiprocessing.get_context("spawn")) as pool:
+        files = pool.submit(payslips.render_batch, [payslip], ("html", "pdf")).result()
+    assert [name for name, _ in files] == ["W_1-_李四_.html", "W_1-_李四_.pdf"]
+    assert "&lt;李四&gt;" in files[0][1].decode("utf-8")
+    # 80行明细分为两页
+    assert b"/Count 2" in files[1][1]
@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import models
+from app.utils.money import to_cents
+
+
+@pytest.fixture
+def quota_catalogue(test_db, test_user, reference_data):
+    """两个电机型号各有三个生效日期的定额，其中一个在未来生效"""
+    test_db.add(models.MotorModel(name="Y200"))
+    today = date.today()
+    for model_name in ("Y100", "Y200"):
+        for days, price in ((-60, "1.00"), (-30, "1.50"), (30, "2.00")):
+            test_db.add(models.Quota(
+                process_code="P001", cat1_code="C1", cat2_code="C2", model_name=model_name,
+                unit_price_cents=to_cents(Decimal(price)), effective_date=today + timedelta(days=days), created_by=test_user.id,
+            ))
+    test_db.commit()
+    return today
+
+
+def test_filter_by_model_and_date_range(client, auth_headers, quota_catalogue):
+    """测试按型号和生效日期区间筛选"""
+    today = quota_catalogue
+    response = client.get(
+        f"/api/quotas/?model_name=Y200&effective_from={today - timedelta(days=45)}&effective_to={today}",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert [(quota["model_name"], quota["unit_price"]) for quota in response.json()] == [("Y200", "1.50")]
+    assert response.headers["X-Total-Count"] == "1"
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_current_only(client, auth_headers, quota_catalogue):
+    """测试只返回当前生效的定额"""
+    response = client.get("/api/quotas/?current_only=true&sort=model_name", headers=auth_headers)
+    assert [(quota["model_name"], quota["unit_price"]) for quota in response.json()] == [("Y100", "1.50"), ("Y200", "1.50")]
+
+
+def test_sorted_cursor_pagination(client, auth_headers, quota_catalogue):
+    """测试按单价降序的游标分页依次返回全部定额"""
+    prices, cursor = [], None
+    while True:
+        url = "/api/quotas/?sort=-unit_price&limit=4" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["X-Total-Count"] == "6"
+        prices.extend(quota["unit_price"] for quota in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert prices == ["2.00", "2.00", "1.50", "1.50", "1.00", "1.00"]
+
+    assert client.get("/api/quotas/?cursor=bad", headers=auth_headers).status_code == 400
+    assert client.get("/api/quotas/?sort=created_by", headers=auth_headers).status_code == 422
+
+
+def test_total_from_row_counter(client, auth_headers, quota_catalogue, test_db):
+    """测试行数计数器随插入和级联删除更新"""
+    assert test_db.get(models.TableRowCount, "quotas").row_count == 6
+
+    client.delete("/api/motor-models/Y200", headers=auth_headers)
+    test_db.expire_all()
+    assert test_db.get(models.TableRowCount, "quotas").row_count == 3
+    assert client.get("/api/quotas/", headers=auth_headers).headers["X-Total-Count"] == "3"
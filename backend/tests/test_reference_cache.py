@@ -0,0 +1,54 @@
+from app import models
+from app.reference_cache import ReferenceCache
+
+
+def test_snapshot_reused_until_version_changes(test_db, reference_data):
+    """测试版本号未变时复用快照，其他连接写入后重新加载变更的表"""
+    cache = ReferenceCache()
+    first = cache.get(test_db)
+    assert first.workers.get("W001").name == "张三"
+
+    # 同一会话（请求）内不再检查版本号
+    assert cache.get(test_db) is first
+
+    # 模拟其他服务进程直接写库：触发器递增版本号
+    test_db.add(models.Worker(worker_code="W002", name="李四"))
+    test_db.commit()
+
+    second = cache.get(test_db)
+    assert second is not first
+    assert "W002" in second.workers
+    assert second.processes is first.processes
+    assert "W002" not in first.workers
+
+
+def test_reference_snapshot_is_read_only(test_db, reference_data):
+    """测试快照不可修改"""
+    data = ReferenceCache().get(test_db)
+    try:
+        data.workers.rows["W009"] = None
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("snapshot should be immutable")
+
+
+def test_quota_validation_from_cache(client, auth_headers, reference_data):
+    """测试定额创建使用缓存校验引用数据，新增的基础数据立即可见"""
+    response = client.post(
+        "/api/quotas/",
+        headers=auth_headers,
+        json={"process_code": "P001", "cat1_code": "C1", "cat2_code": "C2", "model_name": "Y200",
+              "unit_price": "1.00", "effective_date": "2024-01-01"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Motor model not found"
+
+    assert client.post("/api/motor-models/", headers=auth_headers, json={"name": "Y200"}).status_code == 201
+    response = client.post(
+        "/api/quotas/",
+        headers=auth_headers,
+        json={"process_code": "P001", "cat1_code": "C1", "cat2_code": "C2", "model_name": "Y200",
+              "unit_price": "1.00", "effective_date": "2024-01-01"}
+    )
+    assert response.status_code == 201
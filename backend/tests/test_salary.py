@@ -0,0 +1,132 @@
+def _create_quota(client, auth_headers, reference_data, unit_price="12.50", effective_date="2024-01-01"):
+    """通过API创建定额"""
+    return client.post(
+        "/api/quotas/",
+        headers=auth_headers,
+        json={
+            "process_code": reference_data["process_code"],
+            "cat1_code": reference_data["cat1_code"],
+            "cat2_code": reference_data["cat2_code"],
+            "model_name": reference_data["model_name"],
+            "unit_price": unit_price,
+            "effective_date": effective_date
+        }
+    )
+
+
+def test_create_quota(client, auth_headers, reference_data):
+    """测试创建定额（单条INSERT ... RETURNING写入，响应包含关联的工序和创建人）"""
+    response = _create_quota(client, auth_headers, reference_data)
+
+    assert response.status_code == 201
+    assert response.json()["process_code"] == "P001"
+    assert response.json()["created_by"] is not None
+    assert response.json()["process"]["name"] == "绕线"
+    assert response.json()["creator"]["id"] == response.json()["created_by"]
+
+
+def test_create_quota_unknown_process(client, auth_headers, reference_data):
+    """测试使用不存在的工序创建定额"""
+    response = _create_quota(client, auth_headers, dict(reference_data, process_code="NOPE"))
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Process not found"
+
+
+def test_create_duplicate_quota(client, auth_headers, reference_data):
+    """测试重复定额由唯一约束检测并返回400"""
+    assert _create_quota(client, auth_headers, reference_data).status_code == 201
+    response = _create_quota(client, auth_headers, reference_data)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Quota already exists for this effective date"
+
+
+def test_latest_quota(client, auth_headers, reference_data):
+    """测试获取工序的最新生效定额"""
+    _create_quota(client, auth_headers, reference_data, unit_price="10.00", effective_date="2023-01-01")
+    _create_quota(client, auth_headers, reference_data, unit_price="11.00", effective_date="2024-01-01")
+
+    response = client.get("/api/quotas/latest/P001", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["effective_date"] == "2024-01-01"
+
+
+def test_work_record_lifecycle(client, auth_headers, reference_data):
+    """测试工作记录的创建、更新和删除"""
+    quota_id = _create_quota(client, auth_headers, reference_data).json()["id"]
+
+    response = client.post(
+        "/api/salary-records/",
+        headers=auth_headers,
+        json={"worker_code": "W001", "quota_id": quota_id, "quantity": "3.50", "record_date": "2024-02-01"}
+    )
+    assert response.status_code == 201
+    record_id = response.json()["id"]
+    assert response.json()["worker_code"] == "W001"
+    assert response.json()["quota_id"] == quota_id
+    assert response.json()["worker"]["name"] == "张三"
+    assert response.json()["quota"]["process"]["process_code"] == "P001"
+    assert response.json()["creator"] is not None
+
+    response = client.put(f"/api/salary-records/{record_id}", headers=auth_headers, json={"quantity": "4.00"})
+    assert response.status_code == 200
+    assert response.json()["quantity"] == "4.00"
+    assert response.json()["worker"]["name"] == "张三"
+    assert response.json()["quota"]["id"] == quota_id
+
+    # 显式传入null的数量视为未修改
+    response = client.put(f"/api/salary-records/{record_id}", headers=auth_headers, json={"quantity": None})
+    assert response.status_code == 200
+    assert response.json()["quantity"] == "4.00"
+
+    response = client.delete(f"/api/salary-records/{record_id}", headers=auth_headers)
+    assert response.status_code == 200
+
+    response = client.delete(f"/api/salary-records/{record_id}", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_create_work_record_unknown_worker(client, auth_headers, reference_data):
+    """测试为不存在的工人创建工作记录"""
+    quota_id = _create_quota(client, auth_headers, reference_data).json()["id"]
+
+    response = client.post(
+        "/api/salary-records/",
+        headers=auth_headers,
+        json={"worker_code": "NOPE", "quota_id": quota_id, "quantity": "1", "record_date": "2024-02-01"}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Worker not found"
+
+
+def test_salary_summary_report(client, auth_headers, reference_data):
+    """测试工资汇总报表（无记录时金额为0）"""
+    response = client.get("/api/reports/salary-summary/2024-02", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["total_workers"] == 0
+    assert response.json()["category_summary"] == []
+
+
+def test_salary_records_month_filter(client, auth_headers, reference_data):
+    """测试按月份过滤工资记录视图，金额为数量乘以单价"""
+    quota_id = _create_quota(client, auth_headers, reference_data, unit_price="2.00").json()["id"]
+    for record_date in ("2024-01-31", "2024-02-01", "2024-02-29", "2024-03-01"):
+        client.post(
+            "/api/salary-records/",
+            headers=auth_headers,
+            json={"worker_code": "W001", "quota_id": quota_id, "quantity": "3", "record_date": record_date}
+        )
+
+    response = client.get("/api/salary-records/?record_date=2024-02", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert sorted(r["record_date"] for r in response.json()) == ["2024-02-01", "2024-02-29"]
+    assert all(float(r["amount"]) == 6.0 for r in response.json())
+
+    response = client.get("/api/reports/salary-summary/2024-02", headers=auth_headers)
+    assert response.json()["total_workers"] == 1
+    assert float(response.json()["total_amount"]) == 12.0
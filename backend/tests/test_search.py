@@ -0,0 +1,50 @@
+import time
+from types import SimpleNamespace
+
+from app.search_index import TypeaheadIndex, index_keys
+
+
+def test_index_keys_include_pinyin():
+    """测试中文名称生成拼音全拼和首字母索引键"""
+    keys = dict(index_keys("W001", "张三"))
+    assert keys == {"w001": "code", "张三": "name", "zhangsan": "pinyin", "zs": "initials"}
+
+
+def test_typeahead_by_code_name_and_pinyin(client, auth_headers, reference_data):
+    """测试按编码、名称、拼音首字母查询工人和工序"""
+    response = client.get("/api/search/typeahead?q=zs", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == [{"type": "worker", "code": "W001", "name": "张三", "matched": "initials"}]
+
+    results = client.get("/api/search/typeahead?q=p0", headers=auth_headers).json()
+    assert [(result["type"], result["code"]) for result in results] == [("process", "P001")]
+
+    results = client.get("/api/search/typeahead?q=raox&types=process", headers=auth_headers).json()
+    assert [result["name"] for result in results] == ["绕线"]
+
+
+def test_typeahead_follows_writes(client, auth_headers, reference_data):
+    """测试工人写入后索引增量更新"""
+    client.put("/api/workers/W001", headers=auth_headers, json={"name": "李四"})
+    client.post("/api/workers/", headers=auth_headers, json={"worker_code": "W002", "name": "王五"})
+
+    assert client.get("/api/search/typeahead?q=zs", headers=auth_headers).json() == []
+    assert client.get("/api/search/typeahead?q=ls", headers=auth_headers).json()[0]["code"] == "W001"
+    assert client.get("/api/search/typeahead?q=wangwu", headers=auth_headers).json()[0]["code"] == "W002"
+
+
+def test_typeahead_topk_is_fast():
+    """测试一万个实体时整体建立索引后的前缀查询耗时，之后的增量更新保持有序"""
+    index = TypeaheadIndex()
+    index.load("worker", {f"W{i:05d}": SimpleNamespace(name=f"工人{i}") for i in range(10000)})
+    index.upsert("worker", "W00001", "张三")
+    assert index._entries == sorted(index._entries)
+    assert index.search("zhangs")[0]["code"] == "W00001"
+
+    start = time.perf_counter()
+    for _ in range(100):
+        results = index.search("w01", limit=10)
+    elapsed = (time.perf_counter() - start) / 100
+
+    assert len(results) == 10
+    assert elapsed < 0.001
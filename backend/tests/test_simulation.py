@@ -0,0 +1,75 @@
+import pytest
+
+from app import models, simulation
+
+
+@pytest.fixture(autouse=True)
+def clear_simulation_cache():
+    simulation.clear_cache()
+    yield
+    simulation.clear_cache()
+
+
+@pytest.fixture
+def priced_records(client, auth_headers, reference_data, test_db):
+    """两个型号各一个定额，每个定额一条三月份的工作记录"""
+    test_db.add(models.MotorModel(name="Y200"))
+    test_db.commit()
+    for model_name, unit_price in (("Y100", "1.00"), ("Y200", "2.00")):
+        quota_id = client.post("/api/quotas/", headers=auth_headers, json={
+            "process_code": reference_data["process_code"],
+            "cat1_code": reference_data["cat1_code"],
+            "cat2_code": reference_data["cat2_code"],
+            "model_name": model_name,
+            "unit_price": unit_price,
+            "effective_date": "2024-01-01",
+        }).json()["id"]
+        client.post("/api/salary-records/", headers=auth_headers, json={
+            "worker_code": reference_data["worker_code"],
+            "quota_id": quota_id,
+            "quantity": "10",
+            "record_date": "2024-03-15",
+        })
+
+
+def simulate(client, auth_headers, rules, **kwargs):
+    return client.post("/api/simulations/reprice", headers=auth_headers, json={
+        "start_month": "2024-01", "end_month": "2024-12", "rules": rules, **kwargs,
+    })
+
+
+def test_reprice_simulation(client, auth_headers, reference_data, priced_records):
+    """测试按型号设定新单价和按工段调整百分比的模拟结果，且不修改数据库"""
+    result = simulate(client, auth_headers, [
+        {"scope": "cat1", "code": reference_data["cat1_code"], "percent": "10"},
+        {"scope": "model", "code": "Y200", "unit_price": "2.50"},
+    ]).json()
+    assert (result["record_count"], result["affected_records"]) == (2, 2)
+    assert (result["baseline_amount"], result["proposed_amount"], result["delta_amount"]) == ("30.00", "36.00", "6.00")
+    assert [(row["code"], row["delta_amount"]) for row in result["workers"]] == [(reference_data["worker_code"], "6.00")]
+    assert [(row["code"], row["delta_amount"]) for row in result["workshops"]] == [(reference_data["cat1_code"], "6.00")]
+
+    summary = client.get("/api/reports/salary-summary/2024-03", headers=auth_headers).json()
+    assert summary["total_amount"] == "30.00"
+
+
+def test_reprice_simulation_reloads_after_writes(client, auth_headers, reference_data, priced_records, test_db):
+    """测试列式副本按表版本号缓存：新增工作记录后重新读取"""
+    quota_id = test_db.query(models.Quota).filter_by(model_name="Y100").one().id
+    rules = [{"scope": "model", "code": "Y100", "percent": "-50"}]
+    assert simulate(client, auth_headers, rules).json()["delta_amount"] == "-5.00"
+
+    client.post("/api/salary-records/", headers=auth_headers, json={
+        "worker_code": reference_data["worker_code"], "quota_id": quota_id, "quantity": "10", "record_date": "2024-04-01",
+    })
+    assert simulate(client, auth_headers, rules).json()["record_count"] == 3
+
+
+def test_reprice_simulation_rejects_bad_rules(client, auth_headers, priced_records):
+    """测试规则不合法或月份区间颠倒时返回400/422"""
+    assert simulate(client, auth_headers, [{"scope": "model", "code": "Y100"}]).status_code == 400
+    assert simulate(client, auth_headers, [{"scope": "worker", "code": "W1", "percent": "1"}]).status_code == 422
+    response = client.post("/api/simulations/reprice", headers=auth_headers, json={
+        "start_month": "2024-12", "end_month": "2024-01", "rules": [{"scope": "model", "code": "Y100", "percent": "1"}],
+    })
+    assert response.status_code == 400
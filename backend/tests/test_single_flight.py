@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils.single_flight import SingleFlight, flight_key, single_flight
+
+
+def test_concurrent_sync_calls_share_one_execution():
+    """测试同步路由：并发的相同请求只执行一次，等待数计入统计"""
+    flights = SingleFlight()
+    executions, release = [], threading.Event()
+
+    def compute():
+        executions.append(1)
+        release.wait(5)
+        return {"total": 42}
+
+    with ThreadPoolExecutor(5) as pool:
+        futures = [pool.submit(flights.do, flight_key("report", month=" 2024-03"), compute) for _ in range(5)]
+        while flights.stats().get("report", {}).get("waiting") != 4:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert executions == [1]
+    assert all(result is results[0] for result in results)
+    assert flights.stats()["report"] == {"calls": 5, "executions": 1, "coalesced": 4, "waiting": 0, "max_waiters": 4}
+    # 计算结束后不再合并
+    assert flights.do(flight_key("report", month="2024-03"), lambda: "again") == "again"
+
+
+def test_async_calls_share_result_and_error():
+    """测试异步路由：共享结果和异常；执行方被取消时等待方重新执行"""
+    flights = SingleFlight()
+    calls = []
+
+    async def compute(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        if value == "error":
+            raise ValueError("boom")
+        return value
+
+    async def scenario():
+        key = flight_key("summary", month="2024-03")
+        results = await asyncio.gather(*(flights.do_async(key, lambda: compute("ok")) for _ in range(3)))
+        assert results == ["ok"] * 3
+
+        errors = await asyncio.gather(*(flights.do_async(key, lambda: compute("error")) for _ in range(2)), return_exceptions=True)
+        assert [str(error) for error in errors] == ["boom", "boom"]
+
+        leader = asyncio.ensure_future(flights.do_async(key, lambda: compute("cancelled")))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flights.do_async(key, lambda: compute("retried")))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await waiter == "retried"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(scenario())
+    assert calls == ["ok", "error", "cancelled", "retried"]
+
+
+def test_stats_endpoint(client, auth_headers):
+    """测试统计接口经过请求合并，合并统计可通过接口查询"""
+    single_flight.clear()
+    assert client.get("/api/stats/", headers=auth_headers).status_code == 200
+    stats = client.get("/api/stats/single-flight", headers=auth_headers).json()
+    assert stats["stats.summary"]["executions"] == 1
@@ -0,0 +1,37 @@
+from app import models
+
+
+def test_statistics_from_counters(client, auth_headers, reference_data, test_db):
+    """测试首页统计：记录数和月度汇总由触发器在增删改时维护，与实际数据一致"""
+    quota_id = client.post("/api/quotas/", headers=auth_headers, json={
+        "process_code": "P001", "cat1_code": "C1", "cat2_code": "C2", "model_name": "Y100",
+        "unit_price": "0.35", "effective_date": "2024-01-01",
+    }).json()["id"]
+    record_ids = [
+        client.post("/api/salary-records/", headers=auth_headers, json={
+            "worker_code": "W001", "quota_id": quota_id, "quantity": quantity, "record_date": record_date,
+        }).json()["id"]
+        for quantity, record_date in (("1.1", "2024-03-15"), ("2.2", "2024-03-01"), ("9", "2024-04-01"))
+    ]
+
+    stats = client.get("/api/stats/", headers=auth_headers).json()
+    assert stats["worker_count"] == 1
+    assert stats["quota_count"] == 1
+    assert stats["salary_record_count"] == 3
+    assert stats["monthly"] == [
+        {"month": "2024-04", "record_count": 1, "total_quantity": 9, "total_amount": 3.15},
+        {"month": "2024-03", "record_count": 2, "total_quantity": 3.3, "total_amount": 1.16},
+    ]
+
+    # 修改日期和数量后记录移到另一个月，删除后从汇总中减去
+    client.put(f"/api/salary-records/{record_ids[0]}", headers=auth_headers, json={"quantity": "2", "record_date": "2024-04-02"})
+    client.delete(f"/api/salary-records/{record_ids[2]}", headers=auth_headers)
+    stats = client.get("/api/stats/?months=1", headers=auth_headers).json()
+    assert stats["salary_record_count"] == 2
+    assert stats["monthly"] == [
+        {"month": "2024-04", "record_count": 1, "total_quantity": 2, "total_amount": 0.7},
+    ]
+
+    # 计数器与实际行数一致
+    assert test_db.query(models.WorkRecord).count() == 2
+    assert test_db.get(models.WorkRecordMonthTotal, "2024-03").record_count == 1
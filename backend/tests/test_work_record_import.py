@@ -0,0 +1,151 @@
+import io
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from app import models, work_record_import
+from app.utils.auth import get_password_hash
+
+
+@pytest.fixture(autouse=True)
+def error_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(work_record_import, "IMPORT_ERROR_DIR", str(tmp_path))
+
+
+@pytest.fixture
+def quotas(client, auth_headers, reference_data):
+    """同一业务键的两个版本：1月1日起1.00元，3月1日起1.50元"""
+    for unit_price, effective_date in (("1.00", "2024-01-01"), ("1.50", "2024-03-01")):
+        client.post("/api/quotas/", headers=auth_headers, json={
+            "process_code": "P001", "cat1_code": "C1", "cat2_code": "C2", "model_name": "Y100",
+            "unit_price": unit_price, "effective_date": effective_date,
+        })
+
+
+def upload(client, auth_headers, filename, content):
+    return client.post(
+        "/api/salary-records/import", headers=auth_headers, files={"file": (filename, content)}
+    )
+
+
+def test_import_csv_resolves_names_and_binds_quota(client, auth_headers, quotas):
+    """测试CSV导入：按姓名、工序名称和规范化型号解析，按日期绑定定额，无效行写入错误表"""
+    content = "\n".join([
+        "工号,工序,型号,数量,日期",
+        "张三,绕线,y-100,10,2024-02-10",
+        "W001,P001,Y100,2.5,2024/03/05",
+        "",
+        "W999,P001,Y100,1,2024-03-05",
+        "W001,P001,Y100,1,2023-12-31",
+        "W001,P001,Y100,-1,2024-03-05",
+    ]).encode("utf-8-sig")
+    result = upload(client, auth_headers, "daily.csv", content).json()
+    assert (result["total_rows"], result["imported"], result["failed"]) == (5, 2, 3)
+    assert [error["row"] for error in result["errors"]] == [5, 6, 7]
+
+    records = client.get("/api/salary-records/?worker_code=W001", headers=auth_headers).json()
+    assert sorted((record["unit_price"], record["amount"]) for record in records) == [("1.00", "10.00"), ("1.50", "3.75")]
+
+    response = client.get(result["error_report_url"], headers=auth_headers)
+    assert response.status_code == 200
+    lines = response.content.decode("utf-8-sig").splitlines()
+    assert lines[0] == "行号,错误,工号,工序,型号,数量,日期"
+    assert lines[1].startswith("5,Worker not found")
+
+
+def test_error_sheet_is_limited_to_uploader_and_admin(client, auth_headers, quotas, test_db):
+    """测试错误表只有上传者和管理员可以下载"""
+    test_db.add(models.User(username="clerk", name="Clerk", role="statistician",
+                            password=get_password_hash("clerkpass123"), need_change_password=False))
+    test_db.commit()
+    token = client.post("/api/auth/login", json={"username": "clerk", "password": "clerkpass123"}).json()["access_token"]
+    clerk_headers = {"Authorization": f"Bearer {token}"}
+    content = "\n".join(["工号,工序,型号,数量,日期", "W999,P001,Y100,1,2024-03-05"]).encode("utf-8-sig")
+
+    error_report_url = upload(client, auth_headers, "daily.csv", content).json()["error_report_url"]
+    assert client.get(error_report_url, headers=clerk_headers).status_code == 403
+
+    error_report_url = upload(client, clerk_headers, "daily.csv", content).json()["error_report_url"]
+    assert client.get(error_report_url, headers=clerk_headers).status_code == 200
+    assert client.get(error_report_url, headers=auth_headers).status_code == 200
+
+
+def test_import_xlsx(client, auth_headers, quotas):
+    """测试xlsx导入（只读模式流式解析，单元格为日期和数字类型）"""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["worker_code", "process", "cat1", "cat2", "model", "quantity", "date"])
+    sheet.append(["W001", "P001", "精加工", "C2", "Y100", 4, work_record_import.parse_date("2024-03-02")])
+    sheet.append(["W001", "P001", "C9", "C2", "Y100", 4, "2024-03-02"])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    result = upload(client, auth_headers, "daily.xlsx", buffer.getvalue()).json()
+    assert (result["imported"], result["failed"]) == (1, 1)
+    assert result["errors"][0]["errors"] == ["Process category 1 not found: C9"]
+    errors = load_workbook(io.BytesIO(client.get(result["error_report_url"], headers=auth_headers).content))
+    assert [cell.value for cell in next(errors.active.iter_rows(min_row=2))][:2] == [3, "Process category 1 not found: C9"]
+
+
+def test_import_rejects_bad_files(client, auth_headers, quotas):
+    """测试不支持的文件类型和缺少必需列时返回400"""
+    assert upload(client, auth_headers, "daily.txt", b"x").status_code == 400
+    response = upload(client, auth_headers, "daily.csv", "工号,数量\nW001,1\n".encode())
+    assert response.status_code == 400
+    assert "process" in response.json()["detail"]
+    assert client.get("/api/salary-records/import/errors/" + "0" * 32, headers=auth_headers).status_code == 404
+
+
+def test_dry_run_reports_every_problem_without_writing(client, auth_headers, quotas):
+    """测试试算：一行报告全部问题、批次内重复行、超出范围或超过两位小数的数量，不写入数据库也不生成错误表"""
+    content = "\n".join([
+        "工号,工序,型号,数量,日期",
+        "W001,P001,Y100,2,2024-03-05",
+        "W999,P404,Y100,-1,2024-03-05",
+        "W001,P001,Y100,2,2024-03-05",
+        "W001,P001,Y100,1e30,2024-03-06",
+        "W001,P001,Y100,1.234,2024-03-07",
+    ]).encode("utf-8-sig")
+    response = client.post(
+        "/api/salary-records/import?dry_run=true", headers=auth_headers, files={"file": ("daily.csv", content)}
+    )
+    result = response.json()
+    assert (result["dry_run"], result["imported"], result["failed"], result["error_report_url"]) == (True, 0, 4, None)
+    assert result["errors"] == [
+        {"row": 3, "errors": ["Quantity must not be negative: -1", "Worker not found: W999", "Process not found: P404"]},
+        {"row": 4, "errors": ["Duplicate of row 2"]},
+        {"row": 5, "errors": ["Quantity out of range: 1e30"]},
+        {"row": 6, "errors": ["Quantity must have at most 2 decimal places: 1.234"]},
+    ]
+    assert client.get("/api/salary-records/?worker_code=W001", headers=auth_headers).json() == []
+
+
+def test_import_rejects_duplicates_like_dry_run(client, auth_headers, quotas):
+    """测试实际导入与试算一样拒绝文件内的重复行"""
+    content = "\n".join(["工号,工序,型号,数量,日期"] + ["W001,P001,Y100,2,2024-03-05"] * 2).encode("utf-8-sig")
+    dry_run = client.post(
+        "/api/salary-records/import?dry_run=true", headers=auth_headers, files={"file": ("daily.csv", content)}
+    ).json()
+    result = upload(client, auth_headers, "daily.csv", content).json()
+    assert (result["imported"], result["failed"]) == (1, 1)
+    assert result["errors"] == dry_run["errors"] == [{"row": 3, "errors": ["Duplicate of row 2"]}]
+
+
+def test_json_batch(client, auth_headers, quotas):
+    """测试JSON批量提交：试算只返回诊断；有无效行时整批拒绝；全部有效时写入"""
+    rows = [
+        {"worker": "张三", "process": "绕线", "model": "y-100", "quantity": 3, "record_date": "2024-02-10"},
+        {"worker": "W001", "process": "P001", "model": "Y100", "quantity": "abc", "record_date": None},
+    ]
+    result = client.post("/api/salary-records/batch?dry_run=true", headers=auth_headers, json=rows).json()
+    assert (result["total_rows"], result["imported"], result["failed"]) == (2, 0, 1)
+    assert result["errors"] == [{"row": 2, "errors": ["Missing record_date", "Invalid quantity: abc"]}]
+
+    response = client.post("/api/salary-records/batch", headers=auth_headers, json=rows)
+    assert response.status_code == 400
+    assert client.get("/api/salary-records/?worker_code=W001", headers=auth_headers).json() == []
+
+    result = client.post("/api/salary-records/batch", headers=auth_headers, json=rows[:1]).json()
+    assert (result["dry_run"], result["imported"], result["failed"]) == (False, 1, 0)
+    records = client.get("/api/salary-records/?worker_code=W001", headers=auth_headers).json()
+    assert [(record["unit_price"], record["amount"]) for record in records] == [("1.00", "3.00")]
@@ -0,0 +1,126 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app import models
+from app.db_schema import init_schema
+from tests.conftest import engine
+
+
+def create_priced_record(client, auth_headers, reference_data, unit_price="1.50", quantity="10"):
+    quota = client.post("/api/quotas/", headers=auth_headers, json={
+        "process_code": reference_data["process_code"],
+        "cat1_code": reference_data["cat1_code"],
+        "cat2_code": reference_data["cat2_code"],
+        "model_name": reference_data["model_name"],
+        "unit_price": unit_price,
+        "effective_date": "2024-01-01",
+    }).json()
+    response = client.post("/api/salary-records/", headers=auth_headers, json={
+        "worker_code": reference_data["worker_code"],
+        "quota_id": quota["id"],
+        "quantity": quantity,
+        "record_date": "2024-03-15",
+    })
+    assert response.status_code == 201
+    return quota["id"], response.json()
+
+
+def test_price_captured_at_entry(client, auth_headers, reference_data):
+    """测试录入时保存单价，定额调价不影响已录入的工资"""
+    quota_id, record = create_priced_record(client, auth_headers, reference_data)
+    assert (record["unit_price"], record["amount"]) == ("1.50", "15.00")
+    assert "unit_price_cents" not in record
+
+    client.put(f"/api/quotas/{quota_id}", headers=auth_headers, json={"unit_price": "2.00"})
+    salary = client.get(f"/api/salary-records/{record['id']}", headers=auth_headers).json()
+    assert (salary["unit_price"], salary["amount"]) == ("1.50", "15.00")
+    summary = client.get("/api/reports/salary-summary/2024-03", headers=auth_headers).json()
+    assert summary["total_amount"] == "15.00"
+
+    # 修改数量按录入时的单价重算金额
+    record = client.put(f"/api/salary-records/{record['id']}", headers=auth_headers, json={"quantity": "20"}).json()
+    assert (record["unit_price"], record["amount"]) == ("1.50", "30.00")
+
+
+def test_reprice(client, auth_headers, reference_data):
+    """测试管理员显式重新计价"""
+    quota_id, record = create_priced_record(client, auth_headers, reference_data)
+    client.put(f"/api/quotas/{quota_id}", headers=auth_headers, json={"unit_price": "2.00"})
+
+    response = client.post("/api/salary-records/reprice", headers=auth_headers, json={"quota_id": quota_id})
+    assert response.json() == {"updated": 1}
+    salary = client.get(f"/api/salary-records/{record['id']}", headers=auth_headers).json()
+    assert (salary["unit_price"], salary["amount"]) == ("2.00", "20.00")
+
+    # 单价未变化的记录不重复更新
+    assert client.post("/api/salary-records/reprice", headers=auth_headers, json={}).json() == {"updated": 0}
+    response = client.post(
+        "/api/salary-records/reprice", headers=auth_headers, json={"start_date": "2024-04-01", "end_date": "2024-03-01"}
+    )
+    assert response.status_code == 400
+
+
+def test_upgrade_backfills_prices(client, auth_headers, reference_data, test_db):
+    """测试升级已有数据库时补建列并按定额单价补写"""
+    _, record = create_priced_record(client, auth_headers, reference_data, unit_price="0.35", quantity="3")
+    with engine.begin() as conn:
+        conn.execute(text("DROP VIEW v_salary_records"))
+        for event in ("insert", "update", "delete"):
+            conn.execute(text(f"DROP TRIGGER trg_work_records_month_total_{event}"))
+        conn.execute(text("DROP TRIGGER trg_work_records_change_version"))
+        conn.execute(text("ALTER TABLE work_records DROP COLUMN amount_cents"))
+        conn.execute(text("ALTER TABLE work_records DROP COLUMN unit_price_cents"))
+
+    init_schema(engine)
+    test_db.expire_all()
+    upgraded = test_db.get(models.WorkRecord, record["id"])
+    assert (upgraded.unit_price_cents, upgraded.amount_cents) == (35, 105)
+    assert upgraded.record_date == date(2024, 3, 15)
+
+
+def test_exact_amounts(client, auth_headers, reference_data):
+    """测试金额按分四舍五入、汇总为精确的整数求和，数量保留两位小数"""
+    quota_id, record = create_priced_record(client, auth_headers, reference_data, unit_price="0.35", quantity="0.5")
+    assert (record["quantity"], record["amount"]) == ("0.50", "0.18")
+    for quantity in ("1.1", "2.2", "4"):
+        client.post("/api/salary-records/", headers=auth_headers, json={
+            "worker_code": reference_data["worker_code"],
+            "quota_id": quota_id,
+            "quantity": quantity,
+            "record_date": "2024-03-16",
+        })
+    summary = client.get("/api/reports/salary-summary/2024-03", headers=auth_headers).json()
+    assert summary["total_amount"] == "2.74"
+    records = client.get("/api/salary-records/?record_date=2024-03-16", headers=auth_headers).json()
+    assert sorted(item["quantity"] for item in records) == ["1.10", "2.20", "4.00"]
+
+
+@pytest.mark.parametrize("view_as_table", [False, True])
+def test_migrate_decimal_columns(client, auth_headers, reference_data, test_db, view_as_table):
+    """测试旧版本以小数保存的单价和数量迁移为整数列（包括视图被旧版本的create_all建成表的数据库）"""
+    quota_id, record = create_priced_record(client, auth_headers, reference_data, unit_price="1.25", quantity="2.5")
+    with engine.begin() as conn:
+        conn.execute(text("DROP VIEW v_salary_records"))
+        if view_as_table:
+            conn.execute(text("CREATE TABLE v_salary_records (id INTEGER PRIMARY KEY)"))
+        for event in ("insert", "update", "delete"):
+            conn.execute(text(f"DROP TRIGGER trg_quotas_current_{event}"))
+            conn.execute(text(f"DROP TRIGGER trg_work_records_month_total_{event}"))
+        conn.execute(text("DROP TRIGGER trg_work_records_change_version"))
+        for table_name, old, new in (
+            ("quotas", "unit_price", "unit_price_cents"),
+            ("current_quotas", "unit_price", "unit_price_cents"),
+            ("work_records", "quantity", "quantity_hundredths"),
+        ):
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {old} NUMERIC(10, 2)"))
+            conn.execute(text(f"UPDATE {table_name} SET {old} = {new} / 100.0"))
+            conn.execute(text(f"ALTER TABLE {table_name} DROP COLUMN {new}"))
+
+    init_schema(engine)
+    test_db.expire_all()
+    assert test_db.get(models.Quota, quota_id).unit_price_cents == 125
+    assert test_db.get(models.WorkRecord, record["id"]).quantity_hundredths == 250
+    salary = client.get(f"/api/salary-records/{record['id']}", headers=auth_headers).json()
+    assert (salary["quantity"], salary["unit_price"], salary["amount"]) == ("2.50", "1.25", "3.13")
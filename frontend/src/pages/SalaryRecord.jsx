@@ -31,7 +31,7 @@ const SalaryRecord = () => {
   // 获取定额列表
   const fetchQuotas = async () => {
     try {
-      const data = await quotaAPI.getQuotas();
+      const data = await quotaAPI.getCurrentQuotas();
       setQuotas(data);
     } catch (error) {
       message.error('获取定额列表失败');
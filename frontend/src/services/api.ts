@@ -98,6 +98,8 @@ export const quotaAPI = {
     api.get('/quotas/', { params }),
   getQuota: (id: number): Promise<Quota> => 
     api.get(`/quotas/${id}`),
+  getCurrentQuotas: (params?: any): Promise<Quota[]> => 
+    api.get('/quotas/current', { params }),
   getLatestQuota: (processCode: string): Promise<Quota> => 
     api.get(`/quotas/latest/${processCode}`),
   createQuota: (data: Omit<Quota, 'id'>): Promise<Quota> => 